@@ -1,16 +1,21 @@
 import os
 
 from GeneticAgent.population import Population
-from GeneticAgent.individual import Individual
+from GeneticAgent.individual import Individual, MUTATION_THRESHOLDS, MUTATION_RESULTS, MUTATION_COSTS
 from GeneticAgent.genetic_resources import *
+from GeneticAgent.profiling import TIMER, timed, phase, count
+from GeneticAgent.random_streams import RandomStreams
 
 import numpy as np
 import random
-import copy
 import math
 from GeneticAgent.config import *
 
 
+# The cost of keeping every packed tower as it is:
+KEEP_COSTS = np.diag(TRANSITION_COSTS)
+
+
 class GeneticAlgorithm:
 
     @ staticmethod
@@ -34,27 +39,63 @@ class GeneticAlgorithm:
 
         return normalized_lives + normalized_money + normalized_money_earned  # Survived
 
-    def __init__(self, init_wave, seg, log, pop_seed=None):
+    @ staticmethod
+    def min_lives(individual, threshold):
+        """
+        :return: The fewest lives the individual's game may be left with and still get a fitness above threshold,
+                 even if it earns MAX_EARNINGS_PER_SEGMENT (an upper bound of fitness_function).
+        """
+        ancestor_lives = 15 if individual.get_ancestor() is None else individual.get_ancestor().get_lives()
+
+        best_money = (individual.get_money() + MAX_EARNINGS_PER_SEGMENT) / individual.get_ancestor().get_money() if \
+                     individual.get_ancestor().get_money() != 0 else 1
+
+        for lives in range(1, ancestor_lives):  # Survived, barely
+            if 1 - ((ancestor_lives - lives) / 15) + best_money > threshold:
+                return lives
+
+        return ancestor_lives
+
+    def __init__(self, init_wave, seg, log, pop_seed=None, evaluator=None, cache=None, checkpointer=None,
+                 surrogate=None, speculator=None, streams=None):
         """
         Initializes a Genetic Algorithm object.
         :param init_wave: The starting point in the game from which the algorithm needs to learn.
         :param pop_seed: List of individuals that we be the seed of the initial population.
+        :param evaluator: An Evaluator that plays the games of the generations (see Population.let_live).
+        :param cache: An AchievementCache of the games that were already played (see Population.let_live).
+        :param checkpointer: A Checkpointer that saves the run after every generation.
+        :param surrogate: A Surrogate that picks the babies that are played (see screen).
+        :param speculator: A Speculator that starts the next segment while the last generation is played.
+        :param streams: The RandomStreams the algorithm draws from, unseeded ones by default.
         """
         self.init_wave = init_wave
+        self.evaluator = evaluator
+        self.cache = cache
+        self.checkpointer = checkpointer
+        self.surrogate = surrogate
+        self.speculator = speculator
+        self.is_pop_evaluated = False
+        self.is_pop_played = False
         self.num_waves = WAVES_PER_SEGMENT
         self.gen_idx = 0
         self.segment = seg
         self.population = Population(self.segment)
         self.log = log
+        self.fingerprints = set()  # The genomes and lives of the babies, see deduplicate
+        self.streams = streams if streams is not None else RandomStreams()
+        self.timing = dict()  # The seconds of every phase of the segment, see log_timing
 
         if pop_seed is None:
-            self.ancestors = [Individual(START_OF_GAME_MONEY, self.segment, genome=[Tower() for i in range(209)])]
+            self.ancestors = [Individual(START_OF_GAME_MONEY, self.segment, genome=EMPTY_GENOME.copy())]
             # Build new random population:
-            self.population.init_random_pop(START_OF_GAME_MONEY, self.ancestors[0], gen_num=self.gen_idx)
+            self.population.init_random_pop(START_OF_GAME_MONEY, self.ancestors[0], gen_num=self.gen_idx,
+                                            rng=self.streams.py)
         else:
             self.ancestors = pop_seed
             # Build new population from the individuals in pop_seed:
-            self.population.init_pop_from_inds(self.mutation(self.crossover(np.array(pop_seed)), MUTATION_RATE_MULTIPLIER))
+            babies = self.mutation(self.crossover(np.array(pop_seed)), MUTATION_RATE_MULTIPLIER)
+            self.population.init_pop_from_inds(self.screen(self.deduplicate(babies, np.array(pop_seed))))
             
 
         # list of np.arrays, where fittest_inds[gen] stores the fittest individuals of that gen:
@@ -64,15 +105,103 @@ class GeneticAlgorithm:
         """
         Updates the population's fitness values.
         """
-        self.population.let_live()
+        if self.surrogate is not None:
+            features = self.surrogate.features(self.population.individuals)
+
+        if not self.is_pop_played:
+            self.population.let_live(self.evaluator, self.cache, self.games_min_lives())
+        self.is_pop_played = False
 
         self.population.update()  # update the individual's lifetime achievements (needed for the fitness calc)
 
         for individual in self.population:
             individual.set_fitness(self.fitness_function(individual))
 
+        if self.surrogate is not None:  # The fitness of stopped games is not the fitness of their genome
+            finished = [row for row, individual in enumerate(self.population) if not individual.is_stopped()]
+            self.surrogate.learn(features[finished],
+                                 [self.population.individuals[row].get_fitness() for row in finished])
+
         self.log_generation()
 
+        self.is_pop_evaluated = True
+        if self.checkpointer is not None:
+            with phase("checkpoint"):
+                self.checkpointer.save(self)
+        self.log_timing()
+
+    def play_population(self, evaluator):
+        """
+        Plays the games of the population ahead of calculate_pop_fitness (see Speculator), with the cache (which the
+        algorithm that speculated uses at the same time) and without min_lives.
+        """
+        self.population.let_live(evaluator, self.cache)
+        self.is_pop_played = True
+
+    def games_min_lives(self):
+        """
+        :return: dict of individual id -> the min_lives its game is played with, so the games that can no longer beat
+                 PRUNE_FRACTION of the last generation's FITTEST_AMOUNT-th fitness stop early; or None to play all
+                 the games to their end.
+        """
+        if PRUNE_FRACTION is None or not self.fittest_inds or len(self.fittest_inds[-1]) < FITTEST_AMOUNT:
+            return None
+
+        threshold = PRUNE_FRACTION * min([individual.get_fitness() for individual in self.fittest_inds[-1]])
+        return {individual.get_id(): self.min_lives(individual, threshold) for individual in self.population}
+
+    def deduplicate(self, babies, fittest, new_generation=True):
+        """
+        :param babies: A new generation of valid individuals.
+        :param fittest: np.array of the individuals the babies were bred from.
+        :param new_generation: Whether the babies start a generation (or are added to the last one's).
+        :return: The babies, whose duplicates (see DEDUPLICATE) were mutated again, or replaced by new babies of
+                 fittest, DEDUPLICATE_TRIES times at most.
+        """
+        if DEDUPLICATE is None:
+            return babies
+        if DEDUPLICATE == "generation" and new_generation:
+            self.fingerprints.clear()
+
+        unique = list()
+        for attempt in range(DEDUPLICATE_TRIES + 1):
+            duplicates = list()
+            for baby in babies:
+                fingerprint = (baby.get_genome().tobytes(), baby.get_lives())
+                if fingerprint in self.fingerprints:
+                    duplicates.append(baby)
+                else:
+                    self.fingerprints.add(fingerprint)
+                    unique.append(baby)
+
+            if not duplicates or attempt == DEDUPLICATE_TRIES:
+                break
+            if DUPLICATES == "reject":
+                babies = self.mutation(self.crossover(fittest, len(duplicates)))
+                for baby, duplicate in zip(babies, duplicates):  # The new babies take the ids of the rejected ones
+                    baby.id = duplicate.get_id()
+            else:
+                babies = self.mutation(duplicates, MUTATION_RATE_MULTIPLIER)
+
+        if duplicates:
+            self.log.write_to_run_log("Kept " + str(len(duplicates)) + " duplicate babies")
+        return unique + duplicates
+
+    def screen(self, babies):
+        """
+        :param babies: A new generation of valid individuals.
+        :return: The babies that will be played: the SURROGATE_PLAY_FRACTION of them that the surrogate ranks
+                 fittest (but no less than FITTEST_AMOUNT), or all of them.
+        """
+        if self.surrogate is None:
+            return babies
+
+        amount = max(FITTEST_AMOUNT, math.ceil(SURROGATE_PLAY_FRACTION * len(babies)))
+        screened = self.surrogate.screen(babies, amount)
+        self.log.write_to_run_log("Screened " + str(len(screened)) + " of " + str(len(babies)) + " babies")
+        return screened
+
+    @timed("selection")
     def selection(self):
         """
         Selects and stores the FITTEST_AMOUNT fittest individuals.
@@ -85,92 +214,134 @@ class GeneticAlgorithm:
 
     def cross_parents_genomes(self, p1g, p2g):
         """
-        :param p1g: np.array of Tower objects, of size GENOME_SIZE, representing parent1's genome.
-        :param p2g: np.array of Tower objects, of size GENOME_SIZE, representing parent2's genome.
-        :return: 2 genomes (np.array of Tower objects, of size GENOME_SIZE) that are
+        :param p1g: Genome of size GENOME_SIZE, representing parent1's genome.
+        :param p2g: Genome of size GENOME_SIZE, representing parent2's genome.
+        :return: 2 genomes (Genome objects of size GENOME_SIZE) that are
                 composed of the parents' genomes, and that are valid:
                 One of the parent's genome can transform (and afford it) via
                 legal actions to the baby's genome
         """
-        break_point = random.randint(0, GENOME_SIZE)
-
-        parent_copy_1 = np.split(copy.deepcopy(p1g), [break_point])
-        parent_copy_2 = np.split(copy.deepcopy(p2g), [break_point])
+        break_point = self.streams.py.randint(0, GENOME_SIZE)
 
-        b1g = np.concatenate((parent_copy_1[0], parent_copy_2[1]))
-        b2g = np.concatenate((parent_copy_2[0], parent_copy_1[1]))
-
-        return b1g, b2g
+        return p1g.cross(p2g, break_point)
 
     def is_valid_genome(self, baby_genome):
         """
-        :param baby_genome: np.array of Tower objects, of size GENOME_SIZE.
+        :param baby_genome: Genome of size GENOME_SIZE.
         :return: Boolean value representing whether or not there is a legal parent to this baby.
                 If There such legal parent:
                     we will return True, the optimal parent and the initial money it passes to it's baby.
                 Else:
                     we will return False, None, 0
         """
-        money = -math.inf
-        opt_ancestor = None
+        return self.validate_genomes([baby_genome])[0]
 
-        for ancestor in self.ancestors:
-            build_cost = self.evolution_cost(baby_genome, ancestor.get_genome())
-            baby_money_after_build = ancestor.get_money() - build_cost
-            if baby_money_after_build >= 0 and baby_money_after_build > money:  # legal & optimal parenthood
-                money = baby_money_after_build
-                opt_ancestor = ancestor
+    @timed("validation")
+    def validate_genomes(self, baby_genomes, repair=False):
+        """
+        is_valid_genome of every genome in baby_genomes, for all the babies and ancestors at once.
+        :param baby_genomes: list of Genome objects of size GENOME_SIZE.
+        :param repair: Whether to repair (see repair_genome) the babies no ancestor can afford, so all are valid.
+        :return: list of (is_valid, opt_ancestor, money) tuples, one per baby.
+        """
+        ancestors_money = np.array([ancestor.get_money() for ancestor in self.ancestors], dtype=float)
+        costs = self.evolution_costs(baby_genomes, [ancestor.get_genome() for ancestor in self.ancestors])
+        money = ancestors_money - costs
+
+        if repair:
+            for baby_idx in np.flatnonzero((money < 0).all(axis=1)):
+                ancestor_idx = np.argmax(money[baby_idx])  # The one that comes closest to afford it
+                money[baby_idx, ancestor_idx] = ancestors_money[ancestor_idx] - self.repair_genome(
+                    baby_genomes[baby_idx], self.ancestors[ancestor_idx].get_genome(), ancestors_money[ancestor_idx])
+
+        money[money < 0] = -math.inf  # illegal parenthood
+        opt_ancestors = np.argmax(money, axis=1)  # the first of the optimal ones
+
+        validated = list()
+        for baby_idx, ancestor_idx in enumerate(opt_ancestors):
+            baby_money = money[baby_idx, ancestor_idx]
+            if baby_money == -math.inf:
+                validated.append((False, None, 0))
+            else:
+                validated.append((True, self.ancestors[ancestor_idx], float(baby_money)))
+        return validated
 
-        if money == -math.inf:
-            return False, None, 0
-        else:
-            return True, opt_ancestor, money
+    @staticmethod
+    def repair_genome(baby_genome, parent_genome, money):
+        """
+        Reverts the genes of baby_genome whose evolution from parent_genome costs the most to the parent's towers (or
+        to no tower, where keeping the parent's tower is not free), until the evolution costs no more than money.
+        Reverting all of them costs nothing at most, so a parent with money left can always afford the repaired baby.
+        :return: The cost of the evolution from parent's genome to the repaired baby's genome.
+        """
+        reverts = np.where(KEEP_COSTS[parent_genome.codes] == 0, parent_genome.codes, 0)
+        gene_costs = TRANSITION_COSTS[parent_genome.codes, baby_genome.codes]
+        savings = gene_costs - TRANSITION_COSTS[parent_genome.codes, reverts]
+        order = np.argsort(-savings, kind='stable')
+        # The cost that is left after reverting the first i genes of order, for every i:
+        costs_left = gene_costs.sum() - np.concatenate(([0], np.cumsum(savings[order])))
+        reverted = order[:np.argmax(costs_left <= money)]
+        baby_genome.codes[reverted] = reverts[reverted]
+        return costs_left[len(reverted)]
 
     def evolution_cost(self, baby_genome, parent_genome):
         """
-        :param baby_genome: np.array of Tower objects, of size GENOME_SIZE, representing the baby's genome
-        :param parent_genome: np.array of Tower objects, of size GENOME_SIZE, representing a baby parent's genome.
+        :param baby_genome: Genome of size GENOME_SIZE, representing the baby's genome
+        :param parent_genome: Genome of size GENOME_SIZE, representing a baby parent's genome.
         :return: The cost of the evolution from parent's genome to baby's genome.
         """
-        cost = 0
-
-        for gene in range(GENOME_SIZE):
-            if parent_genome[gene] != baby_genome[gene]:
-                baby_type, baby_level = baby_genome[gene].get_tower()
-                cost += parent_genome[gene].estimate_update(baby_type, baby_level)
+        return TRANSITION_COSTS[parent_genome.codes, baby_genome.codes].sum()
 
-        return cost
+    @staticmethod
+    def evolution_costs(baby_genomes, parent_genomes):
+        """
+        :param baby_genomes: list of Genome objects of size GENOME_SIZE.
+        :param parent_genomes: list of Genome objects of size GENOME_SIZE.
+        :return: np.array of shape (len(baby_genomes), len(parent_genomes)) of the evolution_cost of every baby from
+                 every parent.
+        """
+        babies = np.array([genome.codes for genome in baby_genomes])
+        parents = np.array([genome.codes for genome in parent_genomes])
+        return TRANSITION_COSTS[parents[np.newaxis, :, :], babies[:, np.newaxis, :]].sum(axis=2)
 
-    def crossover(self, fittest):
+    @timed("crossover")
+    def crossover(self, fittest, amount=POP_SIZE):
         """
-        Breeds the fittest individuals until we reach a population of POP_SIZE valid individuals.
+        Breeds the fittest individuals until we reach a population of amount valid individuals.
         :param fittest: np.array of individuals which we will crossover
         :return: The newly created population.
         """
         new_gen = list()
 
-        while len(new_gen) < POP_SIZE:
-            parents_idx = random.sample(range(len(fittest)), 2)
-            parent1, parent2 = fittest[parents_idx]
-            baby1_genome, baby2_genome = self.cross_parents_genomes(parent1.get_genome(), parent2.get_genome())
-
-            for baby_genome in [baby1_genome, baby2_genome]:
-                if len(new_gen) != POP_SIZE:  # We need more babies!
-                    is_valid, opt_ancestor, money = self.is_valid_genome(baby_genome)
-                    if is_valid:
-                        baby = Individual(money, self.segment, genome=baby_genome, ancestor=opt_ancestor, gen_num=parent1.gen_num + 1)
-                        baby.set_genetic_parents_ids_string(str(parent1.id) + ", " + str(parent2.id))
-                        new_gen.append(baby)
+        while len(new_gen) < amount:
+            # Breed the least amount of couples that may fill the population, and validate their babies at once:
+            couples = list()
+            baby_genomes = list()
+            for i in range(math.ceil((amount - len(new_gen)) / 2)):
+                parents_idx = self.streams.py.sample(range(len(fittest)), 2)
+                parent1, parent2 = fittest[parents_idx]
+                couples += [(parent1, parent2)] * 2
+                baby_genomes += self.cross_parents_genomes(parent1.get_genome(), parent2.get_genome())
+
+            count("babies", len(baby_genomes))
+            for (parent1, parent2), baby_genome, (is_valid, opt_ancestor, money) in \
+                    zip(couples, baby_genomes, self.validate_genomes(baby_genomes, REPAIR_BABIES)):
+                if not is_valid:
+                    count("invalid_babies")
+                if is_valid and len(new_gen) != amount:  # We need more babies!
+                    baby = Individual(money, self.segment, genome=baby_genome, ancestor=opt_ancestor, gen_num=parent1.gen_num + 1)
+                    baby.set_genetic_parents_ids_string(str(parent1.id) + ", " + str(parent2.id))
+                    new_gen.append(baby)
 
         return new_gen
 
     @staticmethod
-    def mutate_buy_sell_upgrade(baby, mutation_indices):
+    def mutate_buy_sell_upgrade(baby, mutation_indices, rng=random):
         # print("baby.money is " + str(baby.money))
         for i in mutation_indices:
             gene = baby.genome[i]
-            type = random.choice(list(TowerType))
-            level = random.choice(list(TowerLevel))
+            type = rng.choice(list(TowerType))
+            level = rng.choice(list(TowerLevel))
 
             baby.change_tower_under_constrains(gene, type, level)
 
@@ -181,25 +352,78 @@ class GeneticAlgorithm:
         """
         mutation_indices = list()
         for gene_idx in range(len(baby.genome)):
-            r = random.random()
+            r = self.streams.py.random()
             if r < (MUTATION_RATE * mutation_rate_multiplier):
                 mutation_indices.append(gene_idx)
 
         # print("mutamutation_indices: " + str(mutation_indices))
 
-        return self.mutate_buy_sell_upgrade(baby, mutation_indices)
+        return self.mutate_buy_sell_upgrade(baby, mutation_indices, self.streams.py)
 
+    def mutate_batch(self, babies, mutation_rate_multiplier):
+        """
+        mutate of all the babies at once: a single mask picks the mutated genes of all of them, and the towers they
+        are mutated to are drawn together. Every baby still pays for its mutations in the order of its genes, so the
+        i-th mutations of all the babies are applied together (see MUTATION_THRESHOLDS), and the work follows the
+        amount of mutated genes.
+        :param babies: list of the Individual objects to mutate.
+        """
+        rng = self.streams.np
+        codes = np.array([baby.genome.codes for baby in babies], dtype=np.uint8).reshape(len(babies), GENOME_SIZE)
+        money = np.array([baby.get_money() for baby in babies], dtype=float)
+
+        rows, genes = np.nonzero(rng.random(codes.shape) < MUTATION_RATE * mutation_rate_multiplier)
+        types = rng.integers(len(TowerType), size=len(rows))
+        levels = rng.integers(len(TowerLevel), size=len(rows))
+        # The order of every mutation among the mutations of its baby (rows is sorted):
+        ranks = np.arange(len(rows)) - np.searchsorted(rows, rows)
+
+        for rank in range(ranks.max(initial=-1) + 1):
+            step = np.flatnonzero(ranks == rank)
+            babies_idx, genes_idx, step_types = rows[step], genes[step], types[step]
+            current = codes[babies_idx, genes_idx]
+            settled = (MUTATION_THRESHOLDS[current, step_types, levels[step]] <= money[babies_idx, np.newaxis]).sum(1)
+            codes[babies_idx, genes_idx] = MUTATION_RESULTS[current, step_types, settled]
+            money[babies_idx] -= MUTATION_COSTS[current, step_types, settled]
+
+        for baby, baby_codes, baby_money in zip(babies, codes, money):
+            baby.genome.codes[:] = baby_codes
+            baby.money = float(baby_money)
+
+    @timed("mutation")
     def mutation(self, new_gen, mutation_rate_multiplier=1):
         """
         Mutates the population's genome.
         :param new_gen: A new generation of POP_SIZE valid individuals.
         :return: POP_SIZE valid individuals after mutation, from new_gen.
         """
+        if BATCH_MUTATION:
+            self.mutate_batch(new_gen, mutation_rate_multiplier)
+            return new_gen
+
         for baby in new_gen:
             self.mutate(baby, mutation_rate_multiplier)
         return new_gen
 
 
+    def resume(self, log, evaluator=None, cache=None, checkpointer=None, surrogate=None, speculator=None):
+        """
+        Attaches the objects that are not saved with a checkpoint to an algorithm loaded from one (or speculated).
+        """
+        self.log = log
+        self.evaluator = evaluator
+        self.cache = cache
+        self.checkpointer = checkpointer
+        self.surrogate = surrogate
+        self.speculator = speculator
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attribute in ["log", "evaluator", "cache", "checkpointer", "surrogate", "speculator"]:
+            state[attribute] = None
+        return state
+
+    @timed("logging")
     def log_generation(self):
         """
         log the following:
@@ -214,25 +438,44 @@ class GeneticAlgorithm:
         data = list()
         average_fitness = 0
         max_fitness = 0
+        stopped = 0
         
         for i in self.population:
             average_fitness += i.get_fitness()
             max_fitness = max(max_fitness, i.get_fitness())
             lives_lost = i.get_ancestor().get_lives() - i.get_lives()
-            # ["Generation, ID, Fitness, Lives lost, Money earned, Money spent, Waves Survived"]
-            d = [self.gen_idx, i.id, i.get_fitness(), lives_lost, i.get_money_earned(), i.get_money_spent(), i.get_wave()]
+            stopped += i.is_stopped()
+            # ["Generation, ID, Fitness, Lives lost, Money earned, Money spent, Waves Survived, Game stopped"]
+            d = [self.gen_idx, i.id, i.get_fitness(), lives_lost, i.get_money_earned(), i.get_money_spent(), i.get_wave(),
+                 i.is_stopped()]
             data.append([str(s) for s in d])
 
-        self.log.save_generation_summary(self.gen_idx, average_fitness / len(self.population), max_fitness)
+        self.log.save_generation_summary(self.gen_idx, average_fitness / len(self.population), max_fitness,
+                                         self.population.diversity())
         self.log.save_generation_data(data)
+        if stopped:
+            self.log.write_to_run_log(str(stopped) + " games of generation " + str(self.gen_idx) +
+                                      " were stopped below their min_lives")
+
+    def log_timing(self):
+        """
+        Logs the time of every phase since the last generation was logged (breeding and evaluating this one), and
+        adds it to the time of the segment (see TIMER).
+        """
+        seconds, counts = TIMER.lap()
+        for name in seconds:
+            self.timing[name] = self.timing.get(name, 0.0) + seconds[name]
+        if TIMING:
+            self.log.save_generation_timing(self.segment, self.gen_idx, seconds, counts)
 
 
     def run(self):
         """
         :return: A list of the fittest individual from every generation along the history
         """
-        self.calculate_pop_fitness()
-        
+        if not self.is_pop_evaluated:  # Resumed algorithms continue from their last evaluated generation
+            self.calculate_pop_fitness()
+
         while self.gen_idx < NUM_GENERATIONS - 1:
 
             # Create new generation:
@@ -244,7 +487,11 @@ class GeneticAlgorithm:
             else:
                 return []
 
-            new_gen = self.mutation(potential_gen)
+            new_gen = self.screen(self.deduplicate(self.mutation(potential_gen), fittest))
+
+            # fittest is final. Speculating once the last generation is bred keeps its draws from the random streams:
+            if self.speculator is not None and self.gen_idx == NUM_GENERATIONS - 2:
+                self.speculator.speculate(self, fittest)
 
             self.gen_idx += 1
 
@@ -252,5 +499,7 @@ class GeneticAlgorithm:
             self.population.replace_generation(new_gen)
             self.calculate_pop_fitness()
 
+        if TIMING:
+            self.log.save_segment_timing(self.segment, self.timing)
         return self.fittest_inds[-1]
 
@@ -0,0 +1,120 @@
+import os
+import glob
+import json
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from GeneticAgent.config import *
+
+
+def game_files_hash(run_file):
+    """
+    :return: A hash of the contents of the game that plays the genomes: every module in the directory of its run
+             file and the data/*.cfg files (entities, waves, path, ...) it loads, so the same game hashes the same
+             wherever it is checked out, and any change to it does not hit the achievements of the old one.
+    """
+    game_directory = os.path.dirname(run_file)
+    paths = sorted(glob.glob(os.path.join(game_directory, "*.py"))) + \
+        sorted(glob.glob(os.path.join(game_directory, "data", "*.cfg")))
+
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(os.path.relpath(path, game_directory).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# Everything besides the genome, the lives and the starting wave that changes the outcome of a game:
+GAME_CONFIG_HASH = hashlib.sha1(repr((game_files_hash(SIM_FILE if IS_HEADLESS else RUN_FILE), WAVES_PER_SEGMENT,
+                                      START_OF_GAME_MONEY, SPEED_MULTIPLIER, RANGE_MULTIPLIER, LEVEL,
+                                      BOTTOM_LEFT_CORNER, TOP_RIGHT_CORNER)).encode()).hexdigest()
+
+
+class AchievementCache:
+
+    """
+    The achievements of the genomes that were already played, so every genome is played only once.
+    Entries are keyed by the encoded genome, the lives and the wave the game starts with, and the game config.
+    The most recently used entries are kept in memory; given a path, every entry is also stored in an sqlite
+    file, which is shared by all the runs that use it.
+    A cache may be used by several threads at once (see Speculator).
+    """
+
+    def __init__(self, max_size=CACHE_SIZE, path=CACHE_PATH):
+        """
+        :param max_size: The amount of entries kept in memory.
+        :param path: Path of the sqlite file, or None to keep the cache in memory only.
+        """
+        self.max_size = max_size
+        self.__entries = OrderedDict()
+        self.__db = None
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if path is not None:
+            self.__db = sqlite3.connect(path, check_same_thread=False)
+            self.__db.execute("CREATE TABLE IF NOT EXISTS achievements (key TEXT PRIMARY KEY, achievement TEXT)")
+
+    @staticmethod
+    def key(genome_string, lives, init_wave):
+        """
+        :return: The key of the game of an encoded genome.
+        """
+        game = "|".join([genome_string, str(lives), str(init_wave), GAME_CONFIG_HASH])
+        return hashlib.sha1(game.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        :return: The achievement stored under key, or None if the game was not played yet.
+        """
+        with self.__lock:
+            return self.__get(key)
+
+    def __get(self, key):
+        if key in self.__entries:
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return self.__entries[key]
+
+        if self.__db is not None:
+            row = self.__db.execute("SELECT achievement FROM achievements WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.__remember(key, json.loads(row[0]))
+                self.hits += 1
+                return self.__entries[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, achievements):
+        """
+        Stores the achievements of the games that were played.
+        :param achievements: dict of key -> achievement.
+        """
+        with self.__lock:
+            for key, achievement in achievements.items():
+                self.__remember(key, achievement)
+
+            if self.__db is not None:
+                with self.__db:  # a single transaction
+                    self.__db.executemany("INSERT OR REPLACE INTO achievements VALUES (?, ?)",
+                                          [(key, json.dumps(achievement)) for key, achievement in achievements.items()])
+
+    def __remember(self, key, achievement):
+        self.__entries[key] = achievement
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+
+    def close(self):
+        with self.__lock:
+            if self.__db is not None:
+                self.__db.close()
+                self.__db = None
+
+    def __len__(self):
+        return len(self.__entries)
@@ -0,0 +1,166 @@
+import numpy as np
+
+from GeneticAgent.genetic_resources import Genome
+from GeneticAgent.config import *
+
+NO_ANCESTOR = -1
+
+
+class Ancestor:
+
+    """
+    A row of the AncestryStore, read through the getters of the Individual it was stored from.
+    """
+
+    __slots__ = ("store", "row")
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    @property
+    def id(self):
+        return int(self.store.ids[self.row])
+
+    def get_id(self):
+        return self.id
+
+    def get_genome(self):
+        return Genome(self.store.codes[self.row])
+
+    def encode_genome_to_string(self):
+        return self.get_genome().to_string()
+
+    def get_money(self):
+        return float(self.store.money[self.row])
+
+    def get_lives(self):
+        return int(self.store.lives[self.row])
+
+    def get_generation(self):
+        return int(self.store.generations[self.row])
+
+    def get_ancestor(self):
+        return self.store.get(self.store.parents[self.row])
+
+
+class AncestryStore:
+
+    """
+    An append-only table of the individuals that became ancestors: their id, their ancestor's row, their packed genome,
+    money, lives and generation. Individuals refer to their ancestor by its row, so the ancestors of past segments are
+    kept as a few hundred bytes each instead of as chains of Individual objects.
+    """
+
+    def __init__(self, capacity=FITTEST_AMOUNT):
+        self.size = 0
+        self.ids = np.zeros(capacity, dtype=int)
+        self.parents = np.zeros(capacity, dtype=int)
+        self.codes = np.zeros((capacity, GENOME_SIZE), dtype=np.uint8)
+        self.money = np.zeros(capacity)
+        self.lives = np.zeros(capacity, dtype=int)
+        self.generations = np.zeros(capacity, dtype=int)
+
+    def add(self, individual):
+        """
+        Stores an individual that became an ancestor (its achievements will not change anymore), once.
+        :return: Its row.
+        """
+        if individual.ancestry_row is None:
+            individual.ancestry_row = self.append(individual.get_id(), individual.ancestor_row,
+                                                  individual.get_genome().codes, individual.get_money(),
+                                                  individual.get_lives(), individual.get_generation())
+        return individual.ancestry_row
+
+    def append(self, ind_id, parent, codes, money, lives, generation):
+        """
+        :return: The row of the new entry.
+        """
+        if self.size == len(self.ids):
+            self.__grow()
+        row = self.size
+        self.ids[row], self.parents[row], self.codes[row] = ind_id, parent, codes
+        self.money[row], self.lives[row], self.generations[row] = money, lives, generation
+        self.size += 1
+        return row
+
+    def get(self, row):
+        """
+        :return: The Ancestor of row, or None for NO_ANCESTOR.
+        """
+        return None if row == NO_ANCESTOR else Ancestor(self, row)
+
+    def lineage(self, row):
+        """
+        :return: The rows of an ancestor and of its ancestors, down to (and without) the first generation of the run.
+        """
+        rows = list()
+        while row != NO_ANCESTOR and self.generations[row] > -1:
+            rows.append(row)
+            row = self.parents[row]
+        return rows
+
+    def rows_since(self, start):
+        """
+        :return: The entries from row start on, as the arrays merge takes.
+        """
+        return self.entries(slice(start, self.size))
+
+    def entries(self, rows):
+        """
+        :return: The entries of rows (a slice or a list of rows), as the arrays adopt takes.
+        """
+        return (self.ids[rows], self.parents[rows], self.codes[rows], self.money[rows], self.lives[rows],
+                self.generations[rows])
+
+    def lineage_since(self, rows, start):
+        """
+        :return: The rows of the given ancestors and of their ancestors that were appended from row start on, in
+                 order, and their entries, as adopt takes them.
+        """
+        lineage = set()
+        for row in rows:
+            while row >= start and row not in lineage:
+                lineage.add(row)
+                row = int(self.parents[row])
+        lineage = sorted(lineage)
+        return lineage, self.entries(np.array(lineage, dtype=int))
+
+    def adopt(self, rows, entries, start):
+        """
+        Appends entries of another store (a copy of this one up to row start): its rows, in order, every one's
+        parent being before start or one of the rows before it.
+        :return: A function from the rows of the other store (before start, or adopted) to the rows of this one.
+        """
+        adopted = dict()
+
+        def row_of(row):
+            return adopted[row] if row >= start else row
+
+        for row, (ind_id, parent, codes, money, lives, generation) in zip(rows, zip(*entries)):
+            adopted[row] = self.append(ind_id, row_of(parent), codes, money, lives, generation)
+        return row_of
+
+    def merge(self, entries, start):
+        """
+        Appends the entries that another store (a copy of this one up to row start) has appended.
+        :return: A function from the rows of the other store to the rows of this one.
+        """
+        return self.adopt(range(start, start + len(entries[0])), entries, start)
+
+    def save(self, path):
+        """
+        Writes the table to an npz file.
+        """
+        np.savez_compressed(path, **dict(zip(["ids", "parents", "codes", "money", "lives", "generations"],
+                                             self.rows_since(0))))
+
+    def __grow(self):
+        for name in ["ids", "parents", "codes", "money", "lives", "generations"]:
+            column = getattr(self, name)
+            grown = np.zeros((2 * len(column),) + column.shape[1:], dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,214 @@
+"""
+Measures the throughput of the genetic machinery itself: learns a segment with GeneticAlgorithm for every POP_SIZE and
+GENOME_SIZE setting, with a pluggable evaluator, and saves the generations and evaluations per second, the time of
+every phase and the peak RSS of every setting as json, so the numbers of two versions can be compared.
+
+Every setting runs in a process of its own, which sets the config before the GeneticAgent modules import it.
+Run it from AI_GENETIC_AGENT, like runme.py:
+    python3 GeneticAgent/benchmark.py --evaluator synthetic --pop-sizes 12,100,1000 --output benchmark.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+import multiprocessing
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+EVALUATORS = ["synthetic", "replay", "game"]
+GAME_GENOME_SIZE = 209  # The cells of the game's grid
+
+
+class SyntheticEvaluator:
+
+    """
+    Plays no game: the achievement of every genome follows from the amount of its towers, in constant time.
+    """
+
+    def __init__(self):
+        self.evaluations = 0
+
+    def evaluate(self, genomes, init_wave, num_waves, gen_num, packed=None):
+        from GeneticAgent.genetic_resources import Genome
+        from GeneticAgent.config import MAX_EARNINGS_PER_SEGMENT
+
+        achievements = dict()
+        for ind_id, (genome_string, lives, *_) in genomes.items():
+            codes = packed[ind_id] if packed is not None else Genome.from_string(genome_string).codes
+            towers = int(np.count_nonzero(codes))
+            lives_left = max(0, int(lives) - max(0, 5 - towers // 3))
+            achievements[str(ind_id)] = [init_wave + num_waves - 1, lives_left, 0,
+                                         min(MAX_EARNINGS_PER_SEGMENT, 40 * towers)]
+        self.evaluations += len(genomes)
+        return achievements
+
+    def close(self):
+        pass
+
+
+class ReplayEvaluator:
+
+    """
+    Plays no game: replays the achievements of a recorded output json (as written to OUTPUT_PATH), in turn.
+    """
+
+    def __init__(self, trace_path):
+        with open(trace_path) as f:
+            self.trace = list(json.load(f).values())
+        self.evaluations = 0
+
+    def evaluate(self, genomes, init_wave, num_waves, gen_num, packed=None):
+        achievements = {str(ind_id): self.trace[(self.evaluations + idx) % len(self.trace)]
+                        for idx, ind_id in enumerate(genomes)}
+        self.evaluations += len(genomes)
+        return achievements
+
+    def close(self):
+        pass
+
+
+class CountingEvaluator:
+
+    """
+    An evaluator that counts the games it evaluates.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.evaluations = 0
+
+    def evaluate(self, genomes, *args):
+        self.evaluations += len(genomes)
+        return self.evaluator.evaluate(genomes, *args)
+
+    def close(self):
+        self.evaluator.close()
+
+
+def run_setting(evaluator_name, pop_size, genome_size, num_generations, num_segments, trace_path, seed):
+    """
+    Learns num_segments segments of num_generations generations of pop_size individuals.
+    :return: dict of the throughput, the time of every phase and the peak RSS of the run.
+    """
+    from GeneticAgent import config
+    config.POP_SIZE = pop_size
+    config.FITTEST_AMOUNT = min(config.FITTEST_AMOUNT, pop_size)
+    config.NUM_GENERATIONS = num_generations
+    config.GENOME_SIZE = genome_size
+    config.MAX_GENE_INDEX = genome_size - 1
+    config.EMPTY_GENOME = config.Genome.empty(genome_size)
+    config.SURROGATE_MIN_SAMPLES = 2 * pop_size
+    config.TIMING = False
+
+    from GeneticAgent.GeneticAlgorithm import GeneticAlgorithm
+    from GeneticAgent.evaluator import Evaluator
+    from GeneticAgent.profiling import TIMER, PHASES
+    from GeneticAgent.random_streams import RandomStreams
+    from Logger import logger
+
+    streams = RandomStreams.from_seed(seed)
+    if evaluator_name == "synthetic":
+        evaluator = SyntheticEvaluator()
+    elif evaluator_name == "replay":
+        evaluator = ReplayEvaluator(trace_path)
+    else:
+        evaluator = CountingEvaluator(Evaluator())
+
+    with tempfile.TemporaryDirectory() as log_directory:
+        log = logger.Logger(log_directory)
+        init_wave = config.INIT_WAVE
+        fittest = None
+        phases = dict.fromkeys(PHASES, 0.0)
+        TIMER.lap()
+        start = time.perf_counter()
+        for seg_idx in range(num_segments):
+            log.create_segment_csv()
+            ga = GeneticAlgorithm(init_wave, seg_idx, log, fittest, evaluator, streams=streams)
+            fittest = ga.run()
+            for phase in PHASES:
+                phases[phase] += ga.timing.get(phase, 0.0)
+            init_wave += config.WAVES_PER_SEGMENT
+            if len(fittest) < 2:
+                break
+        seconds = time.perf_counter() - start
+        log.end_run()
+    evaluator.close()
+
+    generations = (seg_idx + 1) * num_generations
+    return {"evaluator": evaluator_name, "pop_size": pop_size, "genome_size": genome_size,
+            "generations": generations, "evaluations": evaluator.evaluations, "seconds": seconds,
+            "generations_per_sec": generations / seconds, "evaluations_per_sec": evaluator.evaluations / seconds,
+            "phases": phases, "other_seconds": seconds - sum(phases.values()),
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, universal_newlines=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """
+    Prints the evaluations per second of results against the ones of the same settings in a saved benchmark.
+    """
+    with open(baseline_path) as f:
+        baseline = {(result["evaluator"], result["pop_size"], result["genome_size"]): result
+                    for result in json.load(f)["results"]}
+
+    for result in results:
+        old = baseline.get((result["evaluator"], result["pop_size"], result["genome_size"]))
+        if old is not None:
+            print("pop {pop_size:>6} genome {genome_size:>5}: {ratio:.2f}x the evaluations/sec of the baseline".format(
+                ratio=result["evaluations_per_sec"] / old["evaluations_per_sec"], **result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the throughput of the genetic agent.")
+    parser.add_argument("--evaluator", choices=EVALUATORS, default="synthetic")
+    parser.add_argument("--pop-sizes", default="12,100,1000", help="comma separated POP_SIZE settings")
+    parser.add_argument("--genome-sizes", default=str(GAME_GENOME_SIZE), help="comma separated GENOME_SIZE settings")
+    parser.add_argument("--generations", type=int, default=5, help="generations per segment")
+    parser.add_argument("--segments", type=int, default=1)
+    parser.add_argument("--trace", default=os.path.abspath("output.json"),
+                        help="achievements to replay (the output json of a real run)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.abspath("benchmark.json"))
+    parser.add_argument("--baseline", help="a benchmark json to compare the results with")
+    args = parser.parse_args()
+
+    pop_sizes = [int(size) for size in args.pop_sizes.split(",")]
+    genome_sizes = [int(size) for size in args.genome_sizes.split(",")]
+    if args.evaluator == "game" and genome_sizes != [GAME_GENOME_SIZE]:
+        parser.error("the game plays genomes of " + str(GAME_GENOME_SIZE) + " genes only")
+
+    results = list()
+    context = multiprocessing.get_context("spawn")  # So every setting imports the config anew
+    for genome_size in genome_sizes:
+        for pop_size in pop_sizes:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_setting, (args.evaluator, pop_size, genome_size, args.generations,
+                                                  args.segments, args.trace, args.seed))
+            results.append(result)
+            print("pop {pop_size:>6} genome {genome_size:>5}: {generations_per_sec:10.2f} generations/sec "
+                  "{evaluations_per_sec:12.1f} evaluations/sec {peak_rss_kb:>9} KB peak RSS".format(**result))
+            print("    " + " ".join("{}: {:.3f}s".format(phase, seconds)
+                                    for phase, seconds in result["phases"].items()))
+
+    with open(args.output, 'w') as f:
+        json.dump({"revision": git_revision(), "python": sys.version.split()[0], "results": results}, f, indent=2)
+    print("Saved to " + args.output)
+
+    if args.baseline is not None:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import os
+import gzip
+import pickle
+import random
+
+import numpy as np
+
+from GeneticAgent.individual import Individual
+from GeneticAgent.config import *
+
+
+class Checkpointer:
+
+    """
+    Saves the state of a learning run after every generation, so that a run that died can be resumed from the last
+    generation it learned (runme.py resume).
+    A checkpoint is a gzipped pickle of the run's state, the GeneticAlgorithm of the current segment (with its
+    population, fittest individuals, ancestors and RandomStreams), the state of the global random generators, the
+    Individual counters and the ancestry store.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        """
+        :param path: The checkpoint file. Every checkpoint replaces the previous one.
+        """
+        self.path = path
+        self.run_state = dict()  # The state of runme's segment loop
+
+    def save(self, ga=None):
+        """
+        :param ga: The GeneticAlgorithm of the current segment, or None between segments.
+        """
+        state = dict(self.run_state)
+        state["ga"] = ga
+        state["random_state"] = random.getstate()
+        state["numpy_random_state"] = np.random.get_state()
+        state["individual_counters"] = (Individual.current_id, Individual.current_gen)
+        state["ancestry"] = Individual.ancestry
+
+        # Write aside and replace, so a crash while saving keeps the last checkpoint:
+        temp_path = self.path + ".tmp"
+        with gzip.open(temp_path, 'wb') as f:
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.path)
+
+    def load(self):
+        """
+        Loads the last checkpoint, and restores the random generators, the Individual counters and the ancestry.
+        :return: The run's state, with the saved GeneticAlgorithm under "ga".
+        """
+        with gzip.open(self.path, 'rb') as f:
+            state = pickle.load(f)
+
+        random.setstate(state.pop("random_state"))
+        np.random.set_state(state.pop("numpy_random_state"))
+        Individual.current_id, Individual.current_gen = state.pop("individual_counters")
+        Individual.ancestry = state.pop("ancestry")
+
+        self.run_state = {key: value for key, value in state.items() if key != "ga"}
+        return state
@@ -1,11 +1,36 @@
-from GeneticAgent.genetic_resources import Tower
+from GeneticAgent.genetic_resources import Tower, Genome
 import os
 
 # running vars:
 RUN_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(os.getcwd()))), "Pyfense_Genetic_Agent", "AI_PYFENSE", "Pyfense", "pyfense.py")
+SIM_FILE = os.path.join(os.path.dirname(RUN_FILE), "simulation.py")
+IS_HEADLESS = True  # evaluate genomes with SIM_FILE instead of the graphic game
+NUM_WORKERS = os.cpu_count() or 1  # processes a generation is evaluated on (headless only)
+CACHE_SIZE = 100000  # achievements of played genomes kept in memory
+# sqlite file to share the achievements across runs, e.g. os.path.abspath("achievements.db"). Its entries are keyed by
+# the contents of the game (see achievement_cache.GAME_CONFIG_HASH), so a changed game never reads stale ones:
+CACHE_PATH = None
+CHECKPOINT_PATH = os.path.abspath("checkpoint.pkl.gz")  # the state of the run, saved after every generation
+# log the time of every phase of every generation to timing.csv in the run's log directory, and of every segment to
+# run.log (see profiling.PHASES):
+TIMING = True
+# profile the whole run with cProfile, to profile.pstats in the run's log directory (python3 -m pstats to read it):
+PROFILE = False
+# seed of the random streams the genetic algorithm draws from (see RandomStreams), so a run is reproduced from it alone
+# (islands draw from independent streams spawned from it). None draws from the global random generators:
+RANDOM_SEED = None
+# stop the games that can no longer beat this fraction of the last generation's FITTEST_AMOUNT-th fitness (headless
+# only), e.g. 1. None plays every game to its end:
+PRUNE_FRACTION = None
 MODE = "learn"
 # MODE = "solution"
 INPUT_PATH = os.path.abspath("input.json")
+# hand the genomes to SIM_FILE as a binary genome batch instead of json (headless, generational only):
+GENOME_BATCH = True
+GENOME_BATCH_PATH = os.path.abspath("input.bin")
+# share the genome batches and achievements with the Evaluator's process in shared memory instead of a file and json
+# (generational only):
+SHARED_MEMORY = True
 OUTPUT_PATH = os.path.abspath("output.json")
 SOL_IN_PATH = os.path.abspath("solutions.json")
 SOL_OUT_PATH = os.path.abspath("solutions_output.json")
@@ -19,8 +44,45 @@ MUTATION_RATE = 0.1 # 0.015 # 0.005
 
 # genetic constant parameters:
 FITTEST_AMOUNT = 10
+# select the fittest individuals by fitness_function ("fitness"), or by NSGA-II ("nsga2"): by the Pareto fronts of
+# the lives, money kept, money earned and waves survived of the individuals, and the least crowded of the last front
+# that is selected in part:
+SELECTION = "fitness"
 NUM_GENERATIONS = 3
 MUTATION_RATE_MULTIPLIER = 5
+# mutate all the babies of a generation at once, with random masks of numpy's Generator (other random draws than the
+# mutation of one gene at a time):
+BATCH_MUTATION = False
+# repair the babies no ancestor can afford, by reverting their costliest genes to the towers of the ancestor that comes
+# closest, instead of breeding others in their place (so a generation is bred in a single round):
+REPAIR_BABIES = False
+
+# babies whose genome and lives are already in their generation ("generation"), or were already played in the segment
+# ("segment"), are mutated again ("mutate") or replaced by new babies ("reject"), DEDUPLICATE_TRIES times at most.
+# None keeps them (identical individuals are still played once, by the AchievementCache):
+DEDUPLICATE = None
+DUPLICATES = "mutate"
+DEDUPLICATE_TRIES = 3
+
+# breed a baby whenever a game ends, instead of a generation once all its games ended (headless, single island only).
+# DEDUPLICATE, PRUNE_FRACTION and the surrogate apply to its babies as well:
+STEADY_STATE = False
+
+# spare processes that play the first generation of the next segment while the last generation of a segment is played
+# (headless, generational, single island only). 0 plays the segments strictly in sequence:
+SPECULATIVE_WORKERS = 0
+
+# island model (NUM_ISLANDS > 1 evolves a population of POP_SIZE per island, each in its own process):
+NUM_ISLANDS = 1
+MIGRATION_INTERVAL = 2  # generations between migrations
+MIGRANTS_AMOUNT = 2  # fittest individuals an island sends on every migration
+MIGRATION_TOPOLOGY = "ring"  # "ring" or "complete"
+
+# surrogate pre-screening (a regression learned from the played individuals ranks the babies of every generation, and
+# only SURROGATE_PLAY_FRACTION of them are played. None plays them all):
+SURROGATE_PLAY_FRACTION = None  # e.g. 0.3
+SURROGATE_RIDGE = 1.0  # regularization of the regression
+SURROGATE_MIN_SAMPLES = 2 * POP_SIZE  # played individuals to learn from before screening
 
 # game constant:
 NUM_SEGMENTS = 2  # The number of game levels on which we want to learn
@@ -38,7 +100,7 @@ MIN_X = min(abs(BOTTOM_LEFT_CORNER[0]), 31)
 MIN_Y = min(abs(BOTTOM_LEFT_CORNER[1]), 17)
 
 # game tweeks:
-EMPTY_GENOME = [Tower() for i in range(209)]
+EMPTY_GENOME = Genome.empty(GENOME_SIZE)  # copy before changing it
 SPEED_MULTIPLIER = 100
 DURATION_MULTIPLIER = 1 / SPEED_MULTIPLIER
 RANGE_MULTIPLIER = 0.8  # reduce ranged tower range
@@ -0,0 +1,145 @@
+import os
+import json
+import tempfile
+import subprocess
+
+from GeneticAgent.population import pack_batch
+from GeneticAgent.genetic_resources import GenomeBuffer, write_genome_batch
+from GeneticAgent.profiling import phase
+from GeneticAgent.config import *
+
+
+class Evaluator:
+
+    """
+    A long-lived headless PyFense process (SIM_FILE in "serve" mode) that plays the generations of a whole run,
+    so the game data is loaded and the workers are started only once.
+    """
+
+    def __init__(self, workers=NUM_WORKERS):
+        """
+        Starts the evaluating process.
+        :param workers: The number of processes the games of a generation are spread over.
+        """
+        with phase("spawn"):
+            self.__process = subprocess.Popen(["python3", SIM_FILE, "serve", str(workers)],
+                                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True)
+        self.__batch_path = None  # The genome batch file of this evaluator, made on the first packed generation
+        self.__buffer = None  # Or its GenomeBuffer (see SHARED_MEMORY), replaced by a larger one when needed
+
+    def evaluate(self, genomes, init_wave, num_waves, gen_num, packed=None):
+        """
+        :param genomes: dict of individual id -> [encoded genome, lives], as written to INPUT_PATH.
+        :param packed: dict of individual id -> packed genes, to send the genomes as a genome batch instead (in the
+                       GenomeBuffer of this evaluator, given SHARED_MEMORY).
+        :return: dict of individual id (as a string) -> achievements, as read from OUTPUT_PATH.
+        """
+        with phase("serialize"):
+            request = {"init_wave": init_wave, "waves": num_waves, "generation": gen_num}
+            if packed is not None and SHARED_MEMORY:
+                if self.__buffer is None or self.__buffer.capacity < len(genomes):
+                    if self.__buffer is not None:
+                        self.__buffer.close()
+                    self.__buffer = GenomeBuffer.create(max(len(genomes), POP_SIZE), GENOME_SIZE)
+                self.__buffer.put(*pack_batch(genomes, packed))
+                request["genome_buffer"] = self.__buffer.name
+            elif packed is not None:
+                if self.__batch_path is None:
+                    handle, self.__batch_path = tempfile.mkstemp(".bin")
+                    os.close(handle)
+                write_genome_batch(self.__batch_path, *pack_batch(genomes, packed))
+                request["genome_batch"] = self.__batch_path
+            else:
+                request["genomes"] = genomes
+            line = json.dumps(request) + "\n"
+
+        with phase("simulate"):
+            self.__process.stdin.write(line)
+            self.__process.stdin.flush()
+            response = self.__process.stdout.readline()
+        if not response:
+            raise RuntimeError("The evaluator process has exited with code " + str(self.__process.wait()))
+
+        with phase("parse"):
+            if "genome_buffer" in request:  # The achievements were written to the buffer
+                return dict(zip(map(str, self.__buffer.ids[:self.__buffer.count].tolist()),
+                                self.__buffer.achievements[:self.__buffer.count].tolist()))
+            return json.loads(response)
+
+    def close(self):
+        """
+        Stops the evaluating process.
+        """
+        if self.__process.poll() is None:
+            self.__process.stdin.close()
+            self.__process.wait()
+        if self.__batch_path is not None:
+            os.remove(self.__batch_path)
+            self.__batch_path = None
+        if self.__buffer is not None:
+            self.__buffer.close()
+            self.__buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class GameEvaluator:
+
+    """
+    A long-lived headless PyFense process (SIM_FILE in "serve-games" mode) that plays single games on its workers, and
+    answers every game as soon as it ends, so the steady-state GeneticAlgorithm can keep all the workers busy.
+    """
+
+    def __init__(self, workers=NUM_WORKERS):
+        """
+        Starts the evaluating process.
+        :param workers: The number of games played at once.
+        """
+        self.workers = workers
+        with phase("spawn"):
+            self.__process = subprocess.Popen(["python3", SIM_FILE, "serve-games", str(workers)],
+                                              stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                              universal_newlines=True)
+
+    def submit(self, key, genome_string, lives, init_wave, num_waves, min_lives=None):
+        """
+        Starts the game of an encoded genome.
+        :param key: The key its achievement is returned with.
+        :param min_lives: The lives below which the game is stopped (see PRUNE_FRACTION), or None to play it to its end.
+        """
+        request = {"key": key, "genome": genome_string, "lives": lives, "init_wave": init_wave, "waves": num_waves}
+        if min_lives is not None:
+            request["min_lives"] = min_lives
+        self.__process.stdin.write(json.dumps(request) + "\n")
+        self.__process.stdin.flush()
+
+    def next_result(self):
+        """
+        Waits for the next game to end.
+        :return: The key and the achievement of that game.
+        """
+        response = self.__process.stdout.readline()
+        if not response:
+            raise RuntimeError("The evaluator process has exited with code " + str(self.__process.wait()))
+        answer = json.loads(response)
+        if "error" in answer:
+            raise RuntimeError("The game of " + str(answer["key"]) + " has failed: " + answer["error"])
+        return answer["key"], answer["result"]
+
+    def close(self):
+        """
+        Stops the evaluating process, once the games it plays end.
+        """
+        if self.__process.poll() is None:
+            self.__process.stdin.close()
+            self.__process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,6 +1,9 @@
 import copy
 import random
 from enum import Enum
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
 
 
 class OrderedEnum(Enum):
@@ -267,6 +270,166 @@ class Tower:
         return self
 
 
+# ################ Packed genomes #####################
+
+# A gene is packed into a byte as (type + 1) * 4 + level, so an empty cell is 0:
+NUM_GENE_CODES = len(TowerType) << 2
+TYPE_OF_CODE = [TowerType((code >> 2) - 1) for code in range(NUM_GENE_CODES)]
+LEVEL_OF_CODE = [TowerLevel(code & 3) for code in range(NUM_GENE_CODES)]
+
+
+def pack_tower(tower_type, tower_level):
+    """
+    :return: The byte a gene of the given TowerType and TowerLevel is packed into.
+    """
+    return (tower_type.value + 1) << 2 | tower_level.value
+
+
+class GeneView(Tower):
+    """
+    A Tower that lives in a gene of a Genome: reading and updating it reads and updates the packed gene.
+    Its price follows from its type and level.
+    """
+
+    def __init__(self, codes, index):
+        self.__codes = codes
+        self.__index = index
+
+    @property
+    def type(self):
+        return TYPE_OF_CODE[self.__codes[self.__index]]
+
+    @type.setter
+    def type(self, tower_type):
+        self.__codes[self.__index] = pack_tower(tower_type, self.level)
+
+    @property
+    def level(self):
+        return LEVEL_OF_CODE[self.__codes[self.__index]]
+
+    @level.setter
+    def level(self, tower_level):
+        self.__codes[self.__index] = pack_tower(self.type, tower_level)
+
+    @property
+    def price(self):
+        return TOWER_PRICES[self.__codes[self.__index]]
+
+    @price.setter
+    def price(self, price):
+        pass
+
+
+class Genome:
+    """
+    A genome packed into a uint8 array, a byte per gene (see pack_tower).
+    Indexing it gives GeneView objects, so it can be used wherever an array of Tower objects is expected, while
+    copying, crossing, comparing, hashing and encoding it are done on the whole array at once.
+    """
+
+    def __init__(self, codes):
+        """
+        :param codes: array-like of packed genes.
+        """
+        self.codes = np.array(codes, dtype=np.uint8)
+
+    @classmethod
+    def empty(cls, size):
+        """
+        :return: A genome of size cells without towers.
+        """
+        return cls(np.zeros(size, dtype=np.uint8))
+
+    @classmethod
+    def from_towers(cls, towers):
+        """
+        :param towers: Iterable of Tower objects.
+        """
+        return cls([pack_tower(*tower.get_tower()) for tower in towers])
+
+    @classmethod
+    def from_string(cls, string_genome):
+        """
+        :param string_genome: A genome encoded by to_string.
+        """
+        return cls([CODE_OF_STRING[item] for item in string_genome.split()])
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(np.frombuffer(data, dtype=np.uint8))
+
+    def copy(self):
+        return Genome(self.codes)
+
+    def cross(self, other, break_point):
+        """
+        :return: The 2 genomes made of this genome and other, swapped at break_point.
+        """
+        return (Genome(np.concatenate((self.codes[:break_point], other.codes[break_point:]))),
+                Genome(np.concatenate((other.codes[:break_point], self.codes[break_point:]))))
+
+    def to_string(self):
+        """
+        :return: The genome encoded as the towers' strings, separated by spaces.
+        """
+        return " ".join(STRING_OF_CODE[self.codes].tolist())
+
+    def tobytes(self):
+        return self.codes.tobytes()
+
+    # ############## Operators ####################
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        return GeneView(self.codes, index)
+
+    def __setitem__(self, indices, towers):
+        """
+        :param indices: An index, or a list of indices.
+        :param towers: A Tower, or a list of Tower objects to pack into the indices.
+        """
+        if isinstance(towers, Tower):
+            self.codes[indices] = pack_tower(*towers.get_tower())
+        else:
+            self.codes[indices] = [pack_tower(*tower.get_tower()) for tower in towers]
+
+    def __iter__(self):
+        return (GeneView(self.codes, index) for index in range(len(self.codes)))
+
+    def __eq__(self, other):
+        if not isinstance(other, Genome):
+            return NotImplemented
+        return np.array_equal(self.codes, other.codes)
+
+    def __ne__(self, other):
+        if not isinstance(other, Genome):
+            return NotImplemented
+        return not np.array_equal(self.codes, other.codes)
+
+    def __hash__(self):
+        return hash(self.codes.tobytes())
+
+    def __repr__(self):
+        return self.to_string()
+
+
+def _tower_of_code(code):
+    tower = Tower()
+    tower.update(TYPE_OF_CODE[code], LEVEL_OF_CODE[code])
+    return tower
+
+
+# The price and the string of every packed gene:
+TOWER_PRICES = [_tower_of_code(code).price for code in range(NUM_GENE_CODES)]
+STRING_OF_CODE = np.array([repr(GeneView(np.array([code], dtype=np.uint8), 0)) for code in range(NUM_GENE_CODES)])
+CODE_OF_STRING = {string: code for code, string in reversed(list(enumerate(STRING_OF_CODE.tolist())))}
+# TRANSITION_COSTS[a, b] is the estimated cost of updating the tower packed into a to the one packed into b:
+TRANSITION_COSTS = np.array([[_tower_of_code(a).estimate_update(TYPE_OF_CODE[b], LEVEL_OF_CODE[b])
+                              for b in range(NUM_GENE_CODES)] for a in range(NUM_GENE_CODES)])
+
+
 def get_random_tower():
     """
     generate a random tower. allows for non valid (of NO_TOWER type or level)
@@ -282,3 +445,178 @@ def get_random_tower():
 
     return new_tower
 
+
+def decode_genome_from_string(string_genome):
+    genome = []
+    tower_encodings_list = string_genome.split()
+    for item in tower_encodings_list:
+        new_tower = Tower()
+
+        type_int = -1 if item[0] == '-' else int(item[0])
+
+        if type_int > 0:
+            new_tower.update(TowerType(type_int), TowerLevel(int(item[1])))
+
+        genome.append(new_tower)
+
+    return np.array(genome)
+
+
+# The code every packed gene is decoded into by decode_genome_from_string (which builds no tower of type 0):
+DECODED_CODES = np.array([pack_tower(*decode_genome_from_string(string)[0].get_tower())
+                          for string in STRING_OF_CODE.tolist()], dtype=np.uint8)
+
+
+def decode_genome_from_codes(codes):
+    """
+    :param codes: The packed genes of a genome.
+    :return: The Genome decode_genome_from_string decodes from the string of the genome.
+    """
+    return Genome(DECODED_CODES[np.asarray(codes, dtype=np.uint8)])
+
+
+# ################ Genome batches #####################
+
+# The genomes of a generation as the GA hands them to the game: a header, then the ids, lives and min_lives of the
+# genomes (int64, int32 and int32 arrays) and their packed genes (a count x genome_size uint8 matrix):
+GENOME_BATCH_MAGIC = b"PFGB"
+GENOME_BATCH_VERSION = 1
+GENOME_BATCH_HEADER = np.dtype([("magic", "S4"), ("version", "<u4"), ("count", "<u4"), ("genome_size", "<u4")])
+
+
+def write_genome_batch(path, ids, codes, lives, min_lives=None):
+    """
+    :param codes: (count, genome_size) array of the packed genes of the genomes.
+    :param min_lives: The lives below which the game of every genome stops, or None to play them all to their end.
+    """
+    codes = np.asarray(codes, dtype=np.uint8)
+    header = np.array([(GENOME_BATCH_MAGIC, GENOME_BATCH_VERSION, len(ids), codes.size // max(len(ids), 1))],
+                      dtype=GENOME_BATCH_HEADER)
+    min_lives = np.zeros(len(ids)) if min_lives is None else min_lives
+
+    with open(path, 'wb') as f:
+        f.write(header.tobytes())
+        f.write(np.asarray(ids, dtype='<i8').tobytes())
+        f.write(np.asarray(lives, dtype='<i4').tobytes())
+        f.write(np.asarray(min_lives, dtype='<i4').tobytes())
+        f.write(codes.tobytes())
+
+
+def is_genome_batch(path):
+    with open(path, 'rb') as f:
+        return f.read(len(GENOME_BATCH_MAGIC)) == GENOME_BATCH_MAGIC
+
+
+def read_genome_batch(path):
+    """
+    Maps a file written by write_genome_batch to memory.
+    :return: The ids, packed genes, lives and min_lives arrays of the genomes.
+    """
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    header = np.frombuffer(data, dtype=GENOME_BATCH_HEADER, count=1)[0]
+    if header["magic"] != GENOME_BATCH_MAGIC or header["version"] != GENOME_BATCH_VERSION:
+        raise ValueError(path + " is not a genome batch")
+
+    count, genome_size = int(header["count"]), int(header["genome_size"])
+    offset = GENOME_BATCH_HEADER.itemsize
+    ids = np.frombuffer(data, dtype='<i8', count=count, offset=offset)
+    offset += ids.nbytes
+    lives = np.frombuffer(data, dtype='<i4', count=count, offset=offset)
+    offset += lives.nbytes
+    min_lives = np.frombuffer(data, dtype='<i4', count=count, offset=offset)
+    offset += min_lives.nbytes
+    codes = np.frombuffer(data, dtype=np.uint8, count=count * genome_size, offset=offset).reshape(count, genome_size)
+    return ids, codes, lives, min_lives
+
+
+# ################ Genome buffers #####################
+
+# A genome batch in shared memory, with a slot for the achievement of every genome (a count x NUM_ACHIEVEMENTS float64
+# matrix), so the GA and the game's workers read and write a generation in place:
+GENOME_BUFFER_HEADER = np.dtype([("magic", "S4"), ("version", "<u4"), ("capacity", "<u4"), ("genome_size", "<u4"),
+                                 ("count", "<u4")], align=True)
+GENOME_BUFFER_HEADER_SIZE = 32  # the arrays after it stay 8-byte aligned
+NUM_ACHIEVEMENTS = 4  # wave, lives, money spent and money earned
+
+
+class GenomeBuffer:
+
+    """
+    The genomes of a generation and the achievements of their games, as numpy arrays in a shared memory block, which
+    the process that creates it owns and other processes attach to by name.
+    """
+
+    def __init__(self, memory, owner):
+        self.memory = memory
+        self.owner = owner
+        header = np.ndarray(1, dtype=GENOME_BUFFER_HEADER, buffer=memory.buf)
+        if header["magic"][0] != GENOME_BATCH_MAGIC or header["version"][0] != GENOME_BATCH_VERSION:
+            raise ValueError(memory.name + " is not a genome buffer")
+        self.header = header
+        self.capacity, self.genome_size = int(header["capacity"][0]), int(header["genome_size"][0])
+
+        offset = GENOME_BUFFER_HEADER_SIZE
+        self.ids = np.ndarray(self.capacity, dtype='<i8', buffer=memory.buf, offset=offset)
+        offset += self.ids.nbytes
+        self.achievements = np.ndarray((self.capacity, NUM_ACHIEVEMENTS), dtype='<f8', buffer=memory.buf,
+                                       offset=offset)
+        offset += self.achievements.nbytes
+        self.lives = np.ndarray(self.capacity, dtype='<i4', buffer=memory.buf, offset=offset)
+        offset += self.lives.nbytes
+        self.min_lives = np.ndarray(self.capacity, dtype='<i4', buffer=memory.buf, offset=offset)
+        offset += self.min_lives.nbytes
+        self.codes = np.ndarray((self.capacity, self.genome_size), dtype=np.uint8, buffer=memory.buf, offset=offset)
+
+    @staticmethod
+    def create(capacity, genome_size):
+        """
+        :return: A new buffer of capacity genomes, owned by this process.
+        """
+        size = GENOME_BUFFER_HEADER_SIZE + capacity * (8 + 8 * NUM_ACHIEVEMENTS + 4 + 4 + genome_size)
+        memory = shared_memory.SharedMemory(create=True, size=size)
+        header = np.ndarray(1, dtype=GENOME_BUFFER_HEADER, buffer=memory.buf)
+        header[0] = (GENOME_BATCH_MAGIC, GENOME_BATCH_VERSION, capacity, genome_size, 0)
+        del header
+        return GenomeBuffer(memory, owner=True)
+
+    @staticmethod
+    def attach(name):
+        """
+        :return: The buffer created (and owned) by another process under name.
+        """
+        memory = shared_memory.SharedMemory(name=name)
+        # The owner removes the block, not the resource tracker of this process when it exits:
+        resource_tracker.unregister(memory._name, "shared_memory")
+        return GenomeBuffer(memory, owner=False)
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    @property
+    def count(self):
+        return int(self.header["count"][0])
+
+    def put(self, ids, codes, lives, min_lives=None):
+        """
+        Stores the genomes of a generation (as write_genome_batch takes them) in the first rows of the buffer.
+        """
+        count = len(ids)
+        if count > self.capacity:
+            raise ValueError("A genome buffer of " + str(self.capacity) + " genomes can not hold " + str(count))
+        self.ids[:count] = ids
+        self.codes[:count] = np.asarray(codes, dtype=np.uint8).reshape(count, self.genome_size)
+        self.lives[:count] = lives
+        self.min_lives[:count] = 0 if min_lives is None else min_lives
+        self.achievements[:count] = 0
+        self.header["count"] = count
+
+    def close(self):
+        """
+        Detaches from the buffer, and removes it if this process owns it.
+        """
+        # The block can not be closed while arrays still view it:
+        self.header = self.ids = self.achievements = self.lives = self.min_lives = self.codes = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
@@ -1,5 +1,6 @@
 import random as rand
 from GeneticAgent.genetic_resources import *
+from GeneticAgent.ancestry import AncestryStore, NO_ANCESTOR
 from GeneticAgent.config import *
 import numpy as np
 
@@ -7,13 +8,16 @@ import numpy as np
 class Individual:
     current_id = 0
     current_gen = -1
+    ancestry = AncestryStore()  # The individuals that became ancestors
 
-    def __init__(self, ancestor_money, seg, genome=None, ancestor=None, gen_num=0):
+    def __init__(self, ancestor_money, seg, genome=None, ancestor=None, gen_num=0, rng=rand):
         """
         Initialize an Individual Object.
-        :param genome: the individual's genome: array of Tower objects of size genome_size.
+        :param genome: the individual's genome: Genome of size genome_size.
         :param ancestor: An Individual object from which we can get this object
-                      (transformation suffice the constraint of the ancestor's money)
+                      (transformation suffice the constraint of the ancestor's money). It is stored in
+                      Individual.ancestry, and referred to by its row.
+        :param rng: The random.Random (or the random module) a random genome is drawn from, if genome is None.
         """
         prev_gen = Individual.current_gen
 
@@ -26,7 +30,8 @@ class Individual:
         self.id = Individual.current_id  % POP_SIZE
         Individual.current_id += 1
 
-        self.ancestor = ancestor
+        self.ancestor_row = NO_ANCESTOR if ancestor is None else Individual.ancestry.add(ancestor)
+        self.ancestry_row = None  # The row of this individual, once it becomes an ancestor
         self.money = ancestor_money
 
         self.gen_num = gen_num
@@ -37,7 +42,7 @@ class Individual:
             Individual.current_id = 0
 
         if genome is None:
-            self.randomize_genome()
+            self.randomize_genome(rng)
         else:
             self.genome = genome
 
@@ -46,6 +51,7 @@ class Individual:
         self.wave = None
         self.money_earned = None
         self.money_spent = None
+        self.stopped = False  # Whether its game was stopped below its min_lives (see PRUNE_FRACTION)
 
     # ##################### Functionality #####################
 
@@ -72,12 +78,12 @@ class Individual:
         cost = tower.update(current_type, TowerLevel(current_level))
         self.pay(cost)
 
-    def buy_random_towers(self):
+    def buy_random_towers(self, rng=rand):
         """
         :return: A list of Random Tower objects that can be bought with self.init_money.
         """
         max_towers = self.money // Tower.CHEAP_TOWER_PRICE
-        num_towers = rand.randint(0, max_towers)
+        num_towers = rng.randint(0, max_towers)
 
         towers_to_place = list()
         for i in range(num_towers):
@@ -85,8 +91,8 @@ class Individual:
                 break
 
             new_tower = Tower()
-            type = rand.choice(TOWER_TYPES)
-            level = rand.choice(TOWER_LEVELS_NO_NO_TOWER)
+            type = rng.choice(TOWER_TYPES)
+            level = rng.choice(TOWER_LEVELS_NO_NO_TOWER)
 
             if type is TowerType.NO_TOWER:  # Don't wast your time
                 continue
@@ -98,16 +104,16 @@ class Individual:
 
         return towers_to_place
 
-    def randomize_genome(self):
+    def randomize_genome(self, rng=rand):
         """
         Assign self.genome with a newly randomized genome (that suffice the constraint of self.init_money)
         """
         # Buy Towers Randomly:
-        towers_to_place = self.buy_random_towers()
+        towers_to_place = self.buy_random_towers(rng)
 
         # Place towers randomly:
-        placements = rand.sample(range(GENOME_SIZE), len(towers_to_place))
-        self.genome = np.array(EMPTY_GENOME)
+        placements = rng.sample(range(GENOME_SIZE), len(towers_to_place))
+        self.genome = EMPTY_GENOME.copy()
         self.genome[placements] = towers_to_place
 
     def traceback(self):
@@ -116,11 +122,10 @@ class Individual:
                 randomized object.
         """
         evolution = list()
-        curr = self
-        while curr.get_generation() > -1:
-            curr_genome_str = curr.encode_genome_to_string()
-            evolution.append(curr_genome_str)
-            curr = curr.get_ancestor()
+        if self.get_generation() > -1:
+            evolution.append(self.encode_genome_to_string())
+            for row in Individual.ancestry.lineage(self.ancestor_row):
+                evolution.append(Individual.ancestry.get(row).encode_genome_to_string())
 
         return evolution[::-1]
 
@@ -139,11 +144,7 @@ class Individual:
         self.money -= cost
 
     def encode_genome_to_string(self):
-        string_genome = str()
-        for i in range(GENOME_SIZE):
-            string_genome += self.genome[i].__str__() + ' '
-
-        return string_genome[:-1]  # remove last ' '
+        return self.genome.to_string()
 
     # ################ operators #################
 
@@ -190,7 +191,7 @@ class Individual:
         ind_line = "Individual (" + name + "), fit: " + str(self.fitness) + "\n"
         parents = "No parents" if self.genetic_parents_ids_string is None else self.genetic_parents_ids_string
         parents_line = "Genetic parents' ids: " + parents + "\n"
-        ancestor = "No ancestor" if self.ancestor is None else str(self.ancestor.id)
+        ancestor = "No ancestor" if self.ancestor_row == NO_ANCESTOR else str(self.get_ancestor().id)
         ancestor_line = "Chosen ancestor id: " + ancestor + "\n"
         genome = "Genome is: " + self.encode_genome_to_string()
         return ind_line + parents_line + ancestor_line + genome
@@ -203,12 +204,16 @@ class Individual:
     def set_money(self, money):
         self.money = money
 
-    def update(self, achievement):
+    def update(self, achievement, stopped=False):
+        """
+        :param stopped: Whether the game was stopped below its min_lives, so the achievement is where it stopped.
+        """
         self.wave = int(achievement[0])
         self.lives = int(achievement[1])
         self.money_spent = int(achievement[2])
         self.money_earned = int(achievement[3])
         self.money += self.money_earned
+        self.stopped = stopped
 
     def set_generation(self, gen):
         self.gen_num = gen
@@ -242,11 +247,59 @@ class Individual:
     def get_money_earned(self):
         return self.money_earned
 
+    def is_stopped(self):
+        return self.stopped
+
     def get_ancestor(self):
-        return self.ancestor
+        """
+        :return: The Ancestor (the stored row) of this individual, or None.
+        """
+        return Individual.ancestry.get(self.ancestor_row)
 
     def get_genetic_parents_ids(self):
         return self.genetic_parents_ids_string
 
     def get_generation(self):
-        return self.gen_num
\ No newline at end of file
+        return self.gen_num
+
+
+# ################ Batch mutation tables #####################
+
+def _mutation_steps(code, tower_type, level):
+    """
+    :return: The costs change_tower_under_constrains checks against the money, level by level, to change the tower
+             packed into code to the given type and level.
+    """
+    return [GeneView(np.array([code], dtype=np.uint8), 0).estimate_update(tower_type, TowerLevel(step))
+            for step in range(1, level.value + 1)]
+
+
+def _mutation_outcome(code, tower_type, level):
+    """
+    :return: The code of the tower packed into code once it is updated to the given type and level, and the cost.
+    """
+    codes = np.array([code], dtype=np.uint8)
+    cost = GeneView(codes, 0).update(tower_type if level != TowerLevel.NO_TOWER else TowerType.NO_TOWER, level)
+    return codes[0], cost
+
+
+def _mutation_tables():
+    thresholds = np.full((NUM_GENE_CODES, len(TowerType), len(TowerLevel), len(TowerLevel) - 1), np.inf)
+    results = np.zeros((NUM_GENE_CODES, len(TowerType), len(TowerLevel)), dtype=np.uint8)
+    costs = np.zeros((NUM_GENE_CODES, len(TowerType), len(TowerLevel)))
+    for code in range(NUM_GENE_CODES):
+        for type_idx, tower_type in enumerate(TowerType):
+            for level in TowerLevel:
+                steps = _mutation_steps(code, tower_type, level)
+                thresholds[code, type_idx, level.value, :len(steps)] = np.maximum.accumulate(steps) if steps else []
+                results[code, type_idx, level.value], costs[code, type_idx, level.value] = \
+                    _mutation_outcome(code, tower_type, level)
+    return thresholds, results, costs
+
+
+# change_tower_under_constrains of the tower packed into a code, to the type and level of the given indices (of
+# list(TowerType) and list(TowerLevel)), settles for the highest level it can afford every step to:
+# MUTATION_THRESHOLDS[code, type, level] are the least money that takes for every level up to the wanted one (inf
+# past it), and MUTATION_RESULTS[code, type, level] and MUTATION_COSTS[code, type, level] are the tower it settles
+# for and its cost, by the level it settles for.
+MUTATION_THRESHOLDS, MUTATION_RESULTS, MUTATION_COSTS = _mutation_tables()
@@ -0,0 +1,209 @@
+import os
+import copy
+import queue
+import random
+import multiprocessing
+
+import numpy as np
+
+from GeneticAgent.GeneticAlgorithm import GeneticAlgorithm
+from GeneticAgent.individual import Individual
+from GeneticAgent.evaluator import Evaluator
+from GeneticAgent.achievement_cache import AchievementCache
+from GeneticAgent.random_streams import RandomStreams
+from GeneticAgent.config import *
+from Logger import logger
+
+
+def migration_targets(island, num_islands, topology=MIGRATION_TOPOLOGY):
+    """
+    :param topology: "ring" - every island sends to the next one, or "complete" - every island sends to all the others.
+    :return: The list of islands the given island sends its emigrants to.
+    """
+    if topology == "ring":
+        return [(island + 1) % num_islands] if num_islands > 1 else []
+    elif topology == "complete":
+        return [other for other in range(num_islands) if other != island]
+    raise ValueError("Unknown migration topology: " + str(topology))
+
+
+class IslandGeneticAlgorithm(GeneticAlgorithm):
+
+    """
+    The GeneticAlgorithm of a single island. Every MIGRATION_INTERVAL generations, right after its population is
+    evaluated, it sends its MIGRANTS_AMOUNT fittest individuals to the islands it migrates to, and replaces its least
+    fit individuals with the ones it receives.
+    Emigrants are sent with the entries of the ancestors the island has added to its copy of Individual.ancestry,
+    which the receiving island adds to its own copy, so the rows of immigrants are always rows of the island's store.
+    """
+
+    def __init__(self, init_wave, seg, log, pop_seed, evaluator, cache, outboxes, inboxes, ancestry_start=0,
+                 surrogate=None, streams=None):
+        """
+        :param outboxes: Queues to the islands this island sends its emigrants to.
+        :param inboxes: Queues from the islands this island receives immigrants from.
+        :param ancestry_start: The size of Individual.ancestry when the islands copied it, the rows from which on are
+                               the island's own.
+        """
+        self.outboxes = outboxes
+        self.inboxes = inboxes
+        self.ancestry_start = ancestry_start
+        super().__init__(init_wave, seg, log, pop_seed, evaluator, cache, surrogate=surrogate, streams=streams)
+
+    def calculate_pop_fitness(self):
+        super().calculate_pop_fitness()
+
+        # Migrate before every selection that is followed by a migration interval:
+        if (self.gen_idx + 1) % MIGRATION_INTERVAL == 0 and self.gen_idx < NUM_GENERATIONS - 1:
+            self.migrate()
+
+    def migrate(self):
+        individuals = self.population.individuals
+        order = np.argsort([individual.get_fitness() for individual in individuals], kind='stable')
+
+        emigrants = [individuals[idx] for idx in order[::-1][:MIGRANTS_AMOUNT]]
+        rows, entries = Individual.ancestry.lineage_since([emigrant.ancestor_row for emigrant in emigrants],
+                                                          self.ancestry_start)
+        for outbox in self.outboxes:
+            outbox.put((emigrants, rows, entries))
+
+        immigrants = list()
+        for inbox in list(self.inboxes):
+            received = inbox.get()
+            if received is None:  # That island has finished (it has no fit individuals left)
+                self.inboxes.remove(inbox)
+            else:
+                received, rows, entries = received
+                row_of = Individual.ancestry.adopt(rows, entries, self.ancestry_start)
+                for immigrant in received:
+                    immigrant.ancestor_row = row_of(immigrant.ancestor_row)
+                    if immigrant.ancestry_row is not None and immigrant.ancestry_row >= self.ancestry_start:
+                        immigrant.ancestry_row = None  # Its row is in the sending island's store only
+                immigrants += received
+
+        # Immigrants take the place (and id) of the least fit individuals:
+        for idx, immigrant in zip(order, immigrants):
+            immigrant.id = individuals[idx].get_id()
+            immigrant.set_generation(individuals[idx].get_generation())
+            individuals[idx] = immigrant
+
+        self.log.write_to_run_log("Received " + str(len(immigrants)) + " immigrants in generation " +
+                                  str(self.gen_idx))
+
+
+def run_island(island, seed, streams, init_wave, seg, log_directory, pop_seed, ancestry, surrogate, outboxes, inboxes,
+               results):
+    """
+    Evolves the population of an island (in its own process) and puts its fittest individuals, the Individual
+    counters, the ancestors it has added to ancestry and its surrogate, in results.
+    :param seed: The seed of the global random generators of the island, which unseeded streams draw from.
+    :param surrogate: The island's copy of the run's Surrogate, or None.
+    """
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    Individual.ancestry = ancestry
+    ancestry_size = len(ancestry)
+
+    log = logger.Logger(log_directory)
+    log.create_segment_csv()
+    evaluator = Evaluator(max(1, NUM_WORKERS // NUM_ISLANDS))
+    cache = AchievementCache()
+
+    try:
+        ga = IslandGeneticAlgorithm(init_wave, seg, log, pop_seed, evaluator, cache, outboxes, inboxes,
+                                    ancestry_size, surrogate, streams)
+        fittest = list(ga.run())
+        results.put((island, fittest, (Individual.current_id, Individual.current_gen),
+                     Individual.ancestry.rows_since(ancestry_size), surrogate))
+    finally:
+        for outbox in outboxes:  # Let the islands that still migrate know
+            outbox.put(None)
+        evaluator.close()
+        cache.close()
+        log.end_run()
+
+
+class IslandModel:
+
+    """
+    Learns a segment with num_islands populations, each evolved by its own GeneticAlgorithm in its own process and
+    with its own random streams, that exchange their fittest individuals every MIGRATION_INTERVAL generations along
+    MIGRATION_TOPOLOGY.
+    Every island logs its generations to the directory island_<i> under the run's log directory.
+    Every island screens its babies with its own copy of the run's surrogate, and what all of them have learned is
+    added to the run's surrogate when the segment ends.
+    """
+
+    def __init__(self, init_wave, seg, log, pop_seed=None, num_islands=NUM_ISLANDS, streams=None, surrogate=None):
+        """
+        :param init_wave: The starting point in the game from which the islands need to learn.
+        :param pop_seed: List of individuals that we be the seed of the initial population of every island.
+        :param streams: The RandomStreams of the run, which the streams of the islands are spawned from.
+        :param surrogate: The Surrogate of the run, or None.
+        """
+        self.init_wave = init_wave
+        self.segment = seg
+        self.log = log
+        self.pop_seed = pop_seed
+        self.num_islands = num_islands
+        self.streams = streams if streams is not None else RandomStreams()
+        self.surrogate = surrogate
+
+    def run(self):
+        """
+        :return: The fittest individuals of the last generation of all the islands.
+        """
+        manager = multiprocessing.Manager()
+        queues = {(source, target): manager.Queue() for source in range(self.num_islands)
+                  for target in migration_targets(source, self.num_islands)}
+        results = manager.Queue()
+
+        # The ancestors of all the islands are stored before the islands copy the ancestry:
+        for ancestor in self.pop_seed if self.pop_seed is not None else []:
+            Individual.ancestry.add(ancestor)
+        ancestry_size = len(Individual.ancestry)
+
+        islands = list()
+        island_streams = self.streams.spawn(self.num_islands)
+        for island in range(self.num_islands):
+            log_directory = os.path.join(self.log.main_directory_path, "island_" + str(island))
+            os.makedirs(log_directory, exist_ok=True)
+            outboxes = [queues[source, target] for source, target in queues if source == island]
+            inboxes = [queues[source, target] for source, target in queues if target == island]
+            process = multiprocessing.Process(target=run_island,
+                                              args=(island, random.randrange(2 ** 63), island_streams[island],
+                                                    self.init_wave, self.segment, log_directory, self.pop_seed,
+                                                    Individual.ancestry, self.surrogate, outboxes, inboxes, results))
+            process.start()
+            islands.append(process)
+
+        base = copy.deepcopy(self.surrogate)  # What the islands have learned is what they add to it
+        fittest = dict()
+        while len(fittest) < self.num_islands:
+            try:
+                island, island_fittest, counters, ancestors, surrogate = results.get(timeout=1)
+                row_of = Individual.ancestry.merge(ancestors, ancestry_size)
+                for individual in island_fittest:
+                    individual.ancestor_row = row_of(individual.ancestor_row)
+                fittest[island] = island_fittest
+                # The islands of the next segment go on from here, as a single GeneticAlgorithm would:
+                Individual.current_id, Individual.current_gen = counters
+                if self.surrogate is not None:
+                    self.surrogate.merge(surrogate, base)
+            except queue.Empty:
+                if any(process.exitcode not in (None, 0) for process in islands):
+                    for process in islands:
+                        process.terminate()
+                    manager.shutdown()
+                    raise RuntimeError("An island of segment " + str(self.segment) + " has failed")
+
+        for process in islands:
+            process.join()
+        manager.shutdown()
+
+        for island in range(self.num_islands):
+            highest = max([individual.get_fitness() for individual in fittest[island]], default=0)
+            self.log.write_to_run_log("Island " + str(island) + " of segment " + str(self.segment) + " - fittest: " +
+                                      str(len(fittest[island])) + " highest: " + str(highest))
+
+        return np.array([individual for island in range(self.num_islands) for individual in fittest[island]])
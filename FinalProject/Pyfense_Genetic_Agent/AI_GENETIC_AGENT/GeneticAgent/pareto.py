@@ -0,0 +1,92 @@
+import numpy as np
+
+
+def objectives(individuals):
+    """
+    :return: np.array of shape (len(individuals), 4) of the objectives of every played individual, all maximized:
+             the lives it kept, the money it kept, the money it earned and the waves it survived.
+    """
+    return np.array([[individual.get_lives(), individual.get_money(), individual.get_money_earned(),
+                      individual.get_wave()] for individual in individuals], dtype=float).reshape(-1, 4)
+
+
+def non_dominated_sort(points):
+    """
+    Sorts points into Pareto fronts, by an efficient non-dominated sort: the distinct points are visited in
+    lexicographically descending order, so a point can only be dominated by the points visited before it, and every
+    point is put in the first front that has no point that dominates it, which is binary searched for (every point
+    that is dominated by a point of a front is dominated by a point of every front before it as well). A point is
+    compared with all the points of a front at once.
+    That makes O(M N log N) comparisons when the fronts are small, and never more than the O(M N^2) of the fast
+    non-dominated sort of NSGA-II.
+    :param points: np.array of shape (N, M) of the objectives of N solutions, all maximized.
+    :return: np.array of the front of every point: 0 for the ones no point dominates, 1 for the ones only points of
+             front 0 dominate, and so on.
+    """
+    if not len(points):
+        return np.zeros(0, dtype=int)
+    # Identical points share their front, and a distinct point that is no worse in every objective dominates:
+    points, inverse = np.unique(points, axis=0, return_inverse=True)
+
+    ranks = np.zeros(len(points), dtype=int)
+    fronts = list()  # The points of every front, in arrays that are doubled when full
+    sizes = list()
+
+    for idx in range(len(points) - 1, -1, -1):  # np.unique sorts the points lexicographically
+        point = points[idx]
+        low, high = 0, len(fronts)
+        while low < high:
+            mid = (low + high) // 2
+            if np.all(fronts[mid][:sizes[mid]] >= point, axis=1).any():  # point is dominated
+                low = mid + 1
+            else:
+                high = mid
+
+        if low == len(fronts):
+            fronts.append(np.empty((1, points.shape[1])))
+            sizes.append(0)
+        elif sizes[low] == len(fronts[low]):
+            fronts[low] = np.concatenate((fronts[low], np.empty_like(fronts[low])))
+        fronts[low][sizes[low]] = point
+        sizes[low] += 1
+        ranks[idx] = low
+
+    return ranks[inverse.ravel()]
+
+
+def crowding_distance(points, ranks):
+    """
+    :param points: np.array of shape (N, M) of the objectives of N solutions.
+    :param ranks: np.array of the front of every point, see non_dominated_sort.
+    :return: np.array of the crowding distance of every point within its front: the sum over the objectives of the
+             distance between its neighbours in the front, relative to the range of the front. The points at the ends
+             of a front are infinitely far.
+    """
+    distances = np.zeros(len(points))
+    if not len(points):
+        return distances
+
+    for values in points.T:
+        order = np.lexsort((values, ranks))  # By front, and by the objective within every front
+        values, fronts = values[order], ranks[order]
+        starts = np.flatnonzero(np.concatenate(([True], fronts[1:] != fronts[:-1])))
+        ends = np.concatenate((starts[1:], [len(order)])) - 1
+        spans = np.repeat(values[ends] - values[starts], ends - starts + 1)
+
+        gaps = np.full(len(order), np.inf)
+        inner = np.ones(len(order), dtype=bool)
+        inner[starts] = inner[ends] = False
+        inner_idx = np.flatnonzero(inner)
+        gaps[inner_idx] = np.divide(values[inner_idx + 1] - values[inner_idx - 1], spans[inner_idx],
+                                    out=np.zeros(len(inner_idx)), where=spans[inner_idx] > 0)
+        distances[order] += gaps
+
+    return distances
+
+
+def pareto_order(points):
+    """
+    :return: The indices of points from the fittest by NSGA-II: by front, and from the least crowded within a front.
+    """
+    ranks = non_dominated_sort(points)
+    return np.lexsort((-crowding_distance(points, ranks), ranks))
@@ -0,0 +1,18 @@
+"""
+The placement index of the played level, for spatial operators: the cell of every gene of a genome, as PyFense
+builds it (see gamedata.gene_cells of the game).
+"""
+import os
+import sys
+
+import numpy as np
+
+from GeneticAgent.config import SIM_FILE, LEVEL
+
+sys.path.append(os.path.dirname(os.path.dirname(SIM_FILE)))
+from Pyfense import gamedata
+
+# np.array of shape (GENOME_SIZE, 2) of the (column, row) of the cell of every gene, and of the pixel coordinates of
+# its center:
+GENE_CELLS = np.array([cell[:2] for cell in gamedata.gene_cells(LEVEL)], dtype=int)
+GENE_PIXELS = np.array([cell[2:] for cell in gamedata.gene_cells(LEVEL)], dtype=int)
@@ -1,7 +1,11 @@
-import os
 import json
+import random
+import subprocess
 
 from GeneticAgent.individual import Individual
+from GeneticAgent.genetic_resources import write_genome_batch, NUM_GENE_CODES
+from GeneticAgent.profiling import timed, phase, count
+from GeneticAgent.pareto import objectives, pareto_order
 from GeneticAgent.config import *
 import numpy as np
 
@@ -25,6 +29,29 @@ class PopulationIterator:
         raise StopIteration
 
 
+def pack_batch(genomes, codes):
+    """
+    Packs the genomes that are played as a genome batch.
+    :param genomes: dict of individual id -> [encoded genome, lives], with the min_lives of the game as an optional
+                    third item.
+    :param codes: dict of individual id -> packed genes, of these individuals at least.
+    :return: The ids, packed genes, lives and min_lives of the genomes, as write_genome_batch takes them.
+    """
+    ids = list(genomes.keys())
+    return (ids, np.array([codes[ind_id] for ind_id in ids]).reshape(len(ids), GENOME_SIZE),
+            [genomes[ind_id][1] for ind_id in ids],
+            [genomes[ind_id][2] if len(genomes[ind_id]) > 2 else 0 for ind_id in ids])
+
+
+def is_stopped(achievement, min_lives):
+    """
+    :param min_lives: The min_lives the game was played with, or None.
+    :return: Whether the game was stopped before its end, as it was left with fewer lives than min_lives (a game
+             that has lost all its lives has ended).
+    """
+    return min_lives is not None and 0 < achievement[1] < min_lives
+
+
 class Population:
 
     def __init__(self, seg):
@@ -35,15 +62,18 @@ class Population:
         self.individuals = list()
         self.fittest = list()
         self.gen_num = 0
+        self.achievements = dict()
+        self.stopped = set()  # The ids (as strings) of the individuals whose game was stopped, see is_stopped
 
-    def init_random_pop(self, money, ancestor, gen_num=0):
+    def init_random_pop(self, money, ancestor, gen_num=0, rng=random):
         """
          Initialized a random population.
          :param init_wave: The individual's era.
          :param money: The individual's funds to use in it's lifetime.
+         :param rng: The random.Random (or the random module) the genomes are drawn from.
          """
         for i in range(POP_SIZE):
-            self.individuals.append(Individual(money, self.segment, gen_num=gen_num, ancestor=ancestor))
+            self.individuals.append(Individual(money, self.segment, gen_num=gen_num, ancestor=ancestor, rng=rng))
 
     def init_pop_from_inds(self, individuals):
         """
@@ -54,35 +84,120 @@ class Population:
         for individual in individuals:
             individual.set_generation(FIRST_GENERATION_IN_SEGMENT)
 
-    def let_live(self):
+    @timed("evaluation")
+    def let_live(self, evaluator=None, cache=None, min_lives=None):
         """
         Lets the individuals in the population live their life.
         The individuals get updated in their lifetime.
+        :param evaluator: An Evaluator to play the games on. If None, the games are played by a new process that
+                          communicates through INPUT_PATH and OUTPUT_PATH.
+        :param cache: An AchievementCache. Individuals whose game was already played are not played again, and
+                      identical individuals are played once.
+        :param min_lives: dict of individual id -> lives below which its game is stopped (see PRUNE_FRACTION), or
+                          None to play all the games to their end.
         """
-        # create & write to INPUT_PATH file:
-        genomes = dict()
-        for individual in self.individuals:
-            genomes[individual.get_id()] = [individual.encode_genome_to_string(), individual.get_lives()]
+        init_wave = self.segment * WAVES_PER_SEGMENT + 1
 
-        with open(INPUT_PATH, 'w') as f:
-            json.dump(genomes, f)
+        with phase("serialize"):
+            genomes = dict()
+            for individual in self.individuals:
+                genomes[individual.get_id()] = [individual.encode_genome_to_string(), individual.get_lives()]
+                if min_lives is not None:
+                    genomes[individual.get_id()].append(min_lives[individual.get_id()])
+            codes = {individual.get_id(): individual.genome.codes for individual in self.individuals}
+
+        if cache is None:
+            count("games", len(genomes))
+            self.achievements = self.__play(genomes, codes, init_wave, evaluator)
+            self.stopped = {str(ind_id) for ind_id in genomes if min_lives is not None and
+                            is_stopped(self.achievements[str(ind_id)], min_lives[ind_id])}
+            return
+
+        self.achievements = dict()
+        self.stopped = set()
+        keys = dict()  # id -> cache key of the individuals that need to be played
+        to_play = dict()  # cache key -> id of the individual that is played for it
+        for ind_id, (genome_string, lives, *_) in genomes.items():
+            key = cache.key(genome_string, lives, init_wave)
+            achievement = cache.get(key)
+            if achievement is not None:
+                self.achievements[str(ind_id)] = achievement
+            else:
+                keys[ind_id] = key
+                # Identical individuals are played with the fewest min_lives of them:
+                if key not in to_play or min_lives is not None and min_lives[ind_id] < min_lives[to_play[key]]:
+                    to_play[key] = ind_id
+
+        count("games", len(to_play))
+        count("cached_games", len(genomes) - len(to_play))
+        if to_play:
+            played = self.__play({ind_id: genomes[ind_id] for ind_id in to_play.values()}, codes, init_wave,
+                                 evaluator)
+            stopped = {key for key, ind_id in to_play.items() if min_lives is not None and
+                       is_stopped(played[str(ind_id)], min_lives[ind_id])}
+            # Games that were stopped before their end are not cached:
+            cache.put({key: played[str(ind_id)] for key, ind_id in to_play.items() if key not in stopped})
+            for ind_id, key in keys.items():
+                self.achievements[str(ind_id)] = played[str(to_play[key])]
+                if key in stopped:
+                    self.stopped.add(str(ind_id))
+
+    def __play(self, genomes, codes, init_wave, evaluator):
+        """
+        Plays the games of the genomes.
+        :param genomes: dict of individual id -> [encoded genome, lives].
+        :param codes: dict of individual id -> packed genes, which are sent instead of the encoded genomes as a
+                      genome batch (see GENOME_BATCH).
+        :return: dict of individual id (as a string) -> achievement.
+        """
+        packed = codes if IS_HEADLESS and GENOME_BATCH else None
+        if evaluator is not None:
+            return evaluator.evaluate(genomes, init_wave, WAVES_PER_SEGMENT, self.gen_num, packed)
+
+        # write to INPUT_PATH file (or GENOME_BATCH_PATH):
+        input_path = INPUT_PATH
+        with phase("serialize"):
+            if packed is not None:
+                input_path = GENOME_BATCH_PATH
+                write_genome_batch(input_path, *pack_batch(genomes, packed))
+            else:
+                with open(input_path, 'w') as f:
+                    json.dump(genomes, f)
 
         # run the program!
-        command = ["python3", RUN_FILE, "learn", INPUT_PATH, OUTPUT_PATH, str(self.segment * WAVES_PER_SEGMENT + 1),
-                   str(WAVES_PER_SEGMENT), str(self.gen_num)]
-        os.system(" ".join(command))
+        run_file = SIM_FILE if IS_HEADLESS else RUN_FILE
+        command = ["python3", run_file, "learn", input_path, OUTPUT_PATH, str(init_wave),
+                   str(WAVES_PER_SEGMENT), str(self.gen_num), str(NUM_WORKERS)]
+        with phase("spawn"):
+            process = subprocess.Popen(command)
+        with phase("simulate"):
+            process.wait()
+
+        with phase("parse"), open(OUTPUT_PATH) as f:
+            return json.load(f)
 
     def update(self):
-        with open(OUTPUT_PATH) as f:
-            achievements = json.load(f)
+        for individual in self.individuals:
+            individual.update(self.achievements[str(individual.get_id())], str(individual.get_id()) in self.stopped)
 
-            for individual in self.individuals:
-                individual.update(achievements[str(individual.get_id())])
+    def diversity(self):
+        """
+        :return: The mean Hamming distance between the genomes of every two individuals (the amount of genes whose
+                 tower type or level differ).
+        """
+        amount = len(self.individuals)
+        if amount < 2:
+            return 0
+        codes = np.array([individual.genome.codes for individual in self.individuals], dtype=np.intp)
+        # How many individuals have every code in every gene, from which the identical pairs of every gene follow:
+        counts = np.bincount((codes + np.arange(codes.shape[1]) * NUM_GENE_CODES).ravel(),
+                             minlength=codes.shape[1] * NUM_GENE_CODES)
+        return codes.shape[1] - (counts * (counts - 1)).sum() / (amount * (amount - 1))
 
     def fittest_individuals(self, ind_amount):
         """
         :param ind_amount: The amount of fittest individuals to be returned.
-        :return: The ind_amount fittest individuals (not sorted)
+        :return: The ind_amount fittest individuals (not sorted), by SELECTION
         """
         def filterIndividuals(individual):
             if individual.get_fitness() > 0:
@@ -92,6 +207,9 @@ class Population:
 
         live_individuals = np.array(list(filter(filterIndividuals, self.individuals)))
 
+        if SELECTION == "nsga2":
+            return live_individuals[pareto_order(objectives(live_individuals))[:ind_amount]]
+
         if len(live_individuals) - ind_amount > 0:  # There are more then ind_amount live_individuals, can sort!
             ordered_idx = np.argpartition(live_individuals, len(live_individuals) - ind_amount)
             return live_individuals[ordered_idx[len(live_individuals) - ind_amount:]]
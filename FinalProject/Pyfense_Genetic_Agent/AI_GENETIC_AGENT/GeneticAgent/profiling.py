@@ -0,0 +1,91 @@
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from collections import defaultdict
+
+# The phases of a generation, in the order they are logged. evaluation is the time let_live spends out of the phases
+# of its games (serialize - encoding and sending the genomes, spawn - starting the game processes, simulate - waiting
+# for the games, parse - reading the achievements):
+PHASES = ["selection", "crossover", "validation", "mutation", "evaluation", "serialize", "spawn", "simulate", "parse",
+          "logging", "checkpoint"]
+COUNTERS = ["babies", "invalid_babies", "games", "cached_games"]
+
+
+class PhaseTimer:
+
+    """
+    Adds up the time spent in phases, and counts the events of a run. The time of a phase excludes the phases it
+    calls. Only the main thread is timed, so the games a Speculator plays in a thread of its own are left out.
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counts = defaultdict(int)
+        self.__nested = list()  # The time of the phases called by every running phase
+
+    @contextmanager
+    def phase(self, name):
+        if threading.current_thread() is not threading.main_thread():
+            yield
+            return
+
+        start = time.perf_counter()
+        self.__nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds[name] += elapsed - self.__nested.pop()
+            self.calls[name] += 1
+            if self.__nested:
+                self.__nested[-1] += elapsed
+
+    def wrap(self, name, function):
+        """
+        :return: function, timed as the phase name.
+        """
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return function(*args, **kwargs)
+        return timed
+
+    def count(self, counter, amount=1):
+        if threading.current_thread() is threading.main_thread():
+            self.counts[counter] += amount
+
+    def lap(self):
+        """
+        :return: dict of phase -> seconds and dict of counter -> count since the last lap (of all the PHASES and
+                 COUNTERS, in their order), which start anew.
+        """
+        seconds = {name: self.seconds.pop(name, 0.0) for name in PHASES}
+        counts = {name: self.counts.pop(name, 0) for name in COUNTERS}
+        self.seconds.clear()
+        self.counts.clear()
+        return seconds, counts
+
+
+TIMER = PhaseTimer()  # The timer of the run
+
+
+def phase(name):
+    """
+    Times a block as the phase name of the run: with phase("simulate"): ...
+    """
+    return TIMER.phase(name)
+
+
+def timed(name):
+    """
+    Times a function as the phase name of the run.
+    """
+    def decorator(function):
+        return TIMER.wrap(name, function)
+    return decorator
+
+
+def count(counter, amount=1):
+    TIMER.count(counter, amount)
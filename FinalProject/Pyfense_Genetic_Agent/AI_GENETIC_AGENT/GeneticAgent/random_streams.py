@@ -0,0 +1,62 @@
+import random
+
+import numpy as np
+
+
+class RandomStreams:
+
+    """
+    The random generators of a run: py, a random.Random for the draws of one value at a time (crossover, the
+    mutation of a gene at a time, random genomes), and np, a numpy Generator for the draws of whole arrays (see
+    GeneticAlgorithm.mutate_batch).
+    Seeded streams are made from a numpy SeedSequence, so a run is reproduced from its seed alone, and spawn makes
+    independent streams for the islands (or other processes) of a run, which are reproduced as well.
+    Unseeded streams draw from the global random module, as seeded by their caller, and np from a Generator seeded
+    from it when first used.
+    """
+
+    def __init__(self, seed_sequence=None):
+        """
+        :param seed_sequence: The numpy SeedSequence to seed the streams from, or None for unseeded streams.
+        """
+        self.seed_sequence = seed_sequence
+        if seed_sequence is None:
+            self.py = random
+            self.__np = None
+        else:
+            py_sequence, np_sequence = seed_sequence.spawn(2)
+            self.py = random.Random(int.from_bytes(py_sequence.generate_state(4).tobytes(), "little"))
+            self.__np = np.random.default_rng(np_sequence)
+
+    @classmethod
+    def from_seed(cls, seed=None):
+        """
+        :param seed: An int, or None for unseeded streams.
+        """
+        return cls(None if seed is None else np.random.SeedSequence(seed))
+
+    @property
+    def np(self):
+        if self.__np is None:
+            self.__np = np.random.default_rng(self.py.getrandbits(64))
+        return self.__np
+
+    def spawn(self, amount):
+        """
+        :return: list of amount independent RandomStreams, made from the seed of these ones (or unseeded ones, given
+                 unseeded streams).
+        """
+        if self.seed_sequence is None:
+            return [RandomStreams() for _ in range(amount)]
+        return [RandomStreams(seed_sequence) for seed_sequence in self.seed_sequence.spawn(amount)]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.seed_sequence is None:  # The global random module is saved by the Checkpointer
+            state["py"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.seed_sequence is None:
+            self.py = random
@@ -1,33 +1,95 @@
 import sys
 import os
+import cProfile
 sys.path.append(os.getcwd())
 
 from GeneticAgent.GeneticAlgorithm import GeneticAlgorithm
+from GeneticAgent.evaluator import Evaluator, GameEvaluator
+from GeneticAgent.achievement_cache import AchievementCache
+from GeneticAgent.checkpoint import Checkpointer
+from GeneticAgent.islands import IslandModel
+from GeneticAgent.steady_state import SteadyStateGeneticAlgorithm
+from GeneticAgent.speculation import Speculator
+from GeneticAgent.surrogate import Surrogate
+from GeneticAgent.random_streams import RandomStreams
 from GeneticAgent.config import *
 from datetime import datetime
 from Logger import logger
 
 mode = sys.argv[1]
 
-if mode == "learn":
+if mode == "learn" or mode == "resume":
 
-    log = logger.Logger()
-    log.write_run_parameters(POP_SIZE, NUM_GENERATIONS, FITTEST_AMOUNT, MUTATION_RATE,
-                                START_OF_GAME_MONEY, NUM_SEGMENTS, WAVES_PER_SEGMENT)
+    checkpointer = Checkpointer()
+    resumed_ga = None
 
-    init_wave = INIT_WAVE
+    if mode == "learn":
+        log = logger.Logger()
+        log.write_run_parameters(POP_SIZE, NUM_GENERATIONS, FITTEST_AMOUNT, MUTATION_RATE,
+                                    START_OF_GAME_MONEY, NUM_SEGMENTS, WAVES_PER_SEGMENT)
+        checkpointer.run_state = {"log_directory": log.main_directory_path, "seg_idx": 0, "init_wave": INIT_WAVE,
+                                  "fittest_of_all_time": list(), "fittest_of_seg": None,
+                                  "surrogate": Surrogate() if SURROGATE_PLAY_FRACTION is not None else None,
+                                  "streams": RandomStreams.from_seed(RANDOM_SEED)}
+        if RANDOM_SEED is not None:
+            log.write_to_run_log("Random seed: " + str(RANDOM_SEED))
 
-    # ############## Solving the segment  ##############
+    else:  # Continue from the last checkpoint
+        resumed_ga = checkpointer.load()["ga"]
+        log = logger.Logger(checkpointer.run_state["log_directory"])
+        log.write_to_run_log("Resuming the run from " + CHECKPOINT_PATH + "\n")
+
+    init_wave = checkpointer.run_state["init_wave"]
 
-    fittest_of_all_time = list()
-    fittest_of_seg = None
+    profiler = None
+    if PROFILE:
+        log.write_to_run_log("Profiling process " + str(os.getpid()))
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    # ############## Solving the segment  ##############
 
-    for seg_idx in range(NUM_SEGMENTS):
+    fittest_of_all_time = checkpointer.run_state["fittest_of_all_time"]
+    fittest_of_seg = checkpointer.run_state["fittest_of_seg"]
+    steady_state = STEADY_STATE and IS_HEADLESS and NUM_ISLANDS == 1
+    if steady_state:
+        evaluator = GameEvaluator()
+        if GENOME_BATCH or SHARED_MEMORY:
+            log.write_to_run_log("Steady-state games are handed to the simulation one at a time as json, "
+                                 "GENOME_BATCH and SHARED_MEMORY apply to generational runs only")
+    else:
+        evaluator = Evaluator() if IS_HEADLESS and NUM_ISLANDS == 1 else None  # Islands have their own
+    cache = AchievementCache()
+    surrogate = checkpointer.run_state.get("surrogate")  # saved with every checkpoint
+    streams = checkpointer.run_state.get("streams") or RandomStreams()
+    speculator = None
+    if SPECULATIVE_WORKERS > 0 and IS_HEADLESS and NUM_ISLANDS == 1 and not steady_state:
+        speculator = Speculator(Evaluator(SPECULATIVE_WORKERS))
+
+    for seg_idx in range(checkpointer.run_state["seg_idx"], NUM_SEGMENTS):
 
         start_time = datetime.now()
 
-        log.create_segment_csv()
-        ga = GeneticAlgorithm(init_wave, seg_idx, log, fittest_of_seg)
+        if resumed_ga is not None:
+            ga = resumed_ga
+            ga.resume(log, evaluator, cache, checkpointer, surrogate, speculator)
+            resumed_ga = None
+        elif NUM_ISLANDS > 1:  # Every island logs its own segments
+            ga = IslandModel(init_wave, seg_idx, log, fittest_of_seg, streams=streams, surrogate=surrogate)
+        else:
+            if log.current_segment < seg_idx:  # A resumed run may have logged it already
+                log.create_segment_csv()
+            ga = speculator.next_ga(fittest_of_seg) if speculator is not None else None
+            if ga is not None:  # Its first generation was played while the last segment ended
+                log.write_to_run_log("Segment " + str(seg_idx) + " goes on from its speculated first generation")
+                ga.resume(log, evaluator, cache, checkpointer, surrogate, speculator)
+            elif steady_state:  # Saved between segments only
+                ga = SteadyStateGeneticAlgorithm(init_wave, seg_idx, log, fittest_of_seg, evaluator, cache, streams,
+                                                 surrogate)
+            else:
+                ga = GeneticAlgorithm(init_wave, seg_idx, log, fittest_of_seg, evaluator, cache, checkpointer,
+                                      surrogate, speculator, streams)
+
         fittest_of_seg = ga.run()
 
         if len(fittest_of_seg) < 2:
@@ -41,6 +103,19 @@ if mode == "learn":
         time_elapsed = datetime.now() - start_time
         log.save_segment_execution_time(seg_idx, time_elapsed)
 
+        checkpointer.run_state.update(seg_idx=seg_idx + 1, init_wave=init_wave, fittest_of_seg=fittest_of_seg)
+        checkpointer.save()
+
+    if evaluator is not None:
+        evaluator.close()
+    if speculator is not None:
+        speculator.close()
+    cache.close()
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(log.main_directory_path, "profile.pstats"))
+
     # ############## Tracing back the segment's solutions ##############
 
     solutions = dict()
@@ -0,0 +1,63 @@
+import threading
+
+from GeneticAgent.config import *
+
+
+class Speculator:
+
+    """
+    Starts the next segment before a segment has ended: its first generation is bred from the segment's fittest
+    individuals and played on a spare Evaluator (by a thread that waits for its games), while the segment's last
+    generation is played.
+    A GeneticAlgorithm returns the fittest individuals of the generation before its last, so they are final once it
+    breeds the last generation. The next segment goes on from the speculated generation only if it was bred from the
+    fittest individuals the segment has returned, and breeds its first generation anew otherwise.
+    """
+
+    def __init__(self, evaluator):
+        """
+        :param evaluator: The Evaluator that plays the speculated generations, on workers the segments do not use.
+        """
+        self.evaluator = evaluator
+        self.__fittest = None
+        self.__ga = None
+        self.__thread = None
+
+    def speculate(self, ga, fittest):
+        """
+        Breeds and starts playing the first generation of the segment after the one of ga.
+        :param fittest: The fittest individuals ga will return.
+        """
+        if ga.segment >= NUM_SEGMENTS - 1:
+            return
+        self.discard()
+
+        self.__fittest = fittest
+        self.__ga = type(ga)(ga.init_wave + ga.num_waves, ga.segment + 1, ga.log, fittest, cache=ga.cache,
+                             surrogate=ga.surrogate, streams=ga.streams)
+        self.__thread = threading.Thread(target=self.__ga.play_population, args=(self.evaluator,))
+        self.__thread.start()
+
+    def next_ga(self, fittest):
+        """
+        Waits for the games of the speculated generation.
+        :param fittest: The fittest individuals the segment has returned.
+        :return: The GeneticAlgorithm of the next segment, with its first generation played, if it was speculated from
+                 fittest; None otherwise.
+        """
+        if self.__thread is None:
+            return None
+        self.__thread.join()
+        ga = self.__ga if self.__fittest is fittest else None
+        self.__fittest = self.__ga = self.__thread = None
+        return ga
+
+    def discard(self):
+        self.next_ga(None)
+
+    def close(self):
+        """
+        Waits for the speculated games, and stops the evaluator.
+        """
+        self.discard()
+        self.evaluator.close()
@@ -0,0 +1,157 @@
+import math
+
+import numpy as np
+
+from GeneticAgent.GeneticAlgorithm import GeneticAlgorithm
+from GeneticAgent.population import is_stopped
+from GeneticAgent.profiling import phase, count
+from GeneticAgent.config import *
+
+
+class SteadyStateGeneticAlgorithm(GeneticAlgorithm):
+
+    """
+    A steady-state GeneticAlgorithm. Instead of breeding a whole generation once the slowest game of the last one has
+    ended, it breeds a single baby from the current fittest individuals whenever a game ends, and plays it on the
+    worker that was freed, so the workers of a GameEvaluator are never idle.
+    A played individual takes the place of the least fit one of the population, once the population is full and if
+    it is fitter. Every POP_SIZE played individuals are logged as a generation, and a segment plays as many
+    individuals as a generational one.
+    Babies are deduplicated (see DEDUPLICATE) against the games started in their generation (or segment), screened
+    by the surrogate (see breed) and played with the min_lives of the population's fittest (see PRUNE_FRACTION), as
+    the babies of a generational algorithm are. Their games are handed to the GameEvaluator one at a time, as json.
+    """
+
+    def __init__(self, init_wave, seg, log, pop_seed, evaluator, cache=None, streams=None, surrogate=None):
+        """
+        :param evaluator: The GameEvaluator to play the games on.
+        :param cache: An AchievementCache of the games that were already played.
+        :param streams: The RandomStreams the algorithm draws from.
+        :param surrogate: A Surrogate that picks the babies that are played (see breed).
+        """
+        super().__init__(init_wave, seg, log, pop_seed, cache=cache, surrogate=surrogate, streams=streams)
+        self.evaluator = evaluator
+        self.playing = dict()  # key -> (individual, cache key, min_lives, surrogate features) of the games being played
+        self.num_played = 0
+        self.num_started = 0
+
+    def run(self):
+        """
+        :return: The fittest individuals of the population once all the games were played.
+        """
+        unplayed = list(self.population.individuals)  # The initial population is played first
+        self.population.individuals = list()
+        num_games = NUM_GENERATIONS * POP_SIZE
+
+        while self.num_played < num_games:
+            while len(self.playing) < self.evaluator.workers and self.num_started < num_games:
+                baby = unplayed.pop(0) if unplayed else self.breed()
+                if baby is None:  # Not enough fit individuals to breed from, until more games end
+                    break
+                self.start(baby)
+
+            if not self.playing:
+                if self.num_played < num_games:
+                    return []
+                break
+
+            with phase("simulate"):
+                key, achievement = self.evaluator.next_result()
+            individual, cache_key, min_lives, features = self.playing.pop(key)
+            stopped = is_stopped(achievement, min_lives)
+            # Games that were stopped before their end are not cached:
+            if self.cache is not None and not stopped:
+                self.cache.put({cache_key: achievement})
+            self.insert(individual, achievement, features, stopped)
+
+        self.selection()
+        if TIMING:
+            self.log.save_segment_timing(self.segment, self.timing)
+        return self.fittest_inds[-1]
+
+    def breed(self):
+        """
+        :return: A valid, mutated and deduplicated baby of 2 of the current fittest individuals, or None if there are
+                 less than 2. Once the surrogate has learned enough, it is the one the surrogate ranks fittest of
+                 1 / SURROGATE_PLAY_FRACTION babies, so the same fraction of the bred babies is played as in a
+                 generational algorithm.
+        """
+        fittest = self.population.fittest_individuals(FITTEST_AMOUNT)
+        if len(fittest) < 2:
+            return None
+
+        amount = 1
+        if self.surrogate is not None and self.surrogate.samples >= self.surrogate.min_samples:
+            amount = math.ceil(1 / SURROGATE_PLAY_FRACTION)
+        babies = self.deduplicate(self.mutation(self.crossover(fittest, amount)), fittest,
+                                  new_generation=self.num_started % POP_SIZE == 0)
+        if amount > 1:
+            babies = self.surrogate.screen(babies, 1)
+        return babies[0]
+
+    def baby_min_lives(self, individual):
+        """
+        :return: The min_lives the game of an individual is played with, so it stops once it can no longer beat
+                 PRUNE_FRACTION of the FITTEST_AMOUNT-th fitness of the population; or None to play it to its end.
+        """
+        if PRUNE_FRACTION is None or len(self.population.individuals) < POP_SIZE:
+            return None
+        fittest = self.population.fittest_individuals(FITTEST_AMOUNT)
+        if len(fittest) < FITTEST_AMOUNT:
+            return None
+
+        threshold = PRUNE_FRACTION * min([ind.get_fitness() for ind in fittest])
+        return self.min_lives(individual, threshold)
+
+    def start(self, individual):
+        """
+        Starts the game of an individual (or inserts it at once, if the game was already played).
+        """
+        key = self.num_started
+        self.num_started += 1
+        individual.id = key % POP_SIZE
+        individual.set_generation(key // POP_SIZE)
+        features = self.surrogate.features([individual]) if self.surrogate is not None else None
+
+        genome_string = individual.encode_genome_to_string()
+        init_wave = self.segment * WAVES_PER_SEGMENT + 1
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(genome_string, individual.get_lives(), init_wave)
+            achievement = self.cache.get(cache_key)
+            if achievement is not None:
+                count("cached_games")
+                self.insert(individual, achievement, features)
+                return
+
+        min_lives = self.baby_min_lives(individual)
+        self.playing[key] = (individual, cache_key, min_lives, features)
+        count("games")
+        with phase("serialize"):
+            self.evaluator.submit(key, genome_string, individual.get_lives(), init_wave, WAVES_PER_SEGMENT,
+                                  min_lives)
+
+    def insert(self, individual, achievement, features=None, stopped=False):
+        """
+        Updates an individual whose game has ended, and inserts it into the population.
+        :param features: The surrogate features of the individual, from before it was played, to learn from.
+        :param stopped: Whether the game was stopped below its min_lives (and is not learned from).
+        """
+        individual.update(achievement, stopped)
+        individual.set_fitness(self.fitness_function(individual))
+        self.num_played += 1
+        if features is not None and not stopped:
+            self.surrogate.learn(features, [individual.get_fitness()])
+
+        individuals = self.population.individuals
+        if len(individuals) < POP_SIZE:
+            individuals.append(individual)
+        else:
+            least_fit = int(np.argmin([ind.get_fitness() for ind in individuals]))
+            if individual.get_fitness() > individuals[least_fit].get_fitness():
+                individuals[least_fit] = individual
+
+        if self.num_played % POP_SIZE == 0:  # Log the population as a generation
+            self.gen_idx = self.num_played // POP_SIZE - 1
+            self.log_generation()
+            self.log_timing()
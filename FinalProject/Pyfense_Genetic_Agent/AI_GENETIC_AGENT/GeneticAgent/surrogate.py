@@ -0,0 +1,87 @@
+import numpy as np
+
+from GeneticAgent.genetic_resources import NUM_GENE_CODES
+from GeneticAgent.config import *
+
+# tower codes (fractions of the genome), towers of every gene, ancestor lives, money left after the build and a bias:
+NUM_FEATURES = NUM_GENE_CODES + GENOME_SIZE + 3
+
+
+class Surrogate:
+
+    """
+    A ridge regression of the fitness of individuals on features of their genome and of their ancestor, learned online
+    from every generation that is played. It ranks the babies of a generation, so only the most promising of them are
+    played (see SURROGATE_PLAY_FRACTION).
+    The regression keeps the sums X^T X and X^T y of all it has learned, so learning costs the same at any point of the
+    run.
+    """
+
+    def __init__(self, ridge=SURROGATE_RIDGE, min_samples=SURROGATE_MIN_SAMPLES):
+        """
+        :param ridge: The regularization of the regression.
+        :param min_samples: The amount of played individuals to learn from before ranking babies.
+        """
+        self.ridge = ridge
+        self.min_samples = min_samples
+        self.gram = np.zeros((NUM_FEATURES, NUM_FEATURES))
+        self.moments = np.zeros(NUM_FEATURES)
+        self.samples = 0
+        self.weights = None
+
+    @staticmethod
+    def features(individuals):
+        """
+        :param individuals: Individuals that were not played yet.
+        :return: np.array of shape (len(individuals), NUM_FEATURES).
+        """
+        codes = np.array([individual.get_genome().codes for individual in individuals]).reshape(-1, GENOME_SIZE)
+        features = np.zeros((len(codes), NUM_FEATURES))
+        np.add.at(features, (np.arange(len(codes))[:, np.newaxis], codes), 1 / GENOME_SIZE)
+        features[:, NUM_GENE_CODES:NUM_GENE_CODES + GENOME_SIZE] = codes != 0
+
+        for row, individual in enumerate(individuals):
+            ancestor = individual.get_ancestor()
+            features[row, -3] = (15 if ancestor is None else ancestor.get_lives()) / 15
+            features[row, -2] = individual.get_money() / ancestor.get_money() if \
+                ancestor is not None and ancestor.get_money() != 0 else 1
+        features[:, -1] = 1
+        return features
+
+    def learn(self, features, fitness):
+        """
+        :param features: The features of individuals, from before they were played.
+        :param fitness: Their fitness.
+        """
+        self.gram += features.T @ features
+        self.moments += features.T @ np.asarray(fitness, dtype=float)
+        self.samples += len(features)
+        self.weights = None
+
+    def merge(self, other, base):
+        """
+        Adds what other has learned since it was a copy of base (e.g. on an island) to what this one has learned.
+        """
+        self.gram += other.gram - base.gram
+        self.moments += other.moments - base.moments
+        self.samples += other.samples - base.samples
+        self.weights = None
+
+    def predict(self, individuals):
+        """
+        :return: np.array of the predicted fitness of the individuals.
+        """
+        if self.weights is None:
+            self.weights = np.linalg.solve(self.gram + self.ridge * np.eye(NUM_FEATURES), self.moments)
+        return self.features(individuals) @ self.weights
+
+    def screen(self, individuals, amount):
+        """
+        :return: The amount individuals with the highest predicted fitness (in their original order), or all the
+                 individuals while the regression has learned less than min_samples.
+        """
+        if self.samples < self.min_samples or amount >= len(individuals):
+            return individuals
+
+        promising = np.argsort(-self.predict(individuals), kind='stable')[:amount]
+        return [individuals[idx] for idx in sorted(promising)]
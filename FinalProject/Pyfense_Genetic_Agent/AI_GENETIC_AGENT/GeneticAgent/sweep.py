@@ -0,0 +1,229 @@
+"""
+Sweeps the genetic parameters of config.py: runs runme.py learn for every configuration of a grid (or of a random
+search), many at once on a process pool, every run in a working directory of its own (so it has its own input,
+output, checkpoint and logs), and saves the final fitness, runtime and evaluations-to-target of every run to a
+summary table, sweep.csv.
+A run plays its games on --workers processes (and on a process per island at least, given NUM_ISLANDS > 1), and no
+more runs are played at once than fit in --cpus.
+Run it from AI_GENETIC_AGENT, like runme.py:
+    python3 GeneticAgent/sweep.py --param POP_SIZE=12,100 --param MUTATION_RATE=0.05,0.1 --target 2.5
+    python3 GeneticAgent/sweep.py --param MUTATION_RATE=0.005:0.2 --param FITTEST_AMOUNT=4:12 --random 20
+The results are read from the logs of the run's population (those of the islands, given NUM_ISLANDS > 1, are not).
+"""
+import os
+import sys
+import csv
+import time
+import runpy
+import random
+import argparse
+import itertools
+import traceback
+import multiprocessing
+
+sys.path.append(os.getcwd())
+
+SWEPT = ["POP_SIZE", "MUTATION_RATE", "FITTEST_AMOUNT", "NUM_GENERATIONS", "MUTATION_RATE_MULTIPLIER"]
+RUNME_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runme.py")
+SUMMARY_HEADER = ["Run", "Seed", "Status", "Final fitness", "Segments learned", "Seconds", "Evaluations",
+                  "Evaluations to target"]
+
+
+def parse_param(spec):
+    """
+    :param spec: NAME=v1,v2,... (the values of a grid, or to choose from) or NAME=low:high (a range to draw from).
+    :return: The name and either the list of values or the (low, high) range.
+    """
+    name, _, values = spec.partition("=")
+    if name not in SWEPT:
+        raise ValueError("Can not sweep " + name + ", only " + ", ".join(SWEPT))
+
+    def number(text):
+        return float(text) if any(char in text for char in ".e") else int(text)
+
+    if ":" in values:
+        low, high = values.split(":")
+        return name, (number(low), number(high))
+    return name, [number(value) for value in values.split(",")]
+
+
+def search_space(params, num_random, rng):
+    """
+    :param params: dict of name -> list of values or (low, high) range, see parse_param.
+    :param num_random: The amount of configurations to draw, or None for the whole grid.
+    :return: list of configurations, dicts of name -> value.
+    """
+    if num_random is None:
+        if any(isinstance(values, tuple) for values in params.values()):
+            raise ValueError("A grid takes lists of values, ranges are drawn from by --random only")
+        return [dict(zip(params, values)) for values in itertools.product(*params.values())]
+
+    def draw(values):
+        if isinstance(values, list):
+            return values[rng.randrange(len(values))]
+        low, high = values
+        if isinstance(low, int) and isinstance(high, int):
+            return rng.randint(low, high)
+        return rng.uniform(low, high)
+
+    return [{name: draw(values) for name, values in params.items()} for _ in range(num_random)]
+
+
+def read_run(log_directory, target):
+    """
+    :return: The highest fitness of the last logged generation, the amount of segments learned, the games played and
+             the games played until a generation first had an individual of fitness target (or None) of a run.
+    """
+    highest = dict()  # (segment, generation) -> highest fitness
+    segment = 0
+    while os.path.exists(os.path.join(log_directory, "segment_" + str(segment) + ".csv")):
+        with open(os.path.join(log_directory, "segment_" + str(segment) + ".csv"), newline='') as f:
+            for row in csv.DictReader(f):
+                key = (segment, int(row["Generation"]))
+                highest[key] = max(highest.get(key, 0.0), float(row["Fitness"]))
+        segment += 1
+
+    evaluations = 0
+    evaluations_to_target = None
+    timing_path = os.path.join(log_directory, "timing.csv")
+    if os.path.exists(timing_path):
+        with open(timing_path, newline='') as f:
+            for row in csv.DictReader(f):
+                evaluations += int(row["games"])
+                key = (int(row["Segment"]), int(row["Generation"]))
+                if evaluations_to_target is None and target is not None and highest.get(key, 0.0) >= target:
+                    evaluations_to_target = evaluations
+
+    with open(os.path.join(log_directory, "run.log")) as f:
+        failed = "The run terminated because" in f.read()
+    learned = segment - 1 if failed else segment
+    final_fitness = highest[max(highest)] if highest else None
+    return final_fitness, learned, evaluations, evaluations_to_target
+
+
+def run_configuration(run_idx, configuration, seed, run_directory, workers, run_file, sim_file, target):
+    """
+    Learns with a configuration, in a process of its own (which has to import the config anew, so it is made for a
+    single run) and in the working directory run_directory, and writes the output of the run to output.log in it.
+    :return: The row of the run in the summary table.
+    """
+    os.makedirs(os.path.join(run_directory, "Logger"))
+    os.chdir(run_directory)
+    output = os.open("output.log", os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+    os.dup2(output, sys.stdout.fileno())
+    os.dup2(output, sys.stderr.fileno())
+
+    from GeneticAgent import config
+    config.RUN_FILE = run_file  # Made from the working directory of the sweep
+    config.SIM_FILE = sim_file
+    config.NUM_WORKERS = workers
+    config.TIMING = True  # The games of every generation are read from timing.csv
+    for name, value in configuration.items():
+        setattr(config, name, value)
+    config.FITTEST_AMOUNT = min(config.FITTEST_AMOUNT, config.POP_SIZE)
+    config.SURROGATE_MIN_SAMPLES = 2 * config.POP_SIZE
+    config.RANDOM_SEED = seed
+
+    status = "done"
+    start = time.perf_counter()
+    try:
+        sys.argv = [RUNME_FILE, "learn"]
+        runpy.run_path(RUNME_FILE, run_name="__main__")
+    except Exception:
+        traceback.print_exc()
+        status = "failed"
+    seconds = time.perf_counter() - start
+    sys.stdout.flush()
+
+    log_directory = os.path.join(run_directory, "Logger", "run_logs.0")
+    final_fitness, learned, evaluations, evaluations_to_target = None, 0, 0, None
+    if os.path.exists(os.path.join(log_directory, "run.log")):
+        final_fitness, learned, evaluations, evaluations_to_target = read_run(log_directory, target)
+
+    return [run_idx, seed, status, final_fitness, learned, round(seconds, 3), evaluations, evaluations_to_target] + \
+           [configuration[name] for name in configuration]
+
+
+def run_configuration_star(run):
+    return run_configuration(*run)
+
+
+def create_sweep_directory(path):
+    i = 0
+    while os.path.exists(path + "." + str(i)):
+        i += 1
+    os.makedirs(path + "." + str(i))
+    return path + "." + str(i)
+
+
+def run_cpus(workers, num_islands, speculative_workers):
+    """
+    :return: The CPUs a run uses: its workers, which are shared by its islands (every island is a process that plays
+             on one worker at least, see run_island), and its speculative workers (single island runs only).
+    """
+    if num_islands > 1:
+        return max(workers, num_islands)
+    return workers + speculative_workers
+
+
+def print_table(header, rows):
+    cells = [[str(value) for value in row] for row in [header] + rows]
+    widths = [max(len(row[column]) for row in cells) for column in range(len(header))]
+    for row in cells:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+
+
+def main():
+    from GeneticAgent import config
+
+    parser = argparse.ArgumentParser(description="Sweep the genetic parameters of the genetic agent.")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUES",
+                        help="a parameter to sweep and its values (v1,v2,...), or range (low:high) given --random; "
+                             "one of " + ", ".join(SWEPT))
+    parser.add_argument("--random", type=int, metavar="N", help="draw N configurations instead of the whole grid")
+    parser.add_argument("--repeats", type=int, default=1, help="runs of every configuration")
+    parser.add_argument("--seed", type=int, help="seed of the draws and of the runs (run r of a configuration is "
+                                                 "seeded with seed + r), unseeded by default")
+    parser.add_argument("--target", type=float, help="the fitness whose evaluations-to-target are summarized")
+    parser.add_argument("--cpus", type=int, default=os.cpu_count() or 1, help="the CPUs the sweep may use")
+    parser.add_argument("--workers", type=int, default=1, help="the processes every run plays its games on")
+    parser.add_argument("--directory", default=os.path.abspath("sweep"),
+                        help="where the working directories of the runs are made (under <directory>.<i>)")
+    args = parser.parse_args()
+
+    try:
+        params = dict(parse_param(spec) for spec in args.param)
+        configurations = search_space(params, args.random, random.Random(args.seed))
+    except ValueError as error:
+        parser.error(str(error))
+    if not params:
+        parser.error("nothing to sweep, see --param")
+
+    processes = max(1, args.cpus // run_cpus(args.workers, config.NUM_ISLANDS, config.SPECULATIVE_WORKERS))
+    directory = create_sweep_directory(args.directory)
+    runs = [(run_idx, configuration, None if args.seed is None else args.seed + repeat,
+             os.path.join(directory, "run_" + str(run_idx)), args.workers, config.RUN_FILE, config.SIM_FILE,
+             args.target)
+            for run_idx, (configuration, repeat) in enumerate(itertools.product(configurations,
+                                                                                range(args.repeats)))]
+    print("Sweeping " + str(len(runs)) + " runs, " + str(processes) + " at once, under " + directory)
+
+    rows = list()
+    context = multiprocessing.get_context("spawn")  # So every run imports the config anew
+    with context.Pool(processes, maxtasksperchild=1) as pool:
+        for row in pool.imap_unordered(run_configuration_star, runs):
+            rows.append(row)
+            print("Run {} {} in {}s - final fitness: {}".format(row[0], row[2], row[5], row[3]))
+
+    header = SUMMARY_HEADER + list(params)
+    rows.sort(key=lambda row: (row[3] is None, -(row[3] or 0), row[0]))  # The fittest first
+    with open(os.path.join(directory, "sweep.csv"), 'w', newline='') as f:
+        write = csv.writer(f)
+        write.writerow(header)
+        write.writerows(rows)
+    print_table(header, rows)
+    print("Saved to " + os.path.join(directory, "sweep.csv"))
+
+
+if __name__ == '__main__':
+    main()
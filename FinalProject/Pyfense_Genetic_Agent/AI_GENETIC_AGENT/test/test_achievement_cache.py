@@ -0,0 +1,101 @@
+"""
+Test the cache of the achievements of played genomes.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from GeneticAgent.achievement_cache import AchievementCache, game_files_hash
+
+
+class TestAchievementCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = AchievementCache(max_size=2, path=None)
+        cache.put({"a": [1, 15, 0, 0], "b": [2, 14, 0, 0]})
+        self.assertEqual(cache.get("a"), [1, 15, 0, 0])
+        cache.put({"c": [3, 13, 0, 0]})
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), [1, 15, 0, 0])
+        self.assertEqual(cache.get("c"), [3, 13, 0, 0])
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_sqlite_file_persists_across_caches(self):
+        path = os.path.join(self.directory, "achievements.db")
+        cache = AchievementCache(max_size=1, path=path)
+        cache.put({"a": [1, 15, 0, 0], "b": [2, 14, 10, 5]})
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get("a"), [1, 15, 0, 0])  # evicted, on file
+        cache.close()
+
+        other = AchievementCache(path=path)
+        self.assertEqual(other.get("a"), [1, 15, 0, 0])
+        self.assertEqual(other.get("b"), [2, 14, 10, 5])
+        self.assertIsNone(other.get("c"))
+        other.close()
+
+    def test_threads_share_cache(self):
+        cache = AchievementCache(max_size=10, path=os.path.join(
+            self.directory, "achievements.db"))
+
+        def play(thread):
+            for game in range(20):
+                key = str(thread) + "-" + str(game)
+                cache.put({key: [thread, game, 0, 0]})
+                self.assertEqual(cache.get(key), [thread, game, 0, 0])
+
+        threads = [threading.Thread(target=play, args=(thread,))
+                   for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.hits, 80)
+        self.assertEqual(cache.get("3-0"), [3, 0, 0, 0])  # from the file
+        cache.close()
+
+    def test_key_separates_lives_and_init_wave(self):
+        genome_string = "-- 11 --"
+        key = AchievementCache.key(genome_string, 15, 1)
+        self.assertEqual(key, AchievementCache.key(genome_string, 15, 1))
+        self.assertNotEqual(key, AchievementCache.key(genome_string, 14, 1))
+        self.assertNotEqual(key, AchievementCache.key(genome_string, 15, 10))
+        self.assertNotEqual(key, AchievementCache.key("-- 12 --", 15, 1))
+
+    def write_game(self, directory, files):
+        for name, contents in files.items():
+            path = os.path.join(directory, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(contents)
+        return os.path.join(directory, "simulation.py")
+
+    def test_game_files_hash_follows_contents(self):
+        files = {"simulation.py": "run", "entities.py": "towers",
+                 os.path.join("data", "waves.cfg"): "waves",
+                 "notes.txt": "not part of the game"}
+        run_file = self.write_game(os.path.join(self.directory, "a"), files)
+        digest = game_files_hash(run_file)
+        moved = self.write_game(os.path.join(self.directory, "b"), files)
+        self.assertEqual(game_files_hash(moved), digest)
+
+        for index, name in enumerate(files):
+            changed = dict(files)
+            changed[name] += " changed"
+            changed_file = self.write_game(
+                os.path.join(self.directory, str(index)), changed)
+            if name.endswith(".txt"):
+                self.assertEqual(game_files_hash(changed_file), digest)
+            else:
+                self.assertNotEqual(game_files_hash(changed_file), digest,
+                                    msg=name)
+
+
+if __name__ == '__main__':
+    unittest.main()
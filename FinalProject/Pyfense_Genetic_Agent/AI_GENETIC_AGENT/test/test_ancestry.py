@@ -0,0 +1,73 @@
+"""
+Test the ancestry store.
+"""
+import copy
+import unittest
+
+import numpy as np
+
+from GeneticAgent.ancestry import AncestryStore, NO_ANCESTOR
+from GeneticAgent.individual import Individual
+from GeneticAgent.config import GENOME_SIZE, START_OF_GAME_MONEY, EMPTY_GENOME
+
+
+def append(store, parent, code, generation=0):
+    return store.append(code, parent, np.full(GENOME_SIZE, code), 100 * code,
+                        code, generation)
+
+
+class TestAncestryStore(unittest.TestCase):
+    def setUp(self):
+        self.store = AncestryStore(capacity=1)
+        self.shared = append(self.store, NO_ANCESTOR, 1, generation=-1)
+        self.start = len(self.store)
+
+    def genomes(self, store, row):
+        return [int(store.codes[r][0]) for r in store.lineage(row)]
+
+    def test_merge(self):
+        island = copy.deepcopy(self.store)
+        row = append(island, append(island, self.shared, 2), 3)
+        append(self.store, self.shared, 4)
+
+        row_of = self.store.merge(island.rows_since(self.start), self.start)
+        self.assertEqual(row_of(self.shared), self.shared)
+        self.assertEqual(row_of(NO_ANCESTOR), NO_ANCESTOR)
+        self.assertEqual(self.genomes(self.store, row_of(row)), [3, 2])
+        self.assertEqual(self.store.get(row_of(row)).get_money(), 300)
+
+    def test_cross_island_individual(self):
+        sender = copy.deepcopy(self.store)
+        receiver = copy.deepcopy(self.store)
+        # Both islands add ancestors at the same rows:
+        append(receiver, self.shared, 5)
+        row = append(sender, append(sender, self.shared, 2), 3)
+
+        emigrant = Individual(START_OF_GAME_MONEY, 0,
+                              genome=EMPTY_GENOME.copy())
+        emigrant.ancestor_row = row
+        rows, entries = sender.lineage_since([row, row], self.start)
+        self.assertEqual(rows, [1, 2])
+
+        row_of = receiver.adopt(rows, entries, self.start)
+        emigrant.ancestor_row = row_of(emigrant.ancestor_row)
+        self.assertEqual(self.genomes(receiver, emigrant.ancestor_row),
+                         [3, 2])
+        self.assertEqual(len(receiver), self.start + 3)
+
+        # The receiving island returns the immigrant to the run's store:
+        row_of = self.store.merge(receiver.rows_since(self.start), self.start)
+        ancestor = self.store.get(row_of(emigrant.ancestor_row))
+        self.assertEqual(ancestor.get_genome().codes[0], 3)
+        self.assertEqual(ancestor.get_ancestor().get_genome().codes[0], 2)
+        self.assertEqual(ancestor.get_ancestor().get_ancestor().id, 1)
+        row = row_of(emigrant.ancestor_row)
+        self.assertEqual(self.genomes(self.store, row), [3, 2])
+
+    def test_lineage_since_shared_rows(self):
+        self.assertEqual(self.store.lineage_since([self.shared, NO_ANCESTOR],
+                                                  self.start)[0], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
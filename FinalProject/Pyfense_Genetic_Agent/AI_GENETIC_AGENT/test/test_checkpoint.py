@@ -0,0 +1,133 @@
+"""
+Test that a run resumed from a checkpoint learns what it would have learned
+without stopping.
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+import numpy as np
+
+from GeneticAgent.GeneticAlgorithm import GeneticAlgorithm
+from GeneticAgent.ancestry import AncestryStore
+from GeneticAgent.checkpoint import Checkpointer
+from GeneticAgent.individual import Individual
+from GeneticAgent.random_streams import RandomStreams
+from GeneticAgent.config import NUM_GENERATIONS
+
+
+class Crash(Exception):
+    pass
+
+
+class HashEvaluator:
+    """
+    Answers every game with an achievement made from its genome and lives, and
+    crashes on the crash_at-th generation it plays.
+    """
+
+    def __init__(self, crash_at=None):
+        self.crash_at = crash_at
+        self.played = 0
+
+    def evaluate(self, genomes, init_wave, num_waves, gen_num, packed=None):
+        if self.played == self.crash_at:
+            raise Crash()
+        self.played += 1
+
+        achievements = dict()
+        for ind_id, (genome_string, lives, *_) in genomes.items():
+            digest = zlib.crc32((genome_string + str(lives)).encode())
+            achievements[str(ind_id)] = [
+                init_wave + num_waves, 1 + digest % lives,
+                digest % 500, digest % 300]
+        return achievements
+
+
+class RecordingCheckpointer(Checkpointer):
+    """
+    A Checkpointer that also keeps what the state was at every save.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.saved = list()
+
+    def save(self, ga=None):
+        super().save(ga)
+        self.saved.append(snapshot(ga))
+
+
+def snapshot(ga):
+    ancestry = Individual.ancestry
+    # The np stream of unseeded streams is seeded from random when first used
+    np_stream = None if ga.streams.seed_sequence is None else \
+        ga.streams.np.bit_generator.state
+    return (random.getstate(), np.random.get_state()[1].tolist(),
+            ga.streams.py.getstate(), np_stream,
+            Individual.current_id, Individual.current_gen,
+            [array[:len(ancestry)].tolist() for array in
+             [ancestry.ids, ancestry.parents, ancestry.codes,
+              ancestry.money, ancestry.lives, ancestry.generations]])
+
+
+def outcome(fittest):
+    return [(individual.get_id(), individual.encode_genome_to_string(),
+             individual.get_fitness()) for individual in fittest]
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        counters = (Individual.current_id, Individual.current_gen,
+                    Individual.ancestry)
+        self.addCleanup(self.restore, *counters)
+
+    @staticmethod
+    def restore(current_id, current_gen, ancestry):
+        Individual.current_id, Individual.current_gen = current_id, current_gen
+        Individual.ancestry = ancestry
+
+    def start(self, seed, evaluator, name):
+        random.seed(1)
+        np.random.seed(1)
+        self.restore(0, -1, AncestryStore())
+        checkpointer = RecordingCheckpointer(
+            os.path.join(self.directory, name + ".pkl.gz"))
+        ga = GeneticAlgorithm(1, 0, mock.Mock(), evaluator=evaluator,
+                              checkpointer=checkpointer,
+                              streams=RandomStreams.from_seed(seed))
+        return ga, checkpointer
+
+    def test_resumed_run_continues_like_uninterrupted_run(self):
+        for seed in [None, 7]:
+            with self.subTest(seed=seed):
+                ga, expected = self.start(seed, HashEvaluator(), "full")
+                fittest = outcome(ga.run())
+                self.assertEqual(len(expected.saved), NUM_GENERATIONS)
+
+                crash_at = NUM_GENERATIONS - 1  # after checkpoint crash_at-1
+                ga, checkpointer = self.start(seed, HashEvaluator(crash_at),
+                                              "crashed")
+                with self.assertRaises(Crash):
+                    ga.run()
+
+                # The state of another process, before it loads:
+                random.seed(2)
+                np.random.seed(2)
+                self.restore(5, 9, AncestryStore())
+                ga = checkpointer.load()["ga"]
+                self.assertEqual(snapshot(ga), expected.saved[crash_at - 1])
+
+                ga.resume(mock.Mock(), HashEvaluator(), None, checkpointer)
+                self.assertEqual(outcome(ga.run()), fittest)
+                self.assertEqual(checkpointer.saved[-1], expected.saved[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Test the batch mutation.
+"""
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from GeneticAgent.GeneticAlgorithm import GeneticAlgorithm
+from GeneticAgent.individual import Individual, MUTATION_THRESHOLDS, \
+    MUTATION_RESULTS, MUTATION_COSTS
+from GeneticAgent.genetic_resources import TowerType, TowerLevel, GeneView, \
+    NUM_GENE_CODES
+from GeneticAgent.random_streams import RandomStreams
+from GeneticAgent.config import GENOME_SIZE, EMPTY_GENOME
+
+
+class TestMutationTables(unittest.TestCase):
+    def test_tables_follow_change_tower_under_constrains(self):
+        # Every threshold, and the money just around it:
+        thresholds = MUTATION_THRESHOLDS[np.isfinite(MUTATION_THRESHOLDS)]
+        money_grid = np.unique(np.concatenate(
+            ([0, 10 ** 6], thresholds, thresholds - 1, thresholds + 1)))
+        money_grid = money_grid[money_grid >= 0]
+        individual = Individual(0, 0, genome=EMPTY_GENOME.copy())
+
+        for code in range(NUM_GENE_CODES):
+            for type_idx, tower_type in enumerate(TowerType):
+                for level in TowerLevel:
+                    for money in money_grid:
+                        codes = np.array([code], dtype=np.uint8)
+                        individual.money = money
+                        individual.change_tower_under_constrains(
+                            GeneView(codes, 0), tower_type, level)
+
+                        settled = (MUTATION_THRESHOLDS[code, type_idx,
+                                                       level.value]
+                                   <= money).sum()
+                        args = (code, tower_type, level, money)
+                        self.assertEqual(
+                            MUTATION_RESULTS[code, type_idx, settled],
+                            codes[0], args)
+                        self.assertAlmostEqual(
+                            MUTATION_COSTS[code, type_idx, settled],
+                            money - individual.money, msg=args)
+
+
+class TestMutateBatch(unittest.TestCase):
+    def setUp(self):
+        self.ga = GeneticAlgorithm(1, 0, mock.Mock(),
+                                   streams=RandomStreams.from_seed(0))
+
+    def test_money_is_never_negative(self):
+        rng = np.random.default_rng(1)
+        babies = list()
+        for money in [0, 1, 49, 50, 120, 500, 2000] * 10:
+            baby = Individual(money, 0, genome=EMPTY_GENOME.copy())
+            baby.genome.codes[:] = rng.integers(NUM_GENE_CODES,
+                                                size=GENOME_SIZE)
+            babies.append(baby)
+        before = [baby.get_genome().copy() for baby in babies]
+
+        self.ga.mutate_batch(babies, 5)
+        self.assertTrue(all(baby.get_money() >= 0 for baby in babies))
+        self.assertTrue(any((baby.get_genome().codes != genome.codes).any()
+                            for baby, genome in zip(babies, before)))
+
+
+if __name__ == '__main__':
+    unittest.main()
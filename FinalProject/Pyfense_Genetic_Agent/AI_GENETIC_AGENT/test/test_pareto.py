@@ -0,0 +1,107 @@
+"""
+Test the NSGA-II sorting, against brute force.
+"""
+import unittest
+
+import numpy as np
+
+from GeneticAgent.pareto import non_dominated_sort, crowding_distance, \
+    pareto_order
+
+
+def brute_ranks(points):
+    ranks = np.full(len(points), -1)
+    left = set(range(len(points)))
+    rank = 0
+    while left:
+        front = [i for i in left
+                 if not any(np.all(points[j] >= points[i]) and
+                            np.any(points[j] > points[i])
+                            for j in left if j != i)]
+        for i in front:
+            ranks[i] = rank
+            left.discard(i)
+        rank += 1
+    return ranks
+
+
+def brute_crowding(points, ranks):
+    distances = np.zeros(len(points))
+    for rank in set(ranks):
+        front = np.flatnonzero(ranks == rank)
+        for objective in range(points.shape[1]):
+            order = front[np.argsort(points[front, objective])]
+            values = points[order, objective]
+            distances[order[0]] = distances[order[-1]] = np.inf
+            span = values[-1] - values[0]
+            for k in range(1, len(order) - 1):
+                if span > 0:
+                    distances[order[k]] += (values[k + 1] - values[k - 1]) \
+                        / span
+    return distances
+
+
+class TestPareto(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_ranks(self):
+        for trial in range(100):
+            points = self.rng.random((self.rng.integers(1, 40),
+                                      self.rng.integers(1, 5)))
+            np.testing.assert_array_equal(non_dominated_sort(points),
+                                          brute_ranks(points))
+
+    def test_ranks_with_ties(self):
+        for trial in range(100):
+            points = self.rng.integers(0, 4, size=(self.rng.integers(1, 40),
+                                                   self.rng.integers(1, 5)))
+            points = points.astype(float)
+            np.testing.assert_array_equal(non_dominated_sort(points),
+                                          brute_ranks(points))
+
+    def test_duplicates_share_their_front(self):
+        points = np.array([[1, 2], [2, 1], [1, 2], [0, 0], [0, 0], [2, 1]],
+                          dtype=float)
+        np.testing.assert_array_equal(non_dominated_sort(points),
+                                      [0, 0, 0, 1, 1, 0])
+
+    def test_empty(self):
+        points = np.zeros((0, 4))
+        self.assertEqual(len(non_dominated_sort(points)), 0)
+        self.assertEqual(len(crowding_distance(points, np.zeros(0, int))), 0)
+        self.assertEqual(len(pareto_order(points)), 0)
+
+    def test_single_front(self):
+        x = self.rng.permutation(20).astype(float)
+        points = np.column_stack((x, 19 - x))
+        ranks = non_dominated_sort(points)
+        np.testing.assert_array_equal(ranks, np.zeros(20))
+
+        distances = crowding_distance(points, ranks)
+        np.testing.assert_allclose(distances, brute_crowding(points, ranks))
+        self.assertEqual(set(np.flatnonzero(np.isinf(distances))),
+                         {np.argmin(x), np.argmax(x)})
+
+    def test_crowding_distance(self):
+        for trial in range(50):
+            points = self.rng.random((self.rng.integers(1, 40),
+                                      self.rng.integers(1, 5)))
+            ranks = non_dominated_sort(points)
+            np.testing.assert_allclose(crowding_distance(points, ranks),
+                                       brute_crowding(points, ranks))
+
+    def test_pareto_order(self):
+        points = self.rng.integers(0, 4, size=(50, 3)).astype(float)
+        ranks = non_dominated_sort(points)
+        distances = crowding_distance(points, ranks)
+        order = pareto_order(points)
+        self.assertEqual(sorted(order), list(range(50)))
+        for first, second in zip(order, order[1:]):
+            self.assertLessEqual(ranks[first], ranks[second])
+            if ranks[first] == ranks[second]:
+                self.assertGreaterEqual(distances[first], distances[second])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Test playing the games of a population.
+"""
+import random
+import unittest
+
+from GeneticAgent.population import Population
+from GeneticAgent.individual import Individual
+from GeneticAgent.achievement_cache import AchievementCache
+from GeneticAgent.config import START_OF_GAME_MONEY, EMPTY_GENOME
+
+
+class ThreeLivesEvaluator:
+    """
+    Answers every game with an achievement that is left with 3 lives.
+    """
+
+    def __init__(self):
+        self.played = list()
+
+    def evaluate(self, genomes, init_wave, num_waves, gen_num, packed=None):
+        self.played.append(genomes)
+        return {str(ind_id): [init_wave + num_waves, 3, 0, 0]
+                for ind_id in genomes}
+
+
+class TestPopulation(unittest.TestCase):
+    def setUp(self):
+        self.population = Population(0)
+        twin = Individual(START_OF_GAME_MONEY, 0, genome=EMPTY_GENOME.copy())
+        other = Individual(START_OF_GAME_MONEY, 0, rng=random.Random(0))
+        self.population.individuals = [
+            twin, Individual(START_OF_GAME_MONEY, 0,
+                             genome=EMPTY_GENOME.copy()), other]
+        for ind_id, individual in enumerate(self.population.individuals):
+            individual.id = ind_id
+        # The twins stop with 3 lives, the other game is played to its end:
+        self.min_lives = {0: 5, 1: 4, 2: 0}
+
+    def test_stopped_games_are_marked(self):
+        for cache in [None, AchievementCache(path=None)]:
+            with self.subTest(cache=cache):
+                evaluator = ThreeLivesEvaluator()
+                self.population.let_live(evaluator, cache, self.min_lives)
+                self.population.update()
+                self.assertEqual(self.population.stopped, {"0", "1"})
+                self.assertEqual([individual.is_stopped() for individual in
+                                  self.population.individuals],
+                                 [True, True, False])
+                if cache is not None:  # The twins are played once
+                    self.assertEqual(len(evaluator.played[0]), 2)
+                    self.assertEqual(len(cache), 1)
+
+    def test_games_without_min_lives_are_not_stopped(self):
+        self.population.let_live(ThreeLivesEvaluator())
+        self.population.update()
+        self.assertEqual(self.population.stopped, set())
+        self.assertFalse(any(individual.is_stopped() for individual in
+                             self.population.individuals))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Test the random streams of a run.
+"""
+import pickle
+import random
+import unittest
+
+from GeneticAgent.random_streams import RandomStreams
+
+
+def draw(streams, amount=5):
+    return ([streams.py.random() for _ in range(amount)],
+            streams.np.integers(1000, size=amount).tolist())
+
+
+class TestRandomStreams(unittest.TestCase):
+    def test_same_seed_draws_the_same(self):
+        self.assertEqual(draw(RandomStreams.from_seed(3)),
+                         draw(RandomStreams.from_seed(3)))
+        self.assertNotEqual(draw(RandomStreams.from_seed(3)),
+                            draw(RandomStreams.from_seed(4)))
+
+    def test_pickling_keeps_the_position(self):
+        streams = RandomStreams.from_seed(3)
+        draw(streams)
+        copy = pickle.loads(pickle.dumps(streams))
+        self.assertEqual(draw(copy), draw(streams))
+
+    def test_unseeded_streams_draw_from_random(self):
+        streams = RandomStreams.from_seed(None)
+        self.assertIs(streams.py, random)
+        random.seed(5)
+        drawn = draw(streams)
+        random.seed(5)
+        self.assertEqual(draw(RandomStreams()), drawn)
+        self.assertIs(pickle.loads(pickle.dumps(streams)).py, random)
+
+    def test_spawned_streams_are_independent_and_reproduced(self):
+        children = RandomStreams.from_seed(3).spawn(3)
+        again = RandomStreams.from_seed(3).spawn(3)
+        self.assertEqual([draw(child) for child in children],
+                         [draw(child) for child in again])
+
+        children = RandomStreams.from_seed(3).spawn(3)
+        drawn = [draw(child) for child in children]
+        self.assertEqual(len(set(map(repr, drawn))), 3)
+        # Drawing from one child does not move the others:
+        children = RandomStreams.from_seed(3).spawn(3)
+        draw(children[0], 100)
+        self.assertEqual(draw(children[1]), drawn[1])
+        self.assertNotEqual(draw(RandomStreams.from_seed(3)), drawn[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Test the validation and repair of bred genomes.
+"""
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from GeneticAgent.GeneticAlgorithm import GeneticAlgorithm
+from GeneticAgent.individual import Individual
+from GeneticAgent.genetic_resources import NUM_GENE_CODES
+from GeneticAgent.random_streams import RandomStreams
+from GeneticAgent.config import GENOME_SIZE, EMPTY_GENOME
+
+
+class TestRepair(unittest.TestCase):
+    def setUp(self):
+        self.ga = GeneticAlgorithm(1, 0, mock.Mock(),
+                                   streams=RandomStreams.from_seed(0))
+        rng = np.random.default_rng(2)
+        self.ga.ancestors = list()
+        for money, towers in [(0, 0), (150, 0), (400, 20), (900, 60)]:
+            ancestor = Individual(money, 0, genome=EMPTY_GENOME.copy())
+            genes = rng.choice(GENOME_SIZE, towers, replace=False)
+            ancestor.genome.codes[genes] = rng.integers(1, NUM_GENE_CODES,
+                                                        size=towers)
+            self.ga.ancestors.append(ancestor)
+
+        # Genomes full of towers, which no ancestor can afford, and ones with
+        # a few cheap towers, which some can:
+        self.babies = list()
+        for towers in [GENOME_SIZE] * 10 + [1, 2, 3] * 5:
+            genome = EMPTY_GENOME.copy()
+            genes = rng.choice(GENOME_SIZE, towers, replace=False)
+            genome.codes[genes] = rng.integers(1, NUM_GENE_CODES if towers ==
+                                               GENOME_SIZE else 3, size=towers)
+            self.babies.append(genome)
+
+        self.money = np.array([ancestor.get_money()
+                               for ancestor in self.ga.ancestors])
+        self.affordable = (self.money - self.ga.evolution_costs(
+            self.babies, [ancestor.get_genome()
+                          for ancestor in self.ga.ancestors]) >= 0).any(axis=1)
+        self.assertTrue(self.affordable.any())
+        self.assertFalse(self.affordable.all())
+
+    def test_unaffordable_babies_are_repaired(self):
+        before = [genome.copy() for genome in self.babies]
+        validated = self.ga.validate_genomes(self.babies, repair=True)
+
+        for genome, old, affordable, (is_valid, ancestor, money) in zip(
+                self.babies, before, self.affordable, validated):
+            self.assertTrue(is_valid)
+            cost = self.ga.evolution_costs([genome],
+                                           [ancestor.get_genome()])[0, 0]
+            self.assertLessEqual(cost, ancestor.get_money() + 1e-9)
+            self.assertAlmostEqual(money, ancestor.get_money() - cost)
+            if not affordable:
+                self.assertTrue((genome.codes != old.codes).any())
+
+    def test_affordable_babies_are_untouched(self):
+        babies = [genome for genome, affordable in
+                  zip(self.babies, self.affordable) if affordable]
+        before = [genome.copy() for genome in babies]
+        expected = self.ga.validate_genomes(babies)
+
+        self.assertEqual(self.ga.validate_genomes(babies, repair=True),
+                         expected)
+        for genome, old in zip(babies, before):
+            np.testing.assert_array_equal(genome.codes, old.codes)
+
+    def test_repair_genome_returns_the_cost(self):
+        parent = self.ga.ancestors[3]
+        for genome in self.babies:
+            for money in [0, 100, 1000]:
+                repaired = genome.copy()
+                cost = self.ga.repair_genome(repaired, parent.get_genome(),
+                                             money)
+                self.assertLessEqual(cost, money)
+                self.assertAlmostEqual(cost, self.ga.evolution_cost(
+                    repaired, parent.get_genome()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Test the steady-state genetic algorithm.
+"""
+import unittest
+from unittest import mock
+
+from GeneticAgent import steady_state
+from GeneticAgent.steady_state import SteadyStateGeneticAlgorithm
+from GeneticAgent.individual import Individual
+from GeneticAgent.config import POP_SIZE, NUM_GENERATIONS, \
+    START_OF_GAME_MONEY, EMPTY_GENOME
+
+
+class DyingEvaluator:
+    """
+    Answers every game, in order, with an achievement that has lost all its
+    lives.
+    """
+    workers = 2
+
+    def __init__(self):
+        self.submitted = list()
+
+    def submit(self, key, genome_string, lives, init_wave, num_waves,
+               min_lives=None):
+        self.submitted.append((key, min_lives))
+
+    def next_result(self):
+        key, _ = self.submitted.pop(0)
+        return key, [2, 0, 0, 0]
+
+
+class TestSteadyState(unittest.TestCase):
+    def setUp(self):
+        self.evaluator = DyingEvaluator()
+        self.ga = SteadyStateGeneticAlgorithm(1, 0, mock.Mock(), None,
+                                              self.evaluator)
+
+    def make_individual(self):
+        return Individual(START_OF_GAME_MONEY, 0, genome=EMPTY_GENOME.copy(),
+                          ancestor=self.ga.ancestors[0])
+
+    def test_insert_replaces_least_fit(self):
+        self.ga.population.individuals = list()
+        for earned in range(POP_SIZE):
+            self.ga.insert(self.make_individual(), [10, 15, 0, 10 * earned])
+        individuals = list(self.ga.population.individuals)
+        least_fit = min(individuals, key=lambda ind: ind.get_fitness())
+
+        fitter = self.make_individual()
+        self.ga.insert(fitter, [10, 15, 0, 1000])
+        self.assertEqual(len(self.ga.population.individuals), POP_SIZE)
+        self.assertIn(fitter, self.ga.population.individuals)
+        self.assertNotIn(least_fit, self.ga.population.individuals)
+
+        dead = self.make_individual()
+        self.ga.insert(dead, [2, 0, 0, 0])
+        self.assertNotIn(dead, self.ga.population.individuals)
+        self.assertEqual(self.ga.num_played, POP_SIZE + 2)
+
+    def test_run_stops_without_fit_individuals(self):
+        # Nothing can be bred once the initial population has died:
+        self.assertEqual(self.ga.run(), [])
+        self.assertEqual(self.ga.num_played, POP_SIZE)
+        self.assertLess(self.ga.num_played, NUM_GENERATIONS * POP_SIZE)
+        self.assertEqual(self.evaluator.submitted, [])
+
+    def test_games_are_played_with_min_lives(self):
+        self.ga.population.individuals = list()
+        for earned in range(POP_SIZE):
+            self.ga.insert(self.make_individual(), [10, 15, 0, 10 * earned])
+
+        with mock.patch.object(steady_state, "PRUNE_FRACTION", 1):
+            self.ga.start(self.make_individual())
+        self.assertGreater(self.evaluator.submitted[-1][1], 0)
+
+        self.ga.start(self.make_individual())
+        self.assertIsNone(self.evaluator.submitted[-1][1])
+
+    def test_stopped_games_are_not_learned(self):
+        self.ga.surrogate = mock.Mock()
+        stopped = self.make_individual()
+        self.ga.insert(stopped, [5, 3, 0, 0], features="features",
+                       stopped=True)
+        self.assertTrue(stopped.is_stopped())
+        self.ga.surrogate.learn.assert_not_called()
+
+        finished = self.make_individual()
+        self.ga.insert(finished, [10, 3, 0, 0], features="features")
+        self.assertFalse(finished.is_stopped())
+        self.ga.surrogate.learn.assert_called_once_with(
+            "features", [finished.get_fitness()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+"""
+Test the surrogate of the fitness.
+"""
+import copy
+import unittest
+
+import numpy as np
+
+from GeneticAgent.surrogate import Surrogate, NUM_FEATURES
+
+
+class TestSurrogate(unittest.TestCase):
+    def test_merge_learns_what_the_copies_learned(self):
+        rng = np.random.default_rng(0)
+        batches = [(rng.random((5, NUM_FEATURES)), rng.random(5))
+                   for _ in range(4)]
+
+        expected = Surrogate(min_samples=0)
+        for features, fitness in batches:
+            expected.learn(features, fitness)
+
+        merged = Surrogate(min_samples=0)
+        merged.learn(*batches[0])
+        base = copy.deepcopy(merged)
+        islands = [copy.deepcopy(merged), copy.deepcopy(merged)]
+        islands[0].learn(*batches[1])
+        islands[1].learn(*batches[2])
+        islands[1].learn(*batches[3])
+        for island in islands:
+            merged.merge(island, base)
+
+        self.assertEqual(merged.samples, expected.samples)
+        np.testing.assert_allclose(merged.gram, expected.gram)
+        np.testing.assert_allclose(merged.moments, expected.moments)
+        self.assertIsNone(merged.weights)
+
+
+if __name__ == '__main__':
+    unittest.main()
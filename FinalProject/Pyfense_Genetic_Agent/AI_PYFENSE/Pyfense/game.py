@@ -17,8 +17,7 @@ from Pyfense.highscore import PyFenseLost
 from Pyfense import tower
 from Pyfense import resources
 from Pyfense import highscore
-from Pyfense.resources import MIN_X, MAX_X, MIN_Y, MAX_Y, MAX_GENE_INDEX, START_OF_GAME_MONEY
-import copy
+from Pyfense.resources import START_OF_GAME_MONEY
 
 
 
@@ -44,6 +43,8 @@ class PyFenseGame(scene.Scene):
         self.gameGrid, \
         self.startTile, \
         self.endTile = resources.initGrid(resources.LEVEL)
+        # the cell of every gene, see resources.gene_cells:
+        self.geneCells = resources.gene_cells(resources.LEVEL)
 
         resources.load_waves()
         resources.load_entities()
@@ -88,72 +89,22 @@ class PyFenseGame(scene.Scene):
         gameGrid Matrix. Contains both the path for enemies and their health-
         bars, enemies rotate additionally to moving.
         """
-        currentTile = copy.deepcopy(self.startTile)
         # move[0] for enemy with rotation and move[1] for healthbar
         move = [[], []]
         pos = self._get_pixel_coords_from_position(self.startTile)
 
-        while (currentTile[0] != self.endTile[0] or
-               currentTile[1] != self.endTile[1]):
-
-            # Right
-            if (self.gameGrid[currentTile[0]][currentTile[1] + 1] == 2):
-                # Rotate right
-                move[0].append(actions.RotateTo(0, 0))
-                # move[1].append([])
-                # Move right
-                for j in range(1, 11):
-                    move[0].append((pos[0] + 6 * j, pos[1]))
-                    # move[1].append((6, 0))
-                # Next position
-                pos = (pos[0] + 60, pos[1])
-                currentTile[1] += 1
-                self.gameGrid[currentTile[0]][currentTile[1]] = 1
-
-            # Up
-            elif (self.gameGrid[currentTile[0] + 1][currentTile[1]] == 2):
-                # Rotate up
-                move[0].append(actions.RotateTo(270, 0))
-                # move[1].append([])
-                # Move up
-                for j in range(1, 11):
-                    move[0].append((pos[0], pos[1] + 6 * j))
+        for rotation, (row_step, column_step) in resources.trace_path(
+                self.gameGrid, self.startTile, self.endTile):
+            # Rotate towards the next cell
+            move[0].append(actions.RotateTo(rotation, 0))
+            # Move to the next cell in steps of 6 pixels
+            for j in range(1, 11):
+                move[0].append((pos[0] + 6 * j * column_step,
+                                pos[1] + 6 * j * row_step))
+                if row_step == 1:
                     move[1].append((0, 6))
-                # Next position
-                pos = (pos[0], pos[1] + 60)
-                currentTile[0] += 1
-                self.gameGrid[currentTile[0]][currentTile[1]] = 1
-
-            # Down
-            elif (self.gameGrid[currentTile[0] - 1][currentTile[1]] == 2):
-                # Rotate down
-                move[0].append(actions.RotateTo(90, 0))
-                # move[1].append([])
-                # Move down
-                for j in range(1, 11):
-                    move[0].append((pos[0], pos[1] - 6 * j))
-                    # move[1].append((0, -6))
-                # Next position
-                pos = (pos[0], pos[1] - 60)
-                currentTile[0] -= 1
-                self.gameGrid[currentTile[0]][currentTile[1]] = 1
-            # Left
-            elif (self.gameGrid[currentTile[0]][currentTile[1] - 1] == 2):
-                # Rotate left
-                move[0].append(actions.RotateTo(180, 0))  # RotateLeft
-                # move[1].append([])  # placeholder
-                # Move left
-                for j in range(1, 11):
-                    move[0].append((pos[0] - 6 * j, pos[1]))
-                    # move[1].append((-6, 0))
-                # Next position
-                pos = (pos[0] - 60, pos[1])
-                currentTile[1] -= 1
-                self.gameGrid[currentTile[0]][currentTile[1]] = 1
-
-            else:
-                break
-        self.gameGrid[self.startTile[0]][self.startTile[1]] = 1
+            # Next position
+            pos = (pos[0] + 60 * column_step, pos[1] + 60 * row_step)
         return move
 
     def _load_map(self):
@@ -328,48 +279,31 @@ class PyFenseGame(scene.Scene):
     def load_next_genome_to_grid(self):
         current_genome = self.genomes[self.curr_genome_num]
 
-        gene_index = 0
-
         # this is to enable us to spend more money then we have during changes:
         self.money += 250000  # i'll reduce currentCurrency the by 250000 after changes are made
 
-        for x_index in range(MIN_X, MAX_X + 1):
-            if gene_index > MAX_GENE_INDEX:
-                break
-
-            for y_index in range(MIN_Y, MAX_Y + 1):
-                if gene_index > MAX_GENE_INDEX:
-                    break
-
+        for gene, (x_index, y_index, x_pixel, y_pixel) in zip(current_genome, self.geneCells):
+            if gene.type != TowerType.NO_TOWER:
                 curr_tile = self.gameGrid[y_index][x_index]
+                curr_tile_kind = max(int((curr_tile - 100) / 10), -1)
+                curr_tile_level = max(int(curr_tile - 100 - curr_tile_kind*10), 1)
 
-                if curr_tile < 3:
-                    continue
-
-                if current_genome[gene_index].type != TowerType.NO_TOWER:
-                    curr_tile_kind = max(int((curr_tile - 100) / 10), -1)
-                    curr_tile_level = max(int(curr_tile - 100 - curr_tile_kind*10), 1)
-
-                    wanted_type = current_genome[gene_index].type.value
-                    wanted_level = current_genome[gene_index].level.value
-
-                    x_pixel, y_pixel = self._get_pixel_coords_from_position((y_index, x_index))
-
-                    if curr_tile_kind != wanted_type or (curr_tile_level > wanted_level):
-                        if curr_tile > 5:
-                            self.on_destroy_tower((x_pixel, y_pixel))
+                wanted_type = gene.type.value
+                wanted_level = gene.level.value
 
-                        self.on_build_tower(wanted_type, x_pixel, y_pixel)
-                        curr_tile_level = 1
+                if curr_tile_kind != wanted_type or (curr_tile_level > wanted_level):
+                    if curr_tile > 5:
+                        self.on_destroy_tower((x_pixel, y_pixel))
 
+                    self.on_build_tower(wanted_type, x_pixel, y_pixel)
+                    curr_tile_level = 1
 
-                    num_upgrades = wanted_level - curr_tile_level
 
-                    while num_upgrades > 0:
-                        self.on_upgrade_tower((x_pixel, y_pixel))
-                        num_upgrades -= 1
+                num_upgrades = wanted_level - curr_tile_level
 
-                gene_index += 1
+                while num_upgrades > 0:
+                    self.on_upgrade_tower((x_pixel, y_pixel))
+                    num_upgrades -= 1
 
         self.money -= 250000
 
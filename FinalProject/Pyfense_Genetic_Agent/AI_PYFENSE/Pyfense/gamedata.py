@@ -0,0 +1,164 @@
+"""
+Game data that does not need pyglet: the game constants, the parsing of the
+data/*.cfg files and the level grids. Shared by resources (which adds the
+images and sounds on top of it) and by the headless simulation.
+"""
+# game constant:
+START_OF_GAME_MONEY = 500
+INIT_WAVE = 1
+MAX_EARNINGS_PER_SEGMENT = 1160
+WAVES_PER_SEGMENT = 9
+GENOME_SIZE = 209
+MAX_GENE_INDEX = GENOME_SIZE - 1
+BOTTOM_LEFT_CORNER = (0, 2)
+TOP_RIGHT_CORNER = (17, 15)
+MAX_X = min(abs(TOP_RIGHT_CORNER[0]), 31)
+MAX_Y = min(abs(TOP_RIGHT_CORNER[1]), 17)
+MIN_X = min(abs(BOTTOM_LEFT_CORNER[0]), 31)
+MIN_Y = min(abs(BOTTOM_LEFT_CORNER[1]), 17)
+
+# game tweeks:
+SPEED_MULTIPLIER = 100
+DURATION_MULTIPLIER = 1 / SPEED_MULTIPLIER
+RANGE_MULTIPLIER = 0.8  # reduce ranged tower range
+LEVEL = 2
+
+import os
+import pickle
+import math
+import functools
+
+# Function that makes the filepath relative to the path of the package.
+# Load file with pathjoin('relative/path/to/fil.e')
+
+root = os.path.dirname(os.path.abspath(__file__))
+
+
+def pathjoin(relative_path):
+    return os.path.join(root, relative_path)
+
+
+def read_config(relative_path):
+    """
+    Evaluates every line of a data/*.cfg file that is neither empty nor a
+    comment.
+    :return: list of the dicts written in the file, in order.
+    """
+    entries = []
+    with open(pathjoin(relative_path)) as conf_file:
+        for line in conf_file:
+            if line.strip() == "" or line[0] == "#":
+                continue
+            entries.append(eval(line))
+    return entries
+
+
+def initGrid(lvl):
+    gameGrid = [[3 for x in range(32)] for x in range(18)]
+    startTile = [0, 0]
+    endTile = [0, 0]
+    if lvl == 1:
+        startTile = [8, 0]
+        endTile = [9, 31]
+        for i in range(1, 8):
+            gameGrid[8][i] = 2
+        for i in range(9, 15):
+            gameGrid[i][7] = 2
+        for i in range(8, 13):
+            gameGrid[14][i] = 2
+        for i in range(6, 14):
+            gameGrid[i][12] = 2
+        for i in range(13, 20):
+            gameGrid[6][i] = 2
+        for i in range(7, 10):
+            gameGrid[i][19] = 2
+        for i in range(20, 32):
+            gameGrid[9][i] = 2
+
+    elif lvl == 2:
+        startTile = [9, 0]
+        endTile = [13, 17]  # shahar
+        # endTile = [9, 31]
+        for i in range(1, 14):
+            gameGrid[9][i] = 2
+        for i in range(5, 10):
+            gameGrid[i][13] = 2
+        for i in range(13, 17):
+            gameGrid[5][i] = 2
+        for i in range(5, 14):
+            gameGrid[i][16] = 2
+        for i in range(16, 20):
+            gameGrid[13][i] = 2
+        for i in range(9, 14):
+            gameGrid[i][19] = 2
+        for i in range(19, 32):
+            gameGrid[9][i] = 2
+
+    elif lvl == "custom":
+        pathFile = open(pathjoin("data/path.cfg"), "rb")
+        gameGrid = pickle.load(pathFile)
+        startTile = [8, 0]
+        endTile = [9, 31]
+        pathFile.close()
+
+    return gameGrid, startTile, endTile
+
+
+# (rotation of the enemy, (row step, column step)) in the order the
+# pathfinding tries them: right, up, down, left
+PATH_DIRECTIONS = [(0, (0, 1)), (270, (1, 0)), (90, (-1, 0)), (180, (0, -1))]
+
+
+def trace_path(gameGrid, startTile, endTile):
+    """
+    Follows the pathfinding helper cells (2) of gameGrid from startTile to
+    endTile and marks every cell on the way as walkable (1).
+    :return: list of (rotation, (row step, column step)) tuples, one for
+             every cell the enemies walk into.
+    """
+    currentTile = list(startTile)
+    steps = []
+
+    while (currentTile[0] != endTile[0] or
+           currentTile[1] != endTile[1]):
+        for rotation, (row_step, column_step) in PATH_DIRECTIONS:
+            if (gameGrid[currentTile[0] + row_step]
+                        [currentTile[1] + column_step] == 2):
+                break
+        else:
+            break
+        steps.append((rotation, (row_step, column_step)))
+        currentTile[0] += row_step
+        currentTile[1] += column_step
+        gameGrid[currentTile[0]][currentTile[1]] = 1
+
+    gameGrid[startTile[0]][startTile[1]] = 1
+    return steps
+
+
+@functools.lru_cache(maxsize=None)
+def gene_cells(lvl):
+    """
+    The placement index of a level: the cells of the MIN_X..MAX_X,
+    MIN_Y..MAX_Y window of its grid that towers can be built on, column by
+    column, which are the cells of the genes of a genome, in order. The cells
+    of the path are never built on, so the index holds for the whole game.
+    :return: tuple of (x_index, y_index, x_pixel, y_pixel) tuples, one for
+             every gene.
+    """
+    gameGrid, startTile, endTile = initGrid(lvl)
+    trace_path(gameGrid, startTile, endTile)
+
+    cells = [(x_index, y_index, 30 + x_index * 60, 30 + y_index * 60)
+             for x_index in range(MIN_X, MAX_X + 1)
+             for y_index in range(MIN_Y, MAX_Y + 1)
+             if gameGrid[y_index][x_index] >= 3]
+    return tuple(cells[:MAX_GENE_INDEX + 1])
+
+
+def distance(a, b):
+    """
+    Calculate distance between two tuples.
+    """
+
+    return math.sqrt((b[0] - a[0]) ** 2 + (b[1] - a[1]) ** 2)
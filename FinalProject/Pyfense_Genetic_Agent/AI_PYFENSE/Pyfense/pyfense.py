@@ -30,7 +30,7 @@ from Pyfense import game
 from Pyfense import mapBuilder
 from Pyfense import highscore
 from Pyfense import resources
-from Pyfense.genetic_resources import Tower, TowerType, TowerLevel
+from Pyfense.genetic_resources import Tower, TowerType, TowerLevel, decode_genome_from_string
 
 font.add_directory(os.path.join(
     os.path.dirname(
@@ -653,21 +653,6 @@ def display_genome_from_string(string_genome):
 
     end_run()
 
-def decode_genome_from_string(string_genome):
-    genome = []
-    tower_encodings_list = string_genome.split()
-    for item in tower_encodings_list:
-        new_tower = Tower()
-
-        type_int = -1 if item[0] == '-' else int(item[0])
-
-        if type_int > 0:
-            new_tower.update(TowerType(type_int), TowerLevel(int(item[1])))
-
-        genome.append(new_tower)
-
-    return np.array(genome)
-
 def run_genomes(genome_dict, output_dict, init_wave, waves_number, generation):
 
     # run all individuals
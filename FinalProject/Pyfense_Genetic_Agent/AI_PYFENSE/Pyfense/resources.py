@@ -2,41 +2,18 @@
 Assets are loaded in this file and used throughout the
 application efficiently
 """
-# game constant:
-START_OF_GAME_MONEY = 500
-INIT_WAVE = 1
-MAX_EARNINGS_PER_SEGMENT = 1160
-WAVES_PER_SEGMENT = 9
-GENOME_SIZE = 209
-MAX_GENE_INDEX = GENOME_SIZE - 1
-BOTTOM_LEFT_CORNER = (0, 2)
-TOP_RIGHT_CORNER = (17, 15)
-MAX_X = min(abs(TOP_RIGHT_CORNER[0]), 31)
-MAX_Y = min(abs(TOP_RIGHT_CORNER[1]), 17)
-MIN_X = min(abs(BOTTOM_LEFT_CORNER[0]), 31)
-MIN_Y = min(abs(BOTTOM_LEFT_CORNER[1]), 17)
-
-# game tweeks:
-SPEED_MULTIPLIER = 100
-DURATION_MULTIPLIER = 1 / SPEED_MULTIPLIER
-RANGE_MULTIPLIER = 0.8  # reduce ranged tower range
-LEVEL = 2
-
 import pyglet
 import os
-import pickle
-import math
 
 # from GeneticAgent.config import *
 
-# Function that makes the filepath relative to the path of resources.
-# Load file with pathjoin('relative/path/to/fil.e')
-
-root = os.path.dirname(os.path.abspath(__file__))
-
-
-def pathjoin(relative_path):
-    return os.path.join(root, relative_path)
+from Pyfense.gamedata import (
+    START_OF_GAME_MONEY, INIT_WAVE, MAX_EARNINGS_PER_SEGMENT,
+    WAVES_PER_SEGMENT, GENOME_SIZE, MAX_GENE_INDEX, BOTTOM_LEFT_CORNER,
+    TOP_RIGHT_CORNER, MAX_X, MAX_Y, MIN_X, MIN_Y, SPEED_MULTIPLIER,
+    DURATION_MULTIPLIER, RANGE_MULTIPLIER, LEVEL)
+from Pyfense.gamedata import root, pathjoin, read_config, initGrid, trace_path, \
+    distance, gene_cells
 
 
 pyglet.resource.path.append(pathjoin('assets'))
@@ -80,110 +57,103 @@ def load_entities():
     tower.clear()
     enemy.clear()
     mine.clear()
-    with open(pathjoin("data/entities.cfg")) as conf_file:
-        for line in conf_file:
-            if line == "" or line[0] == "#":
-                continue
-
-            # Tower
-            elif line.find("tower':") != -1:
-                att_dict = eval(line)
-                towername = att_dict["tower"]
-                lvl = att_dict["lvl"]
-
-                # shahar/
-                att_dict['firerate'] *= SPEED_MULTIPLIER
-                att_dict['projectileSpeed'] *= SPEED_MULTIPLIER
-                att_dict['effectDuration'] *= DURATION_MULTIPLIER
-                if towername == 1:
-                    att_dict['range'] *= RANGE_MULTIPLIER
-                # /shahar
-
-                # ist tower schon vorhanden, ansonsten hinzufuegen
-                if towername not in tower:
-                    tower[towername] = {}
-                # ist level schon vorhanden, dann Fehlermeldung
-                if lvl in tower[towername]:
-                    print("Error: Level fuer diesen Turm bereits vorhanden")
-                    break
-                # ansonsten einfuegen der attribute in das dict
-                else:
-                    # Laden der Bilder
-                    try:
-                        att_dict["image"] = load_image(att_dict["image"])
-                    except FileNotFoundError:
-                        print("Error: Image not found: {}".format(
-                            att_dict["image"]))
-                    try:
-                        att_dict["projectileImage"] = load_image(
-                            att_dict["projectileImage"])
-                    except FileNotFoundError:
-                        print("Error: Image not found: {}".format(
-                            att_dict["image"]))
-                    tower[towername][lvl] = att_dict
-
-            # Enemy
-            elif line.find("enemy':") != -1:
-                att_dict = eval(line)
-                enemyname = att_dict["enemy"]
-                level = att_dict["lvl"]
-                # shahar/
-                att_dict['speed'] *= SPEED_MULTIPLIER
-                att_dict['duration'] *= DURATION_MULTIPLIER
-                # /shahar
-                # ist Gegner schon vorhanden, sonst hinzufuegen
-                if enemyname not in enemy:
-                    enemy[enemyname] = {}
-                # ist level schon vorhanden (Doppeleintrag), dann Fehlermeldung
-                if level in enemy[enemyname]:
-                    print("Error: Level fuer diesen Gegner bereits vorhanden")
-                    break
-                else:
-                    # Laden der Bilder oder Animation
-                    try:
-                        if "animated" in att_dict:
-                            if att_dict["animated"]:
-                                att_dict["image"] = _load_animation(
-                                    att_dict["image"],
-                                    att_dict["spritesheet_x"],
-                                    att_dict["spritesheet_y"],
-                                    att_dict["width"], att_dict["height"],
-                                    att_dict["duration"], att_dict["loop"])
-                            else:
-                                att_dict["image"] = load_image(att_dict["image"])
+    for att_dict in read_config("data/entities.cfg"):
+        # Tower
+        if "tower" in att_dict:
+            towername = att_dict["tower"]
+            lvl = att_dict["lvl"]
+
+            # shahar/
+            att_dict['firerate'] *= SPEED_MULTIPLIER
+            att_dict['projectileSpeed'] *= SPEED_MULTIPLIER
+            att_dict['effectDuration'] *= DURATION_MULTIPLIER
+            if towername == 1:
+                att_dict['range'] *= RANGE_MULTIPLIER
+            # /shahar
+
+            # ist tower schon vorhanden, ansonsten hinzufuegen
+            if towername not in tower:
+                tower[towername] = {}
+            # ist level schon vorhanden, dann Fehlermeldung
+            if lvl in tower[towername]:
+                print("Error: Level fuer diesen Turm bereits vorhanden")
+                break
+            # ansonsten einfuegen der attribute in das dict
+            else:
+                # Laden der Bilder
+                try:
+                    att_dict["image"] = load_image(att_dict["image"])
+                except FileNotFoundError:
+                    print("Error: Image not found: {}".format(
+                        att_dict["image"]))
+                try:
+                    att_dict["projectileImage"] = load_image(
+                        att_dict["projectileImage"])
+                except FileNotFoundError:
+                    print("Error: Image not found: {}".format(
+                        att_dict["image"]))
+                tower[towername][lvl] = att_dict
+
+        # Enemy
+        elif "enemy" in att_dict:
+            enemyname = att_dict["enemy"]
+            level = att_dict["lvl"]
+            # shahar/
+            att_dict['speed'] *= SPEED_MULTIPLIER
+            att_dict['duration'] *= DURATION_MULTIPLIER
+            # /shahar
+            # ist Gegner schon vorhanden, sonst hinzufuegen
+            if enemyname not in enemy:
+                enemy[enemyname] = {}
+            # ist level schon vorhanden (Doppeleintrag), dann Fehlermeldung
+            if level in enemy[enemyname]:
+                print("Error: Level fuer diesen Gegner bereits vorhanden")
+                break
+            else:
+                # Laden der Bilder oder Animation
+                try:
+                    if "animated" in att_dict:
+                        if att_dict["animated"]:
+                            att_dict["image"] = _load_animation(
+                                att_dict["image"],
+                                att_dict["spritesheet_x"],
+                                att_dict["spritesheet_y"],
+                                att_dict["width"], att_dict["height"],
+                                att_dict["duration"], att_dict["loop"])
                         else:
                             att_dict["image"] = load_image(att_dict["image"])
-                    except FileNotFoundError:
-                        print("Error: Image not found: {}".format(
-                            att_dict["image"]))
-                    enemy[enemyname][level] = att_dict
-
-            # Mine
-            elif line.find("mine':") != -1:
-                att_dict = eval(line)
-                minename = att_dict["mine"]
-                level = att_dict["lvl"]
-                if minename not in mine:
-                    mine[minename] = {}
-                # ist level schon vorhanden (Doppeleintrag), dann Fehlermeldung
-                if level in mine[minename]:
-                    print("Error: Level fuer diese Mine bereits vorhanden")
-                    break
-                else:
-                    try:
-                        if "animated" in att_dict:
-                            if att_dict["animated"]:
-                                # att_dict["image"] = _load_animation(att_dict["image"], att_dict["spritesheet_x"], att_dict["spritesheet_y"], att_dict["width"], att_dict["height"], att_dict["duration"], att_dict["loop"])
-                                att_dict["image"] = _load_animation(att_dict["image"], att_dict["spritesheet_x"], att_dict["spritesheet_y"], att_dict["width"],
-                                                                    att_dict["height"], att_dict["duration"], att_dict["loop"])
-                            else:
-                                att_dict["image"] = load_image(att_dict["image"])
+                    else:
+                        att_dict["image"] = load_image(att_dict["image"])
+                except FileNotFoundError:
+                    print("Error: Image not found: {}".format(
+                        att_dict["image"]))
+                enemy[enemyname][level] = att_dict
+
+        # Mine
+        elif "mine" in att_dict:
+            minename = att_dict["mine"]
+            level = att_dict["lvl"]
+            if minename not in mine:
+                mine[minename] = {}
+            # ist level schon vorhanden (Doppeleintrag), dann Fehlermeldung
+            if level in mine[minename]:
+                print("Error: Level fuer diese Mine bereits vorhanden")
+                break
+            else:
+                try:
+                    if "animated" in att_dict:
+                        if att_dict["animated"]:
+                            # att_dict["image"] = _load_animation(att_dict["image"], att_dict["spritesheet_x"], att_dict["spritesheet_y"], att_dict["width"], att_dict["height"], att_dict["duration"], att_dict["loop"])
+                            att_dict["image"] = _load_animation(att_dict["image"], att_dict["spritesheet_x"], att_dict["spritesheet_y"], att_dict["width"],
+                                                                att_dict["height"], att_dict["duration"], att_dict["loop"])
                         else:
                             att_dict["image"] = load_image(att_dict["image"])
-                    except FileNotFoundError:
-                        print("Error: Image not found: {}".format(
-                            att_dict["image"]))
-                    mine[minename][level] = att_dict
+                    else:
+                        att_dict["image"] = load_image(att_dict["image"])
+                except FileNotFoundError:
+                    print("Error: Image not found: {}".format(
+                        att_dict["image"]))
+                mine[minename][level] = att_dict
 
 
 settings = {}
@@ -199,14 +169,9 @@ waves = {}
 
 def load_waves():
     waves.clear()
-    with open(pathjoin("data/waves.cfg")) as wave_file:
-        for line in wave_file:
-            if line == "\n" or line[0] == "#":
-                continue
-            else:
-                attributes = eval(line)
-                if len(attributes) != 0:
-                    waves.update(attributes)
+    for attributes in read_config("data/waves.cfg"):
+        if len(attributes) != 0:
+            waves.update(attributes)
 
 
 def load_custom_image():
@@ -256,62 +221,3 @@ shot = pyglet.media.load(pathjoin("assets/music.wav"), streaming=False)
 gameGrid = [[3 for x in range(32)] for x in range(18)]
 startTile = [0, 0]
 endTile = [0, 0]
-
-
-def initGrid(lvl):
-    gameGrid = [[3 for x in range(32)] for x in range(18)]
-    startTile = [0, 0]
-    endTile = [0, 0]
-    if lvl == 1:
-        startTile = [8, 0]
-        endTile = [9, 31]
-        for i in range(1, 8):
-            gameGrid[8][i] = 2
-        for i in range(9, 15):
-            gameGrid[i][7] = 2
-        for i in range(8, 13):
-            gameGrid[14][i] = 2
-        for i in range(6, 14):
-            gameGrid[i][12] = 2
-        for i in range(13, 20):
-            gameGrid[6][i] = 2
-        for i in range(7, 10):
-            gameGrid[i][19] = 2
-        for i in range(20, 32):
-            gameGrid[9][i] = 2
-
-    elif lvl == 2:
-        startTile = [9, 0]
-        endTile = [13, 17]  # shahar
-        # endTile = [9, 31]
-        for i in range(1, 14):
-            gameGrid[9][i] = 2
-        for i in range(5, 10):
-            gameGrid[i][13] = 2
-        for i in range(13, 17):
-            gameGrid[5][i] = 2
-        for i in range(5, 14):
-            gameGrid[i][16] = 2
-        for i in range(16, 20):
-            gameGrid[13][i] = 2
-        for i in range(9, 14):
-            gameGrid[i][19] = 2
-        for i in range(19, 32):
-            gameGrid[9][i] = 2
-
-    elif lvl == "custom":
-        pathFile = open(pathjoin("data/path.cfg"), "rb")
-        gameGrid = pickle.load(pathFile)
-        startTile = [8, 0]
-        endTile = [9, 31]
-        pathFile.close()
-
-    return gameGrid, startTile, endTile
-
-
-def distance(a, b):
-    """
-    Calculate distance between two tuples.
-    """
-
-    return math.sqrt((b[0] - a[0]) ** 2 + (b[1] - a[1]) ** 2)
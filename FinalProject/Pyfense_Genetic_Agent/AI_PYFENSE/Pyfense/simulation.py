@@ -0,0 +1,1373 @@
+"""
+Headless PyFense: plays PyFenseGame on a fixed timestep, without the
+director, sprites or the pyglet scheduler, so genomes can be evaluated on a
+machine without a display.
+
+Towers, enemies, projectiles and waves follow the rules of game, entities,
+tower, enemy and projectile. Every tick stands for one frame of the real
+game: like the pyglet clock, a scheduled function runs at most once per
+tick, so with the SPEED_MULTIPLIER tweaks of resources (intervals far
+shorter than a frame) the simulation plays as the accelerated game does.
+With speed_multiplier=1 it plays the game as it was designed.
+Towers target the first enemy in range in the order of the enemies of
+entities: the order they were spawned in, re-sorted by the distance they
+walked every ORDER_INTERVAL seconds, as entities does.
+The simulation is an approximation of the real game all the same: the
+real game's frames take as long as the machine needs (the simulation's
+take TIME_STEP), and it builds and fires with cocos actions whose timing
+the simulation follows to the frame only. test_simulation checks it
+against achievements recorded from the graphic game (see
+test/record_golden_games.py).
+The games of a generation are played in batches, in lockstep, by
+PyFenseBatchSimulation.
+Called like pyfense.py: simulation.py learn <in> <out> <init wave> <waves> <gen>
+with an optional number of worker processes the genomes are spread over (the
+input is a json file or a binary genome batch of genetic_resources), or
+as a long-lived evaluator of a whole run: simulation.py serve <workers>, or
+of single games: simulation.py serve-games <workers>
+"""
+import os
+import sys
+import json
+import math
+import multiprocessing
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Pyfense import gamedata
+from Pyfense.gamedata import START_OF_GAME_MONEY, SPEED_MULTIPLIER, \
+    RANGE_MULTIPLIER, LEVEL
+from Pyfense.genetic_resources import decode_genome_from_string, \
+    decode_genome_from_codes, is_genome_batch, read_genome_batch, GenomeBuffer
+
+FRAME_RATE = 60
+TIME_STEP = 1 / FRAME_RATE  # seconds that pass in every tick
+EPSILON = 1e-9  # timers that are this close to 0 are due
+MOVE_DELAY = 0.1  # delay of an enemy's first step (enemy)
+POISON_INTERVAL = 0.5  # seconds between two poison damages (enemy)
+ORDER_INTERVAL = 0.2  # seconds between two sorts of the enemies (entities)
+SPLASH_SLOW_RANGE = 50  # splash range of the slow towers (entities)
+REFUND_PERCENTAGE = 0.7  # part of a tower's cost refunded on destroy (game)
+# quadratic, linear and offset coefficients of the enemy health multiplier
+HEALTH_POLYNOMIAL = (0, 2, -1)
+NO_TOWER = -1
+BATCH_SIZE = 64  # most games a PyFenseBatchSimulation plays in lockstep
+
+
+def get_pixel_coords_from_position(grid):
+    """
+    Returns a tupel of the pixel coordinates of a cell when providing a
+    (row, column) tupel
+    """
+    return (30 + grid[1] * 60, 30 + grid[0] * 60)
+
+
+class PyFenseSimulationData:
+    """
+    Everything a simulation needs that does not depend on the genomes: the
+    tower, enemy and wave tables and the path of the level. Loaded once and
+    shared by all the games that are simulated.
+    """
+
+    def __init__(self, level=LEVEL, speed_multiplier=SPEED_MULTIPLIER):
+        """
+        :param level: The level to play, as in resources.initGrid.
+        :param speed_multiplier: Speed up of the game, applied to the
+                                 entities like resources.load_entities does.
+        """
+        self.level = level
+        self.speed_multiplier = speed_multiplier
+        self.duration_multiplier = 1 / speed_multiplier
+
+        self.gameGrid, self.startTile, self.endTile = gamedata.initGrid(level)
+        steps = gamedata.trace_path(self.gameGrid, self.startTile,
+                                    self.endTile)
+        self.waypoints = self._load_waypoints(steps)
+        # the (column, row) cell of every gene, see gamedata.gene_cells:
+        self.gene_cells = [cell[:2] for cell in gamedata.gene_cells(level)]
+
+        self.tower = {}
+        self.enemy = {}
+        for att_dict in gamedata.read_config("data/entities.cfg"):
+            if "tower" in att_dict:
+                att_dict['firerate'] *= speed_multiplier
+                att_dict['projectileSpeed'] *= speed_multiplier
+                att_dict['effectDuration'] *= self.duration_multiplier
+                if att_dict["tower"] == 1:
+                    att_dict['range'] *= RANGE_MULTIPLIER
+                self.tower.setdefault(att_dict["tower"], {})[
+                    att_dict["lvl"]] = att_dict
+            elif "enemy" in att_dict:
+                att_dict['speed'] *= speed_multiplier
+                self.enemy.setdefault(att_dict["enemy"], {})[
+                    att_dict["lvl"]] = att_dict
+
+        self.waves = {}
+        for attributes in gamedata.read_config("data/waves.cfg"):
+            self.waves.update(attributes)
+
+    def _load_waypoints(self, steps):
+        """
+        :return: (n, 2) array of the pixel positions an enemy walks through,
+                 6 pixels apart, from the start tile to the end tile.
+        """
+        x, y = get_pixel_coords_from_position(self.startTile)
+        waypoints = [(x, y)]
+        for rotation, (row_step, column_step) in steps:
+            for j in range(1, 11):
+                waypoints.append((x + 6 * j * column_step,
+                                  y + 6 * j * row_step))
+            x, y = x + 60 * column_step, y + 60 * row_step
+        return np.array(waypoints, dtype=float)
+
+    def accumulated_cost(self, towerNumber, level):
+        """
+        Return cost of a tower plus the upgrades bought up to level.
+        """
+        return sum(self.tower[towerNumber][lvl]["cost"]
+                   for lvl in range(1, level + 1))
+
+
+class PyFenseSimulation:
+    """
+    A single headless game, the counterpart of a PyFenseGame scene together
+    with its entities. Enemies and towers are kept in arrays, and every
+    scheduled function of the game is a timer that counts down time_step
+    seconds per tick.
+    """
+
+    def __init__(self, data, genomes, waves_per_segment, currentLives=15,
+                 money_after_build=START_OF_GAME_MONEY, init_wave=0,
+                 time_step=TIME_STEP, min_lives=0):
+        """
+        :param data: PyFenseSimulationData of the level to play.
+        :param genomes: list of genomes (Tower objects, one per gene) that are
+                        built one after the other, every waves_per_segment
+                        waves.
+        :param min_lives: The game stops as soon as its lives drop below
+                          min_lives (as it does when they run out), when it
+                          can no longer achieve what it is played for.
+        The rest of the parameters are the ones of PyFenseGame.
+        """
+        self.data = data
+        self.time_step = time_step
+        self.gameGrid = [row[:] for row in data.gameGrid]
+        self.last_waypoint = len(data.waypoints) - 1
+        self.wavequantity = len(data.waves)
+
+        self.waves_per_genome = waves_per_segment
+        self.currentWave = init_wave
+        self.max_no_of_waves = init_wave + waves_per_segment * len(genomes)
+        self.money = money_after_build
+        self.money_after_build = money_after_build
+        self.total_earned = 0
+        self.total_spent = 0
+        self.genomes = genomes
+        self.curr_genome_num = 0
+        self.currentLives = currentLives
+        self.min_lives = min_lives
+
+        self.result = None
+        self.order_timer = ORDER_INTERVAL
+        self._load_towers()
+        self._load_wave([])
+
+    def run(self):
+        """
+        Plays the game until it is lost or all the waves were played.
+        :return: [wave, lives left, money spent, money earned], as end_run
+                 of pyfense does.
+        """
+        while self.result is None:
+            self._tick()
+        return self.result
+
+    def _tick(self):
+        dt = self.time_step
+        if not self.is_wave_running:
+            self.on_next_wave_timer_finished()
+            if self.result is not None:
+                return
+        self._move_enemies(dt)
+        if self.result is not None:
+            return
+        self._update_enemies_order(dt)
+        self._spawn_enemy(dt)
+        self._update_effects(dt)
+        self._update_projectiles(dt)
+        self._update_towers(dt)
+
+    def _end_game(self):
+        self.result = [self.currentWave, self.currentLives,
+                       self.total_spent, self.total_earned]
+
+    # ################ waves #####################
+
+    def on_next_wave_timer_finished(self):
+        """
+        Starts the next wave, building the next genome first when a new
+        segment begins.
+        """
+        self.currentWave += 1
+
+        if self.currentWave > self.max_no_of_waves:
+            self._end_game()
+            return
+
+        elif not (self.currentWave - 1) % self.waves_per_genome:
+            self.load_next_genome_to_grid()
+
+        moduloWavenumber = (self.currentWave - 1) % self.wavequantity + 1
+        self._load_wave(self.data.waves[moduloWavenumber])
+
+    def _load_wave(self, spawningList):
+        """
+        Prepares the enemies of a wave, stronger every time all the waves
+        were played.
+        """
+        enemyHealthFactor = math.floor((self.currentWave - 1) /
+                                       self.wavequantity) + 1
+        polynomial2, polynomial1, polynomial0 = HEALTH_POLYNOMIAL
+        multiplier = (polynomial2 * (enemyHealthFactor ** 2) +
+                      polynomial1 * enemyHealthFactor + polynomial0)
+        attributes = [self.data.enemy[enemyname][lvl]
+                      for enemyname, lvl, timeToNextEnemy in spawningList]
+        n = len(attributes)
+
+        self.spawningList = spawningList
+        self.spawnedEnemies = 0
+        self.diedEnemies = 0
+        self.spawn_timer = 0
+        self.is_wave_running = n > 0
+
+        self.enemy_worth = [att["worth"] for att in attributes]
+        self.enemy_speed = np.array([att["speed"] for att in attributes],
+                                    dtype=float)
+        self.enemy_current_speed = self.enemy_speed.copy()
+        self.enemy_health = np.array(
+            [att["maxhealth"] * multiplier for att in attributes],
+            dtype=float)
+        self.enemy_alive = np.zeros(n, dtype=bool)
+        # the spawned enemies in the order of the enemies of entities
+        self.enemy_order = []
+        # the waypoint an enemy walks to, and how far it got on the way there
+        self.enemy_step = np.zeros(n, dtype=int)
+        self.enemy_move_elapsed = np.ones(n)
+        self.enemy_move_duration = np.ones(n)
+        self.enemy_move_timer = np.full(n, np.inf)
+        self.enemy_unfreeze_timer = np.full(n, np.inf)
+        self.enemy_poison_timer = np.full(n, np.inf)
+        self.enemy_poisoned = np.zeros(n, dtype=int)
+        self.enemy_poison_duration = np.zeros(n)
+        self.enemy_poison_damage = np.zeros(n)
+
+        # projectiles in the air can only hit enemies of the previous wave
+        self.projectiles = []
+        self.tower_target[:] = -1
+
+    def _is_wave_finished(self):
+        if self.spawnedEnemies == len(self.spawningList):
+            if self.diedEnemies == self.spawnedEnemies:
+                self.is_wave_running = False
+
+    def _spawn_enemy(self, dt):
+        if self.spawnedEnemies == len(self.spawningList):
+            return
+        self.spawn_timer -= dt
+        if self.spawn_timer > EPSILON:
+            return
+        i = self.spawnedEnemies
+        self.enemy_alive[i] = True
+        self.enemy_order.append(i)
+        self.enemy_move_timer[i] = MOVE_DELAY * self.data.duration_multiplier
+        self.spawnedEnemies += 1
+        if self.spawnedEnemies != len(self.spawningList):
+            self.spawn_timer = (self.spawningList[i][2] *
+                                self.data.duration_multiplier)
+        self._is_wave_finished()
+
+    # ################ genomes & towers #####################
+
+    def load_next_genome_to_grid(self):
+        """
+        Builds the next genome on the grid, like PyFenseGame does: genes are
+        given to the cells of the level's placement index, in order (see
+        gamedata.gene_cells).
+        """
+        current_genome = self.genomes[self.curr_genome_num]
+
+        # this is to enable us to spend more money then we have during changes:
+        self.money += 250000
+
+        for gene, (x_index, y_index) in zip(current_genome, self.data.gene_cells):
+            wanted_type = gene.type.value
+
+            if wanted_type != NO_TOWER:
+                curr_tile = self.gameGrid[y_index][x_index]
+                curr_tile_kind = max(int((curr_tile - 100) / 10), -1)
+                curr_tile_level = max(int(curr_tile - 100 - curr_tile_kind * 10), 1)
+
+                wanted_level = gene.level.value
+
+                if curr_tile_kind != wanted_type or (curr_tile_level > wanted_level):
+                    if curr_tile > 5:
+                        self._destroy_tower(x_index, y_index)
+
+                    self._build_tower(wanted_type, x_index, y_index)
+                    curr_tile_level = 1
+
+                for level in range(curr_tile_level, wanted_level):
+                    self._upgrade_tower(x_index, y_index)
+
+        self.money -= 250000
+
+        if len(self.genomes) == 1:  # if we're running a single game, reset to money_after_build (do not validate)
+            self.money = self.money_after_build
+
+        assert(self.money >= 0)
+        self.curr_genome_num += 1
+        self._load_towers()
+
+    def _build_tower(self, towerNumber, x_index, y_index):
+        if self.gameGrid[y_index][x_index] > 3:
+            return
+        cost = self.data.tower[towerNumber][1]["cost"]
+        if cost > self.money:
+            return
+        self.money -= cost
+        self.total_spent += cost
+        self.gameGrid[y_index][x_index] = 100 + towerNumber * 10 + 1
+
+    def _upgrade_tower(self, x_index, y_index):
+        tile = self.gameGrid[y_index][x_index]
+        towerNumber, towerLevel = (tile - 100) // 10, tile % 10
+        if towerLevel == 3:
+            return
+        cost = self.data.tower[towerNumber][towerLevel + 1]["cost"]
+        if cost > self.money:
+            return
+        self.total_spent += cost
+        self.money -= cost
+        self.gameGrid[y_index][x_index] = tile + 1
+
+    def _destroy_tower(self, x_index, y_index):
+        tile = self.gameGrid[y_index][x_index]
+        self.gameGrid[y_index][x_index] = 3
+        refund = REFUND_PERCENTAGE * self.data.accumulated_cost(
+            (tile - 100) // 10, tile % 10)
+        self.money += refund
+        self.total_earned += refund
+
+    def _load_towers(self):
+        """
+        Rebuilds the tower arrays from the towers built on gameGrid.
+        """
+        self.towers = []
+        positions = []
+        for y_index, row in enumerate(self.gameGrid):
+            for x_index, tile in enumerate(row):
+                if tile > 5:
+                    self.towers.append(
+                        self.data.tower[(tile - 100) // 10][tile % 10])
+                    positions.append(
+                        get_pixel_coords_from_position((y_index, x_index)))
+
+        self.tower_position = np.array(positions, dtype=float).reshape(-1, 2)
+        self.tower_range = np.array([att["range"] for att in self.towers],
+                                    dtype=float)
+        self.tower_fire_timer = np.zeros(len(self.towers))
+        self.tower_target = np.full(len(self.towers), -1)
+
+    # ################ enemies #####################
+
+    def _enemy_positions(self, indices):
+        """
+        :return: (n, 2) array of the pixel positions of the given enemies,
+                 on their way from the last waypoint to the next one.
+        """
+        step = self.enemy_step[indices]
+        previous = np.maximum(step - 1, 0)
+        done = np.minimum(self.enemy_move_elapsed[indices] /
+                          self.enemy_move_duration[indices], 1)
+        waypoints = self.data.waypoints
+        return (waypoints[previous] + done[:, None] *
+                (waypoints[step] - waypoints[previous]))
+
+    def _move_enemies(self, dt):
+        """
+        Advances the MoveTo actions of the enemies and starts the next step
+        of those whose move timer is due, one waypoint per tick at most.
+        """
+        alive = self.enemy_alive
+        self.enemy_move_elapsed[alive] += dt
+        self.enemy_move_timer[alive] -= dt
+
+        due = alive & (self.enemy_move_timer <= EPSILON)
+        walking = due & (self.enemy_step < self.last_waypoint)
+        self.enemy_step[walking] += 1
+        self.enemy_move_elapsed[walking] = 0
+        self.enemy_move_duration[walking] = (
+            1 / self.enemy_current_speed[walking])
+        self.enemy_move_timer[walking] = self.enemy_move_duration[walking]
+        self.enemy_move_timer[due & ~walking] = np.inf
+
+        arrived = (alive & (self.enemy_step == self.last_waypoint) &
+                   (self.enemy_move_elapsed >= self.enemy_move_duration))
+        for i in np.flatnonzero(arrived):
+            self.enemy_alive[i] = False
+            self.currentLives -= 1
+            if self.currentLives == 0 or \
+                    0 < self.currentLives < self.min_lives:
+                self._end_game()
+                return
+            self.diedEnemies += 1
+            self._is_wave_finished()
+
+    def _update_enemies_order(self, dt):
+        """
+        Sorts the enemies by the distance they walked, every ORDER_INTERVAL
+        seconds (newly spawned enemies are last until then).
+        """
+        self.order_timer -= dt
+        if self.order_timer > EPSILON:
+            return
+        self.order_timer += ORDER_INTERVAL
+        order = [i for i in self.enemy_order if self.enemy_alive[i]]
+        order.sort(key=lambda i: self.enemy_step[i], reverse=True)
+        self.enemy_order = order
+
+    def _update_effects(self, dt):
+        alive = self.enemy_alive
+        self.enemy_unfreeze_timer[alive] -= dt
+        thawed = alive & (self.enemy_unfreeze_timer <= EPSILON)
+        self.enemy_current_speed[thawed] = self.enemy_speed[thawed]
+        self.enemy_unfreeze_timer[thawed] = np.inf
+
+        self.enemy_poison_timer[alive] -= dt
+        for i in np.flatnonzero(alive &
+                                (self.enemy_poison_timer <= EPSILON)):
+            self.enemy_poison_timer[i] = POISON_INTERVAL
+            if self.enemy_poisoned[i] >= self.enemy_poison_duration[i] * 2:
+                self.enemy_poison_timer[i] = np.inf
+                self.enemy_poisoned[i] = 0
+                continue
+            self.enemy_health[i] -= self.enemy_poison_damage[i]
+            self._has_enemy_died(i)
+            self.enemy_poisoned[i] += 1
+
+    def _freeze(self, i, slowDownFactor, duration):
+        self.enemy_current_speed[i] = self.enemy_speed[i] / slowDownFactor
+        self.enemy_unfreeze_timer[i] = duration
+
+    def _poison(self, i, damagePerTime, duration):
+        self.enemy_poison_timer[i] = POISON_INTERVAL
+        self.enemy_poison_duration[i] = duration
+        self.enemy_poison_damage[i] = damagePerTime
+
+    def _has_enemy_died(self, i):
+        """checks whether the enemy has died and returns true if so"""
+        if self.enemy_alive[i] and self.enemy_health[i] <= 0:
+            self.enemy_alive[i] = False
+            self.diedEnemies += 1
+            worth = self.enemy_worth[i]
+            self.money += worth
+            self.total_earned += worth
+            self._is_wave_finished()
+            return True
+        return False
+
+    # ################ towers & projectiles #####################
+
+    def _update_towers(self, dt):
+        if not self.towers:
+            return
+        self.tower_fire_timer -= dt
+
+        alive = np.flatnonzero(self.enemy_alive)
+        if len(alive):
+            # fire at the targets found on the last tick
+            for t in np.flatnonzero((self.tower_target >= 0) &
+                                    (self.tower_fire_timer <= EPSILON)):
+                self._fire(t)
+
+        # the target is the first enemy in range, in the order of entities
+        self.tower_target[:] = -1
+        if len(alive):
+            order = np.array(self.enemy_order, dtype=int)
+            order = order[self.enemy_alive[order]]
+            offsets = (self._enemy_positions(order)[None, :, :] -
+                       self.tower_position[:, None, :])
+            in_range = (np.hypot(offsets[..., 0], offsets[..., 1]) <
+                        self.tower_range[:, None])
+            has_target = in_range.any(axis=1)
+            self.tower_target[has_target] = order[
+                in_range[has_target].argmax(axis=1)]
+
+    def _fire(self, t):
+        attributes = self.towers[t]
+        target = self.tower_target[t]
+        self.tower_fire_timer[t] = 1 / attributes["firerate"]
+        target_position = self._enemy_positions([target])[0]
+        duration = (gamedata.distance(target_position,
+                                      self.tower_position[t]) /
+                    attributes["projectileSpeed"])
+        self.projectiles.append([duration, attributes, target])
+
+    def _update_projectiles(self, dt):
+        hits = []
+        flying = []
+        for projectile in self.projectiles:
+            projectile[0] -= dt
+            (hits if projectile[0] <= EPSILON else flying).append(projectile)
+        self.projectiles = flying
+
+        for duration, attributes, target in hits:
+            self._on_target_hit(attributes, target)
+
+    def _on_target_hit(self, attributes, target):
+        """
+        Deals the damage of a projectile that reached its target, which may
+        have died while the projectile was flying.
+        """
+        effect = attributes["effect"]
+        if effect in ('splash', 'splash-slow'):
+            if effect == 'splash-slow':
+                newEffect = 'slow'
+                dmgRange = SPLASH_SLOW_RANGE
+            else:
+                newEffect = 'normal'
+                dmgRange = attributes["effectFactor"]
+            alive = np.flatnonzero(self.enemy_alive)
+            offsets = (self._enemy_positions(alive) -
+                       self._enemy_positions([target]))
+            for i in alive[np.hypot(offsets[:, 0], offsets[:, 1]) < dmgRange]:
+                self._deal_damage(i, attributes["damage"], newEffect,
+                                  attributes["effectDuration"],
+                                  attributes["effectFactor"])
+        elif effect in ('normal', 'poison', 'slow'):
+            self._deal_damage(target, attributes["damage"], effect,
+                              attributes["effectDuration"],
+                              attributes["effectFactor"])
+
+    def _deal_damage(self, i, damage, effect, effectDuration, effectFactor):
+        """Deals damage to an enemy and handels slow and poison."""
+        self.enemy_health[i] -= damage
+        if not self._has_enemy_died(i):
+            if effect == 'slow':
+                self._freeze(i, effectFactor, effectDuration)
+            elif effect == 'poison':
+                self._poison(i, effectFactor, effectDuration)
+
+
+# effects of the towers, as the indices of the tower kind tables
+EFFECTS = ('normal', 'slow', 'poison', 'splash', 'splash-slow')
+NORMAL, SLOW, POISON, SPLASH, SPLASH_SLOW = range(len(EFFECTS))
+
+
+class PyFenseBatchSimulation:
+    """
+    The games of many genomes, played in lockstep: every tick advances all
+    the games at once, on arrays with a row per game, so a generation costs a
+    few numpy operations per tick instead of a Python loop per game.
+    Every game is played exactly as PyFenseSimulation plays it (which also
+    builds its genomes).
+    """
+
+    def __init__(self, data, genomes, waves_per_segment, lives,
+                 money_after_build=START_OF_GAME_MONEY, init_wave=0,
+                 time_step=TIME_STEP, min_lives=None):
+        """
+        :param data: PyFenseSimulationData of the level to play.
+        :param genomes: list of genomes, one per game.
+        :param lives: list of the lives every game starts with.
+        :param min_lives: list of the min_lives of every game, or None.
+        The rest of the parameters are the ones of PyFenseSimulation.
+        """
+        self.data = data
+        self.time_step = time_step
+        self.last_waypoint = len(data.waypoints) - 1
+        self.wavequantity = len(data.waves)
+        self.waves_per_genome = waves_per_segment
+        self.max_no_of_waves = init_wave + waves_per_segment
+
+        n = len(genomes)
+        self.games = [PyFenseSimulation(data, [genome], waves_per_segment,
+                                        currentLives, money_after_build,
+                                        init_wave, time_step)
+                      for genome, currentLives in zip(genomes, lives)]
+        self.currentWave = np.full(n, init_wave)
+        self.currentLives = np.array(lives, dtype=int)
+        self.min_lives = (np.zeros(n, dtype=int) if min_lives is None else
+                          np.array(min_lives, dtype=int))
+        self.results = [None] * n
+        self.done = np.zeros(n, dtype=bool)
+        self.order_timer = np.full(n, ORDER_INTERVAL)
+
+        # every tower kind (tower, level) is a row of the kind tables
+        kinds = [data.tower[towerNumber][lvl]
+                 for towerNumber in sorted(data.tower)
+                 for lvl in sorted(data.tower[towerNumber])]
+        self.kind_of_tower = {(att["tower"], att["lvl"]): kind
+                              for kind, att in enumerate(kinds)}
+        for name in ("firerate", "projectileSpeed", "damage",
+                     "effectDuration", "effectFactor", "range"):
+            setattr(self, "kind_" + name,
+                    np.array([att[name] for att in kinds], dtype=float))
+        self.kind_effect = np.array(
+            [EFFECTS.index(att["effect"]) if att["effect"] in EFFECTS else -1
+             for att in kinds])
+
+        self.tower_kinds = [np.zeros(0, dtype=int)] * n
+        self.tower_positions = [np.zeros((0, 2))] * n
+        self._stack_towers()
+
+        self.max_enemies = max(len(wave) for wave in data.waves.values())
+        shape = (n, self.max_enemies)
+        self.wave_length = np.zeros(n, dtype=int)
+        self.spawnedEnemies = np.zeros(n, dtype=int)
+        self.diedEnemies = np.zeros(n, dtype=int)
+        self.spawn_timer = np.zeros(n)
+        self.is_wave_running = np.zeros(n, dtype=bool)
+        self.enemy_spawn_delay = np.zeros(shape)
+        self.enemy_worth = np.zeros(shape, dtype=int)
+        self.enemy_speed = np.ones(shape)
+        self.enemy_current_speed = np.ones(shape)
+        self.enemy_health = np.zeros(shape)
+        self.enemy_alive = np.zeros(shape, dtype=bool)
+        # the place of every enemy in the order of the enemies of entities
+        # (the enemies spawned since the last sort get the places after all)
+        self.enemy_place = np.zeros(shape, dtype=int)
+        self.next_place = np.zeros(n, dtype=int)
+        self.enemy_step = np.zeros(shape, dtype=int)
+        self.enemy_move_elapsed = np.ones(shape)
+        self.enemy_move_duration = np.ones(shape)
+        self.enemy_move_timer = np.full(shape, np.inf)
+        self.enemy_unfreeze_timer = np.full(shape, np.inf)
+        self.enemy_poison_timer = np.full(shape, np.inf)
+        self.enemy_poisoned = np.zeros(shape, dtype=int)
+        self.enemy_poison_duration = np.zeros(shape)
+        self.enemy_poison_damage = np.zeros(shape)
+
+        # projectiles of all the games: their game, timer, tower kind, target
+        self.projectile_game = np.zeros(0, dtype=int)
+        self.projectile_timer = np.zeros(0)
+        self.projectile_kind = np.zeros(0, dtype=int)
+        self.projectile_target = np.zeros(0, dtype=int)
+
+    def run(self):
+        """
+        Plays all the games until each is lost or all its waves were played.
+        :return: list of the results of PyFenseSimulation.run, one per game.
+        """
+        while not self.done.all():
+            self._tick()
+        return self.results
+
+    def _tick(self):
+        dt = self.time_step
+        for game in np.flatnonzero(~self.done & ~self.is_wave_running):
+            self.on_next_wave_timer_finished(game)
+        self._move_enemies(dt)
+        self._update_enemies_order(dt)
+        self._spawn_enemies(dt)
+        self._update_effects(dt)
+        self._update_projectiles(dt)
+        self._update_towers(dt)
+        self._update_waves()
+
+    def _end_game(self, game):
+        simulation = self.games[game]
+        self.results[game] = [int(self.currentWave[game]),
+                              int(self.currentLives[game]),
+                              simulation.total_spent, simulation.total_earned]
+        self.done[game] = True
+        # the game stops here: nothing of it moves, fires or hits anymore
+        self.enemy_alive[game] = False
+        self._remove_projectiles(game)
+
+    # ################ waves #####################
+
+    def on_next_wave_timer_finished(self, game):
+        self.currentWave[game] += 1
+        currentWave = self.currentWave[game]
+
+        if currentWave > self.max_no_of_waves:
+            self._end_game(game)
+            return
+
+        elif not (currentWave - 1) % self.waves_per_genome:
+            self._load_genome(game)
+
+        moduloWavenumber = (currentWave - 1) % self.wavequantity + 1
+        self._load_wave(game, self.data.waves[moduloWavenumber])
+
+    def _load_wave(self, game, spawningList):
+        enemyHealthFactor = math.floor((self.currentWave[game] - 1) /
+                                       self.wavequantity) + 1
+        polynomial2, polynomial1, polynomial0 = HEALTH_POLYNOMIAL
+        multiplier = (polynomial2 * (enemyHealthFactor ** 2) +
+                      polynomial1 * enemyHealthFactor + polynomial0)
+        attributes = [self.data.enemy[enemyname][lvl]
+                      for enemyname, lvl, timeToNextEnemy in spawningList]
+        n = len(attributes)
+
+        self.wave_length[game] = n
+        self.spawnedEnemies[game] = 0
+        self.diedEnemies[game] = 0
+        self.spawn_timer[game] = 0
+        self.is_wave_running[game] = n > 0
+
+        self.enemy_spawn_delay[game, :n] = [
+            timeToNextEnemy * self.data.duration_multiplier
+            for enemyname, lvl, timeToNextEnemy in spawningList]
+        self.enemy_worth[game, :n] = [att["worth"] for att in attributes]
+        self.enemy_speed[game, :n] = [att["speed"] for att in attributes]
+        self.enemy_current_speed[game] = self.enemy_speed[game]
+        self.enemy_health[game, :n] = [att["maxhealth"] * multiplier
+                                       for att in attributes]
+        self.enemy_alive[game] = False
+        self.enemy_step[game] = 0
+        self.enemy_move_elapsed[game] = 1
+        self.enemy_move_duration[game] = 1
+        self.enemy_move_timer[game] = np.inf
+        self.enemy_unfreeze_timer[game] = np.inf
+        self.enemy_poison_timer[game] = np.inf
+        self.enemy_poisoned[game] = 0
+        self.enemy_poison_duration[game] = 0
+        self.enemy_poison_damage[game] = 0
+
+        # projectiles in the air can only hit enemies of the previous wave
+        self._remove_projectiles(game)
+        self.tower_target[game] = -1
+
+    def _update_waves(self):
+        finished = (self.is_wave_running &
+                    (self.spawnedEnemies == self.wave_length) &
+                    (self.diedEnemies == self.spawnedEnemies))
+        self.is_wave_running[finished] = False
+
+    def _spawn_enemies(self, dt):
+        spawning = ~self.done & (self.spawnedEnemies != self.wave_length)
+        self.spawn_timer[spawning] -= dt
+        games = np.flatnonzero(spawning & (self.spawn_timer <= EPSILON))
+        enemies = self.spawnedEnemies[games]
+        self.enemy_alive[games, enemies] = True
+        self.enemy_place[games, enemies] = self.next_place[games]
+        self.next_place[games] += 1
+        self.enemy_move_timer[games, enemies] = (
+            MOVE_DELAY * self.data.duration_multiplier)
+        self.spawnedEnemies[games] += 1
+        more = self.spawnedEnemies[games] != self.wave_length[games]
+        self.spawn_timer[games[more]] = self.enemy_spawn_delay[
+            games[more], enemies[more]]
+
+    # ################ genomes & towers #####################
+
+    def _load_genome(self, game):
+        """
+        Builds the genome of a game with its PyFenseSimulation, and takes the
+        towers it has built.
+        """
+        simulation = self.games[game]
+        simulation.load_next_genome_to_grid()
+        self.tower_kinds[game] = np.array(
+            [self.kind_of_tower[att["tower"], att["lvl"]]
+             for att in simulation.towers], dtype=int)
+        self.tower_positions[game] = simulation.tower_position
+        self._stack_towers(game)
+
+    def _stack_towers(self, changed=None):
+        """
+        Rebuilds the (games, towers) tower arrays, padded to the game with
+        the most towers, keeping the timers and targets of the games whose
+        towers did not change.
+        """
+        n = len(self.tower_kinds)
+        size = max(len(kinds) for kinds in self.tower_kinds)
+        fire_timer = np.zeros((n, size))
+        target = np.full((n, size), -1)
+        if changed is not None:
+            old = min(size, self.tower_fire_timer.shape[1])
+            fire_timer[:, :old] = self.tower_fire_timer[:, :old]
+            target[:, :old] = self.tower_target[:, :old]
+            fire_timer[changed] = 0
+            target[changed] = -1
+
+        self.tower_valid = np.zeros((n, size), dtype=bool)
+        self.tower_kind = np.zeros((n, size), dtype=int)
+        self.tower_position = np.zeros((n, size, 2))
+        for game, kinds in enumerate(self.tower_kinds):
+            self.tower_valid[game, :len(kinds)] = True
+            self.tower_kind[game, :len(kinds)] = kinds
+            self.tower_position[game, :len(kinds)] = (
+                self.tower_positions[game])
+        self.tower_range = np.where(self.tower_valid,
+                                    self.kind_range[self.tower_kind], -np.inf)
+        self.tower_fire_timer = fire_timer
+        self.tower_target = target
+
+    # ################ enemies #####################
+
+    def _enemy_positions(self, games, enemies):
+        """
+        :return: (..., 2) array of the pixel positions of the given enemies,
+                 as PyFenseSimulation._enemy_positions computes them.
+        """
+        step = self.enemy_step[games, enemies]
+        previous = np.maximum(step - 1, 0)
+        done = np.minimum(self.enemy_move_elapsed[games, enemies] /
+                          self.enemy_move_duration[games, enemies], 1)
+        waypoints = self.data.waypoints
+        return (waypoints[previous] + done[..., None] *
+                (waypoints[step] - waypoints[previous]))
+
+    def _move_enemies(self, dt):
+        alive = self.enemy_alive
+        self.enemy_move_elapsed[alive] += dt
+        self.enemy_move_timer[alive] -= dt
+
+        due = alive & (self.enemy_move_timer <= EPSILON)
+        walking = due & (self.enemy_step < self.last_waypoint)
+        self.enemy_step[walking] += 1
+        self.enemy_move_elapsed[walking] = 0
+        self.enemy_move_duration[walking] = (
+            1 / self.enemy_current_speed[walking])
+        self.enemy_move_timer[walking] = self.enemy_move_duration[walking]
+        self.enemy_move_timer[due & ~walking] = np.inf
+
+        arrived = (alive & (self.enemy_step == self.last_waypoint) &
+                   (self.enemy_move_elapsed >= self.enemy_move_duration))
+        arrivals = arrived.sum(axis=1)
+        self.enemy_alive[arrived] = False
+        # a game ends on the arrival that leaves it with fewer than min_lives
+        # lives, or with none
+        lives = self.currentLives
+        below = np.minimum(lives - 1, self.min_lives - 1)
+        stopped = (arrivals > 0) & (below > 0) & (below >= lives - arrivals)
+        lost = ~stopped & (lives > 0) & (arrivals >= lives)
+        self.currentLives = np.where(stopped, below,
+                                     np.where(lost, 0, lives - arrivals))
+        self.diedEnemies += arrivals
+        for game in np.flatnonzero(stopped | lost):
+            self._end_game(game)
+
+    def _update_enemies_order(self, dt):
+        """
+        PyFenseSimulation._update_enemies_order of every game: a stable sort
+        of the places of its enemies by the distance they walked.
+        """
+        self.order_timer[~self.done] -= dt
+        games = np.flatnonzero(~self.done & (self.order_timer <= EPSILON))
+        if not len(games):
+            return
+        self.order_timer[games] += ORDER_INTERVAL
+        order = np.lexsort((self.enemy_place[games],
+                            np.where(self.enemy_alive[games],
+                                     -self.enemy_step[games],
+                                     np.iinfo(int).max)), axis=-1)
+        places = np.empty_like(order)
+        np.put_along_axis(places, order, np.arange(order.shape[1])[None],
+                          axis=1)
+        self.enemy_place[games] = places
+        self.next_place[games] = self.max_enemies
+
+    def _update_effects(self, dt):
+        alive = self.enemy_alive
+        self.enemy_unfreeze_timer[alive] -= dt
+        thawed = alive & (self.enemy_unfreeze_timer <= EPSILON)
+        self.enemy_current_speed[thawed] = self.enemy_speed[thawed]
+        self.enemy_unfreeze_timer[thawed] = np.inf
+
+        self.enemy_poison_timer[alive] -= dt
+        due = alive & (self.enemy_poison_timer <= EPSILON)
+        self.enemy_poison_timer[due] = POISON_INTERVAL
+        expired = due & (self.enemy_poisoned >= self.enemy_poison_duration * 2)
+        self.enemy_poison_timer[expired] = np.inf
+        self.enemy_poisoned[expired] = 0
+        hurt = due & ~expired
+        self.enemy_health[hurt] -= self.enemy_poison_damage[hurt]
+        self._enemies_died(*np.nonzero(hurt & (self.enemy_health <= 0)))
+        self.enemy_poisoned[hurt] += 1
+
+    def _enemies_died(self, games, enemies):
+        """
+        Kills the given enemies, in the given order (which is the order the
+        money they are worth is earned in).
+        """
+        self.enemy_alive[games, enemies] = False
+        np.add.at(self.diedEnemies, games, 1)
+        for game, enemy in zip(games, enemies):
+            simulation = self.games[game]
+            worth = int(self.enemy_worth[game, enemy])
+            simulation.money += worth
+            simulation.total_earned += worth
+
+    # ################ towers & projectiles #####################
+
+    def _update_towers(self, dt):
+        self.tower_fire_timer -= dt
+
+        any_alive = self.enemy_alive.any(axis=1)
+        # fire at the targets found on the last tick
+        firing = ((self.tower_target >= 0) &
+                  (self.tower_fire_timer <= EPSILON) & any_alive[:, None])
+        games, towers = np.nonzero(firing)
+        if len(games):
+            self._fire(games, towers)
+
+        # the target is the first enemy in range, in the order of entities
+        self.tower_target[:] = -1
+        games = np.flatnonzero(any_alive)
+        if not len(games) or not self.tower_valid.shape[1]:
+            return
+        alive = self.enemy_alive[games]
+        order = np.argsort(np.where(alive, self.enemy_place[games],
+                                    np.iinfo(int).max),
+                           axis=1, kind='stable')
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.arange(order.shape[1])[None], axis=1)
+
+        positions = self._enemy_positions(games[:, None],
+                                          np.arange(self.max_enemies)[None])
+        offsets = (positions[:, None, :, :] -
+                   self.tower_position[games][:, :, None, :])
+        in_range = ((np.hypot(offsets[..., 0], offsets[..., 1]) <
+                     self.tower_range[games][:, :, None]) & alive[:, None, :])
+        first = np.where(in_range, rank[:, None, :], order.shape[1]).argmin(
+            axis=2)
+        self.tower_target[games] = np.where(in_range.any(axis=2), first, -1)
+
+    def _fire(self, games, towers):
+        kinds = self.tower_kind[games, towers]
+        targets = self.tower_target[games, towers]
+        self.tower_fire_timer[games, towers] = 1 / self.kind_firerate[kinds]
+        offsets = (self.tower_position[games, towers] -
+                   self._enemy_positions(games, targets))
+        distances = np.sqrt(offsets[:, 0] ** 2 + offsets[:, 1] ** 2)
+        self.projectile_game = np.concatenate([self.projectile_game, games])
+        self.projectile_timer = np.concatenate(
+            [self.projectile_timer, distances / self.kind_projectileSpeed[kinds]])
+        self.projectile_kind = np.concatenate([self.projectile_kind, kinds])
+        self.projectile_target = np.concatenate(
+            [self.projectile_target, targets])
+
+    def _remove_projectiles(self, game):
+        self._keep_projectiles(self.projectile_game != game)
+
+    def _keep_projectiles(self, keep):
+        self.projectile_game = self.projectile_game[keep]
+        self.projectile_timer = self.projectile_timer[keep]
+        self.projectile_kind = self.projectile_kind[keep]
+        self.projectile_target = self.projectile_target[keep]
+
+    def _update_projectiles(self, dt):
+        """
+        Deals the damage of the projectiles that reach their target on this
+        tick. Every hit is turned into the (enemy, damage, effect) pairs it
+        deals, in the order PyFenseSimulation deals them.
+        """
+        self.projectile_timer -= dt
+        hit = self.projectile_timer <= EPSILON
+        if not hit.any():
+            return
+        games = self.projectile_game[hit]
+        kinds = self.projectile_kind[hit]
+        targets = self.projectile_target[hit]
+        self._keep_projectiles(~hit)
+
+        # splashes hit the enemies that are alive when the hits begin
+        effect = self.kind_effect[kinds]
+        splash = (effect == SPLASH) | (effect == SPLASH_SLOW)
+        hits = np.zeros((len(games), self.max_enemies), dtype=bool)
+        if splash.any():
+            dmgRange = np.where(effect == SPLASH_SLOW, SPLASH_SLOW_RANGE,
+                                self.kind_effectFactor[kinds])
+            offsets = (self._enemy_positions(
+                games[splash][:, None], np.arange(self.max_enemies)[None]) -
+                self._enemy_positions(games[splash],
+                                      targets[splash])[:, None, :])
+            hits[splash] = (self.enemy_alive[games[splash]] &
+                            (np.hypot(offsets[..., 0], offsets[..., 1]) <
+                             dmgRange[splash][:, None]))
+        single = ~splash & (effect >= 0)
+        hits[np.flatnonzero(single), targets[single]] = True
+
+        pair_hit, pair_enemy = np.nonzero(hits)
+        pair_game = games[pair_hit]
+        pair_kind = kinds[pair_hit]
+        pair_effect = effect[pair_hit]
+        pair_effect[pair_effect == SPLASH] = NORMAL
+        pair_effect[pair_effect == SPLASH_SLOW] = SLOW
+
+        # an enemy dies on the first pair that leaves it with no health
+        alive = self.enemy_alive[pair_game, pair_enemy]
+        before = self.enemy_health[pair_game, pair_enemy]
+        np.subtract.at(self.enemy_health, (pair_game, pair_enemy),
+                       self.kind_damage[pair_kind])
+        died = alive & (self.enemy_health[pair_game, pair_enemy] <= 0)
+        if died.any():
+            key = pair_game * self.max_enemies + pair_enemy
+            damage = self._cumulative_damage(key, self.kind_damage[pair_kind])
+            killing = np.flatnonzero(died & (before - damage <= 0))
+            key, first = np.unique(key[killing], return_index=True)
+            killing = np.sort(killing[first])
+            self._enemies_died(pair_game[killing], pair_enemy[killing])
+
+        # the last slow and the last poison of a survivor are the ones left
+        for effect_id, apply in ((SLOW, self._freeze), (POISON, self._poison)):
+            pairs = np.flatnonzero(pair_effect == effect_id)[::-1]
+            if not len(pairs):
+                continue
+            key = pair_game[pairs] * self.max_enemies + pair_enemy[pairs]
+            pairs = pairs[np.unique(key, return_index=True)[1]]
+            pairs = pairs[self.enemy_alive[pair_game[pairs],
+                                           pair_enemy[pairs]]]
+            apply(pair_game[pairs], pair_enemy[pairs], pair_kind[pairs])
+
+    @staticmethod
+    def _cumulative_damage(key, damage):
+        """
+        :return: The damage dealt to the enemy of every pair up to and
+                 including that pair.
+        """
+        order = np.argsort(key, kind='stable')
+        total = np.cumsum(damage[order])
+        starts = np.flatnonzero(np.r_[True, key[order][1:] != key[order][:-1]])
+        before_group = np.repeat(total[starts] - damage[order][starts],
+                                 np.diff(np.r_[starts, len(key)]))
+        cumulative = np.empty_like(total)
+        cumulative[order] = total - before_group
+        return cumulative
+
+    def _freeze(self, games, enemies, kinds):
+        self.enemy_current_speed[games, enemies] = (
+            self.enemy_speed[games, enemies] / self.kind_effectFactor[kinds])
+        self.enemy_unfreeze_timer[games, enemies] = (
+            self.kind_effectDuration[kinds])
+
+    def _poison(self, games, enemies, kinds):
+        self.enemy_poison_timer[games, enemies] = POISON_INTERVAL
+        self.enemy_poison_duration[games, enemies] = (
+            self.kind_effectDuration[kinds])
+        self.enemy_poison_damage[games, enemies] = self.kind_effectFactor[kinds]
+
+
+_simulation_data = {}
+
+
+def get_simulation_data(level=LEVEL, speed_multiplier=SPEED_MULTIPLIER):
+    """
+    :return: The PyFenseSimulationData of the level, loaded on first use.
+    """
+    key = (level, speed_multiplier)
+    if key not in _simulation_data:
+        _simulation_data[key] = PyFenseSimulationData(level, speed_multiplier)
+    return _simulation_data[key]
+
+
+def run_single_game(genome, waves_number, lives_left, init_wave, min_lives=0):
+    # making sure game would start *exactly* on wave specified by user, and not +1
+    init_wave = init_wave - 1 if init_wave > 0 else 0
+
+    simulation = PyFenseSimulation(get_simulation_data(), [genome],
+                                   waves_number, lives_left,
+                                   init_wave=init_wave, min_lives=min_lives)
+    return simulation.run()
+
+
+def run_batch_of_games(genomes, waves_number, lives_left, init_wave,
+                       min_lives=None):
+    """
+    Plays the games of run_single_game of many genomes at once.
+    :param lives_left: list of the lives of every genome.
+    :param min_lives: list of the min_lives of every genome, or None.
+    """
+    init_wave = init_wave - 1 if init_wave > 0 else 0
+
+    simulation = PyFenseBatchSimulation(get_simulation_data(), genomes,
+                                        waves_number, lives_left,
+                                        init_wave=init_wave,
+                                        min_lives=min_lives)
+    return simulation.run()
+
+
+def run_sequence_of_genomes(genomes, waves_number):
+    return PyFenseSimulation(get_simulation_data(), genomes,
+                             waves_number).run()
+
+
+def run_encoded_genome(genome_string, lives_left, waves_number, init_wave,
+                       min_lives=0):
+    """
+    Plays the game of a genome as written in the input json.
+    """
+    return run_single_game(decode_genome_from_string(genome_string),
+                           waves_number, lives_left, init_wave, min_lives)
+
+
+def run_encoded_batch(genome_strings, lives_left, waves_number, init_wave,
+                      min_lives=None):
+    """
+    Plays the games of many genomes as written in the input json.
+    :return: list of the results of the games.
+    """
+    return run_batch_of_games(
+        [decode_genome_from_string(genome_string)
+         for genome_string in genome_strings],
+        waves_number, lives_left, init_wave, min_lives)
+
+
+def run_packed_batch(codes, lives_left, waves_number, init_wave,
+                     min_lives=None):
+    """
+    Plays the games of many genomes as packed in a genome batch.
+    :return: list of the results of the games.
+    """
+    return run_batch_of_games([decode_genome_from_codes(row) for row in codes],
+                              waves_number, lives_left, init_wave, min_lives)
+
+
+def run_genomes(genome_dict, output_dict, init_wave, waves_number, generation,
+                workers=1, pool=None, batch_size=BATCH_SIZE):
+    """
+    Plays the game of every genome of genome_dict and stores the results in
+    output_dict under the same keys.
+    :param genome_dict: dict of key -> [encoded genome, lives], with the
+                        min_lives of the game as an optional third item.
+    :param workers: Number of processes the games are spread over (the
+                    processes of pool, if given).
+    :param pool: A multiprocessing.Pool to play the games on instead of
+                 starting workers for this call.
+    :param batch_size: Most games played in lockstep by a task, so every
+                       worker still gets a task.
+    """
+    keys = list(genome_dict.keys())
+    _play_in_batches(run_encoded_batch, keys,
+                     [genome_dict[key][0] for key in keys],
+                     [int(genome_dict[key][1]) for key in keys],
+                     [int(genome_dict[key][2]) if len(genome_dict[key]) > 2
+                      else 0 for key in keys],
+                     output_dict, init_wave, waves_number, workers, pool,
+                     batch_size)
+
+
+def run_genome_batch(path, output_dict, init_wave, waves_number, generation,
+                     workers=1, pool=None, batch_size=BATCH_SIZE):
+    """
+    run_genomes of the genomes of a binary genome batch file (see
+    genetic_resources.write_genome_batch), whose results are stored under
+    their ids (as strings).
+    """
+    ids, codes, lives, min_lives = read_genome_batch(path)
+    _play_in_batches(run_packed_batch, [str(ind_id) for ind_id in ids], codes,
+                     lives.tolist(), min_lives.tolist(), output_dict,
+                     init_wave, waves_number, workers, pool, batch_size)
+
+
+def run_buffered_batch(name, start, stop, waves_number, init_wave):
+    """
+    Plays the games of the rows start to stop of the genome buffer called
+    name, and writes their results to the buffer.
+    """
+    buffer = attach_genome_buffer(name)
+    buffer.achievements[start:stop] = run_packed_batch(
+        buffer.codes[start:stop], buffer.lives[start:stop].tolist(),
+        waves_number, init_wave, buffer.min_lives[start:stop].tolist())
+
+
+# The genome buffer this process has attached to, by name:
+_genome_buffers = dict()
+
+
+def attach_genome_buffer(name):
+    """
+    :return: The genome buffer called name, attached once per process.
+    """
+    if name not in _genome_buffers:
+        for buffer in _genome_buffers.values():  # the GA has replaced it
+            buffer.close()
+        _genome_buffers.clear()
+        _genome_buffers[name] = GenomeBuffer.attach(name)
+    return _genome_buffers[name]
+
+
+def run_genome_buffer(name, init_wave, waves_number, generation, workers=1,
+                      pool=None, batch_size=BATCH_SIZE):
+    """
+    run_genomes of the genomes of a genome buffer (see
+    genetic_resources.GenomeBuffer), whose workers read their genomes from
+    the buffer and write the results to it in place.
+    """
+    count = attach_genome_buffer(name).count
+    size = max(1, min(batch_size, math.ceil(count / workers)))
+    tasks = [(name, start, min(start + size, count), waves_number, init_wave)
+             for start in range(0, count, size)]
+
+    if pool is not None:
+        pool.starmap(run_buffered_batch, tasks, chunksize=1)
+    elif workers > 1 and len(tasks) > 1:
+        get_simulation_data()  # loaded once, before the workers are forked
+        with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+            pool.starmap(run_buffered_batch, tasks, chunksize=1)
+    else:
+        for task in tasks:
+            run_buffered_batch(*task)
+
+
+def _play_in_batches(play_batch, keys, genomes, lives, min_lives, output_dict,
+                     init_wave, waves_number, workers, pool, batch_size):
+    size = max(1, min(batch_size, math.ceil(len(keys) / workers)))
+    tasks = [(genomes[start:start + size], lives[start:start + size],
+              waves_number, init_wave, min_lives[start:start + size])
+             for start in range(0, len(keys), size)]
+
+    if pool is not None:
+        batches = pool.starmap(play_batch, tasks, chunksize=1)
+    elif workers > 1 and len(tasks) > 1:
+        get_simulation_data()  # loaded once, before the workers are forked
+        with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+            batches = pool.starmap(play_batch, tasks, chunksize=1)
+    else:
+        batches = [play_batch(*task) for task in tasks]
+
+    output_dict.update(zip(keys, [result for batch in batches
+                                  for result in batch]))
+
+
+def serve(requests=sys.stdin, responses=sys.stdout, workers=1):
+    """
+    Evaluates generations until requests ends, loading the game data and
+    starting the workers only once.
+    Every line of requests is a json object with the "genomes" (as in the
+    input json), the path of a binary "genome_batch" or the name of a
+    "genome_buffer", and the "init_wave", "waves" and "generation" of a
+    generation; the output dict of the generation is written back as a
+    single json line (an empty one for a genome buffer, whose results are
+    written to the buffer).
+    """
+    get_simulation_data()
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        for line in requests:
+            if line.strip() == "":
+                break
+            request = json.loads(line)
+            output_dict = dict()
+            if "genome_buffer" in request:
+                run_genome_buffer(request["genome_buffer"],
+                                  request["init_wave"], request["waves"],
+                                  request["generation"], workers, pool)
+            else:
+                run = run_genome_batch if "genome_batch" in request else \
+                    run_genomes
+                run(request.get("genome_batch", request.get("genomes")),
+                    output_dict, request["init_wave"], request["waves"],
+                    request["generation"], workers, pool)
+            responses.write(json.dumps(output_dict) + "\n")
+            responses.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def serve_games(requests=sys.stdin, responses=sys.stdout, workers=1):
+    """
+    Plays games one at a time, as they are requested, and answers every game
+    as soon as it ends (not in the order of requests), so a caller can keep
+    all the workers busy.
+    Every line of requests is a json object with the "key", "genome",
+    "lives", "init_wave" and "waves" (and optionally "min_lives") of a game;
+    every answer is a json line with the "key" and the "result" of the game,
+    or the "error" it has failed with.
+    """
+    get_simulation_data()
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+
+    def respond(key, **answer):
+        # called by the single result thread of pool
+        responses.write(json.dumps(dict(key=key, **answer)) + "\n")
+        responses.flush()
+
+    try:
+        for line in requests:
+            if line.strip() == "":
+                break
+            request = json.loads(line)
+            key = request["key"]
+            args = (request["genome"], int(request["lives"]), request["waves"],
+                    request["init_wave"], int(request.get("min_lives", 0)))
+            if pool is None:
+                respond(key, result=run_encoded_genome(*args))
+            else:
+                pool.apply_async(
+                    run_encoded_genome, args,
+                    callback=lambda result, key=key: respond(key, result=result),
+                    error_callback=lambda error, key=key: respond(
+                        key, error=repr(error)))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def run_generation():
+    """
+    run genomes for generation
+    """
+    input_json_path = sys.argv[2]
+    output_json_path = sys.argv[3]
+    init_wave = int(sys.argv[4])
+    num_waves = int(sys.argv[5])
+    generation = int(sys.argv[6])
+    workers = int(sys.argv[7]) if len(sys.argv) > 7 else 1
+
+    output_dict = dict()
+    if is_genome_batch(input_json_path):
+        run_genome_batch(input_json_path, output_dict, init_wave, num_waves,
+                         generation, workers)
+    else:
+        with open(input_json_path) as f:
+            genome_dict = json.load(f)
+        run_genomes(genome_dict, output_dict, init_wave, num_waves,
+                    generation, workers)
+    with open(output_json_path, 'w') as f:
+        json.dump(output_dict, f)
+
+
+def run_solution():
+    """
+    Run a given solution
+    """
+    input_json_path = sys.argv[2]
+    output_path = sys.argv[3]
+    num_waves = int(sys.argv[4])
+    with open(input_json_path) as f:
+        sols_dict = json.load(f)
+    data = dict()
+
+    for seg_id in range(len(sols_dict)):
+        seg_sol = [decode_genome_from_string(genome)
+                   for genome in sols_dict[str(seg_id)]]
+        data[seg_id] = run_sequence_of_genomes(seg_sol, num_waves)
+
+    with open(output_path, 'w') as f:
+        json.dump(data, f)
+
+
+if __name__ == '__main__':
+    mode = sys.argv[1]
+
+    if mode == "learn":
+        run_generation()
+
+    elif mode == "serve":
+        serve(workers=int(sys.argv[2]) if len(sys.argv) > 2 else 1)
+
+    elif mode == "serve-games":
+        serve_games(workers=int(sys.argv[2]) if len(sys.argv) > 2 else 1)
+
+    else:  # mode is "solution"
+        run_solution()
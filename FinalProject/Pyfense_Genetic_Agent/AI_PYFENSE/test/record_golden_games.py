@@ -0,0 +1,44 @@
+"""
+Records the achievements of the golden games (data/golden_games.json) from
+the graphic game, which test_simulation checks the simulation against.
+
+Run it from AI_PYFENSE on a machine with a display, after every change of the
+game rules: python3 test/record_golden_games.py
+"""
+import os
+import json
+import subprocess
+import sys
+import tempfile
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "data", "golden_games.json")
+RUN_FILE = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "Pyfense", "pyfense.py")
+
+
+def record(golden_path=GOLDEN_PATH):
+    with open(golden_path) as f:
+        golden = json.load(f)
+
+    directory = tempfile.mkdtemp()
+    input_path = os.path.join(directory, "input.json")
+    output_path = os.path.join(directory, "output.json")
+    with open(input_path, 'w') as f:
+        json.dump(golden["games"], f)
+
+    # the same command the genetic agent plays a generation with
+    subprocess.check_call([sys.executable, RUN_FILE, "learn", input_path,
+                           output_path, str(golden["init_wave"]),
+                           str(golden["waves"]), "0"],
+                          cwd=os.path.dirname(RUN_FILE))
+    with open(output_path) as f:
+        golden["achievements"] = json.load(f)
+
+    with open(golden_path, 'w') as f:
+        json.dump(golden, f, indent=4)
+        f.write("\n")
+
+
+if __name__ == '__main__':
+    record(*sys.argv[1:])
@@ -0,0 +1,147 @@
+"""
+Test genetic resources.
+"""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from Pyfense.genetic_resources import Tower, TowerType, TowerLevel, Genome, \
+    decode_genome_from_string, decode_genome_from_codes, pack_tower, \
+    TRANSITION_COSTS, write_genome_batch, read_genome_batch, is_genome_batch, \
+    GenomeBuffer
+
+
+def make_tower(towerType, level):
+    tower = Tower()
+    tower.update(towerType, level)
+    return tower
+
+
+class TestGenome(unittest.TestCase):
+    def setUp(self):
+        self.genome = Genome.empty(209)
+        self.genome[[3, 7]] = [make_tower(TowerType.PLASMA, TowerLevel.STRONG),
+                               make_tower(TowerType.RAPID, TowerLevel.WEAK)]
+
+    def test_view(self):
+        self.assertEqual(self.genome[3].get_tower(),
+                         (TowerType.PLASMA, TowerLevel.STRONG))
+        self.assertEqual(self.genome[3].price,
+                         make_tower(TowerType.PLASMA, TowerLevel.STRONG).price)
+        self.assertEqual(self.genome[0].type, TowerType.NO_TOWER)
+
+    def test_view_updates_genome(self):
+        for towerType in TowerType:
+            for level in TowerLevel:
+                for gene in (3, 7, 0):
+                    tower = make_tower(*self.genome[gene].get_tower())
+                    self.assertEqual(
+                        self.genome[gene].estimate_update(towerType, level),
+                        tower.estimate_update(towerType, level))
+                    genome = self.genome.copy()
+                    self.assertEqual(genome[gene].update(towerType, level),
+                                     tower.update(towerType, level))
+                    self.assertEqual(genome[gene].get_tower(),
+                                     tower.get_tower())
+                    self.assertEqual(genome[gene].price, tower.price)
+
+    def test_string(self):
+        towers = [make_tower(TowerType.NO_TOWER, TowerLevel.NO_TOWER)] * 209
+        towers[3] = make_tower(TowerType.PLASMA, TowerLevel.STRONG)
+        towers[7] = make_tower(TowerType.RAPID, TowerLevel.WEAK)
+        string_genome = " ".join(repr(tower) for tower in towers)
+        self.assertEqual(self.genome.to_string(), string_genome)
+        self.assertEqual(Genome.from_string(string_genome), self.genome)
+        decoded = decode_genome_from_string(string_genome)
+        self.assertEqual(decoded[3].get_tower(),
+                         self.genome[3].get_tower())
+
+    def test_cross(self):
+        other = Genome.empty(209)
+        baby1, baby2 = self.genome.cross(other, 5)
+        self.assertEqual(baby1[3].type, TowerType.PLASMA)
+        self.assertEqual(baby1[7].type, TowerType.NO_TOWER)
+        self.assertEqual(baby2[3].type, TowerType.NO_TOWER)
+        self.assertEqual(baby2[7].type, TowerType.RAPID)
+
+    def test_hash_and_bytes(self):
+        copy = Genome.from_bytes(self.genome.tobytes())
+        self.assertEqual(copy, self.genome)
+        self.assertEqual(hash(copy), hash(self.genome))
+        copy[3] = Tower()
+        self.assertNotEqual(copy, self.genome)
+
+    def test_transition_costs(self):
+        for towerType in TowerType:
+            for level in TowerLevel:
+                for gene in (3, 7, 0):
+                    code = pack_tower(towerType, level)
+                    self.assertEqual(
+                        TRANSITION_COSTS[self.genome.codes[gene], code],
+                        self.genome[gene].estimate_update(towerType, level))
+
+    def test_decode_from_codes(self):
+        for towerType in TowerType:
+            for level in TowerLevel:
+                genome = self.genome.copy()
+                genome[5].update(towerType, level)
+                decoded = decode_genome_from_codes(genome.codes)
+                self.assertEqual(
+                    [decoded[gene].get_tower() for gene in range(209)],
+                    [tower.get_tower() for tower in
+                     decode_genome_from_string(genome.to_string())])
+
+
+class TestGenomeBatch(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(".bin")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        genome = Genome.empty(209)
+        genome[3] = make_tower(TowerType.PLASMA, TowerLevel.STRONG)
+        codes = np.array([genome.codes, Genome.empty(209).codes])
+        write_genome_batch(self.path, [4, 9], codes, [15, 3], [2, 0])
+        self.assertTrue(is_genome_batch(self.path))
+        ids, read_codes, lives, min_lives = read_genome_batch(self.path)
+        self.assertEqual(ids.tolist(), [4, 9])
+        self.assertTrue(np.array_equal(read_codes, codes))
+        self.assertEqual(lives.tolist(), [15, 3])
+        self.assertEqual(min_lives.tolist(), [2, 0])
+
+    def test_json_is_not_a_batch(self):
+        with open(self.path, 'w') as f:
+            f.write('{"0": ["--", 15]}')
+        self.assertFalse(is_genome_batch(self.path))
+        self.assertRaises(ValueError, read_genome_batch, self.path)
+
+
+class TestGenomeBuffer(unittest.TestCase):
+    def test_attach(self):
+        genome = Genome.empty(209)
+        genome[3] = make_tower(TowerType.PLASMA, TowerLevel.STRONG)
+        buffer = GenomeBuffer.create(3, 209)
+        try:
+            buffer.put([4, 9], [genome.codes, genome.codes], [15, 3])
+            attached = GenomeBuffer.attach(buffer.name)
+            self.assertEqual(attached.count, 2)
+            self.assertEqual(attached.ids[:2].tolist(), [4, 9])
+            self.assertTrue(np.array_equal(attached.codes[1], genome.codes))
+            self.assertEqual(attached.min_lives[:2].tolist(), [0, 0])
+            attached.achievements[1] = [5, 3, 100, 70.5]
+            attached.close()
+            self.assertEqual(buffer.achievements[1].tolist(),
+                             [5, 3, 100, 70.5])
+            self.assertRaises(ValueError, buffer.put, [1, 2, 3, 4],
+                              [genome.codes] * 4, [1] * 4)
+        finally:
+            buffer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+"""
+Test the headless simulation.
+"""
+import io
+import os
+import json
+import random
+import tempfile
+import unittest
+
+from Pyfense import simulation
+from Pyfense.genetic_resources import Tower, TowerType, TowerLevel, \
+    Genome, GenomeBuffer, write_genome_batch
+from Pyfense import gamedata
+from Pyfense.gamedata import GENOME_SIZE
+
+
+def make_genome(towerType=TowerType.NO_TOWER, level=TowerLevel.NO_TOWER):
+    genome = [Tower() for i in range(GENOME_SIZE)]
+    for gene in genome:
+        gene.type = towerType
+        gene.level = level
+    return genome
+
+
+class TestSimulation(unittest.TestCase):
+    def setUp(self):
+        self.data = simulation.get_simulation_data()
+
+    def test_waypoints(self):
+        start = simulation.get_pixel_coords_from_position(self.data.startTile)
+        end = simulation.get_pixel_coords_from_position(self.data.endTile)
+        self.assertEqual(tuple(self.data.waypoints[0]), start)
+        self.assertEqual(tuple(self.data.waypoints[-1]), end)
+        self.assertEqual((len(self.data.waypoints) - 1) % 10, 0)
+
+    def test_data_is_shared(self):
+        self.assertIs(simulation.get_simulation_data(), self.data)
+
+    def test_empty_genome_loses_lives(self):
+        result = simulation.run_single_game(make_genome(), 9, 15, 1)
+        self.assertEqual(len(result), 4)
+        self.assertLess(result[1], 15)
+        self.assertEqual(result[2], 0)
+
+    def test_game_stops_below_min_lives(self):
+        full = simulation.run_single_game(make_genome(), 9, 15, 1)
+        stopped = simulation.run_single_game(make_genome(), 9, 15, 1,
+                                             min_lives=12)
+        self.assertEqual(stopped[1], 11)
+        self.assertLessEqual(stopped[0], full[0])
+        self.assertEqual(simulation.run_batch_of_games([make_genome()], 9,
+                                                       [15], 1, [12]),
+                         [stopped])
+
+    def test_gene_cells(self):
+        grid = self.data.gameGrid
+        cells = [(x, y) for x in range(gamedata.MIN_X, gamedata.MAX_X + 1)
+                 for y in range(gamedata.MIN_Y, gamedata.MAX_Y + 1)
+                 if grid[y][x] >= 3][:GENOME_SIZE]
+        self.assertEqual(len(self.data.gene_cells), GENOME_SIZE)
+        self.assertEqual(self.data.gene_cells, cells)
+        for x, y, x_pixel, y_pixel in gamedata.gene_cells(gamedata.LEVEL):
+            self.assertEqual(simulation.get_pixel_coords_from_position((y, x)),
+                             (x_pixel, y_pixel))
+
+    def test_towers_are_built(self):
+        genome = make_genome(TowerType.RAPID, TowerLevel.WEAK)
+        game = simulation.PyFenseSimulation(self.data, [genome], 1)
+        game.load_next_genome_to_grid()
+        self.assertGreater(len(game.towers), 0)
+        self.assertEqual(game.total_spent,
+                         len(game.towers) * self.data.tower[0][1]["cost"])
+
+    def test_run_is_deterministic(self):
+        genome = make_genome(TowerType.RAPID, TowerLevel.WEAK)
+        self.assertEqual(simulation.run_single_game(genome, 9, 15, 1),
+                         simulation.run_single_game(genome, 9, 15, 1))
+
+    def test_batch_plays_like_single_games(self):
+        rng = random.Random(0)
+        genomes, lives = [], []
+        for i in range(12):
+            genome = make_genome()
+            for gene in rng.sample(genome, rng.randrange(0, 120)):
+                gene.update(rng.choice(list(TowerType)[1:]),
+                            rng.choice(list(TowerLevel)[1:]))
+            genomes.append(genome)
+            lives.append(rng.randrange(0, 16))
+        for init_wave in (1, 12):
+            expected = [simulation.run_single_game(genome, 4, genomeLives,
+                                                   init_wave)
+                        for genome, genomeLives in zip(genomes, lives)]
+            self.assertEqual(simulation.run_batch_of_games(genomes, 4, lives,
+                                                           init_wave),
+                             expected)
+
+    def test_parallel_run_genomes(self):
+        genome_string = " ".join("--" if i % 3 else "21"
+                                 for i in range(GENOME_SIZE))
+        genome_dict = {"0": [genome_string, 15], "1": [genome_string, 10],
+                       "2": [genome_string, 3]}
+        serial, parallel = {}, {}
+        simulation.run_genomes(genome_dict, serial, 1, 9, 0)
+        simulation.run_genomes(genome_dict, parallel, 1, 9, 0, workers=2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(sorted(parallel), ["0", "1", "2"])
+
+    def test_run_genome_batch(self):
+        genome_string = " ".join("--" if i % 3 else "21"
+                                 for i in range(GENOME_SIZE))
+        genome_dict = {"0": [genome_string, 15], "1": [genome_string, 10, 7],
+                       "2": [genome_string, 3]}
+        expected, packed = {}, {}
+        simulation.run_genomes(genome_dict, expected, 1, 9, 0)
+        handle, path = tempfile.mkstemp(".bin")
+        os.close(handle)
+        try:
+            write_genome_batch(path, [0, 1, 2],
+                               [Genome.from_string(genome_string).codes] * 3,
+                               [15, 10, 3], [0, 7, 0])
+            simulation.run_genome_batch(path, packed, 1, 9, 0, workers=2)
+        finally:
+            os.remove(path)
+        self.assertEqual(packed, expected)
+
+    def test_serve(self):
+        genome_string = " ".join("--" if i % 3 else "21"
+                                 for i in range(GENOME_SIZE))
+        request = {"genomes": {"0": [genome_string, 15]}, "init_wave": 1,
+                   "waves": 9, "generation": 0}
+        requests = io.StringIO(json.dumps(request) + "\n" +
+                               json.dumps(request) + "\n")
+        responses = io.StringIO()
+        simulation.serve(requests, responses)
+        lines = responses.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        expected = {}
+        simulation.run_genomes(request["genomes"], expected, 1, 9, 0)
+        self.assertEqual(json.loads(lines[0]), json.loads(json.dumps(expected)))
+
+    def test_serve_genome_buffer(self):
+        genome_string = " ".join("--" if i % 3 else "21"
+                                 for i in range(GENOME_SIZE))
+        genome_dict = {"0": [genome_string, 15], "1": [genome_string, 10, 7],
+                       "2": [genome_string, 3]}
+        expected = {}
+        simulation.run_genomes(genome_dict, expected, 1, 9, 0)
+        buffer = GenomeBuffer.create(4, GENOME_SIZE)
+        try:
+            buffer.put([0, 1, 2], [Genome.from_string(genome_string).codes] * 3,
+                       [15, 10, 3], [0, 7, 0])
+            request = {"genome_buffer": buffer.name, "init_wave": 1,
+                       "waves": 9, "generation": 0}
+            responses = io.StringIO()
+            simulation.serve(io.StringIO(json.dumps(request) + "\n"),
+                             responses, workers=2)
+            self.assertEqual(json.loads(responses.getvalue()), {})
+            self.assertEqual(buffer.achievements[:3].tolist(),
+                             [expected[key] for key in ("0", "1", "2")])
+        finally:
+            buffer.close()
+
+    def test_serve_games(self):
+        genome_string = " ".join("--" if i % 3 else "21"
+                                 for i in range(GENOME_SIZE))
+        games = [{"key": key, "genome": genome_string, "lives": lives,
+                  "init_wave": 1, "waves": 9}
+                 for key, lives in ((7, 15), (8, 3))]
+        requests = io.StringIO("".join(json.dumps(game) + "\n"
+                                       for game in games))
+        responses = io.StringIO()
+        simulation.serve_games(requests, responses, workers=2)
+        answers = {answer["key"]: answer["result"] for answer in
+                   map(json.loads, responses.getvalue().splitlines())}
+        self.assertEqual(answers, {
+            game["key"]: simulation.run_encoded_genome(genome_string,
+                                                       game["lives"], 9, 1)
+            for game in games})
+
+
+class TestGoldenGames(unittest.TestCase):
+    """
+    Checks the simulation against achievements recorded from the graphic
+    game (see record_golden_games.py).
+    """
+    def setUp(self):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "data", "golden_games.json")
+        with open(path) as f:
+            self.golden = json.load(f)
+        if self.golden["achievements"] is None:
+            self.skipTest("no golden games recorded from the graphic game")
+
+    def test_simulation_plays_like_the_game(self):
+        output = {}
+        simulation.run_genomes(self.golden["games"], output,
+                               self.golden["init_wave"],
+                               self.golden["waves"], 0)
+        for key, achievement in self.golden["achievements"].items():
+            self.assertEqual(list(output[key]), achievement, msg=key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,15 +10,28 @@ class Logger:
     The Logger class is used to save the data of the Genetic Agent runs
     """
 
-    CSV_HEADER = ["Generation", "ID", "Fitness", "Lives lost", "Money earned", "Money spent", "Waves Survived"]
+    CSV_HEADER = ["Generation", "ID", "Fitness", "Lives lost", "Money earned", "Money spent", "Waves Survived",
+                  "Game stopped"]
 
-    def __init__(self):
+    def __init__(self, main_directory_path=None):
+        """
+        @param::main_directory_path - directory of a run to continue logging to (when resuming it), None for a new run
+        """
+        if main_directory_path is None:
+            self.main_directory_path = self.create_main_directory()
+            self.run_log = open(os.path.join(self.main_directory_path, "run.log"), 'w')
+        else:
+            self.main_directory_path = main_directory_path
+            self.run_log = open(os.path.join(self.main_directory_path, "run.log"), 'a')
 
-        self.main_directory_path = self.create_main_directory()
-        self.run_log = open(os.path.join(self.main_directory_path, "run.log"), 'w')
         self.segment_cvs_files = list()
         self.current_segment = -1
 
+        # Continue the segments that were already logged:
+        while os.path.exists(os.path.join(self.main_directory_path, "segment_" + str(self.current_segment + 1) + ".csv")):
+            self.current_segment += 1
+            self.segment_cvs_files.append(self.get_csv_file_name())
+
         print("The logs to this run may be found under directory:")
         print(self.main_directory_path)
 
@@ -61,6 +74,7 @@ class Logger:
         file need to be open as writeable
         """
         self.run_log.write(data + "\n")
+        self.run_log.flush()  # keep the log of runs that die (they may be resumed)
 
 
     def write_run_parameters(self, pop_size, gen_num, fit_num, mut_rate, init_money, seg_num, waves_per_seg):
@@ -104,14 +118,44 @@ class Logger:
         self.write_to_run_log("Learned segment " + str(seg_num) + " in (hh:mm:ss.ms) {}".format(time) + "\n")
 
 
-    def save_generation_summary(self, gen_num, avrg_fitns, high_fitns):
+    def save_generation_summary(self, gen_num, avrg_fitns, high_fitns, diversity=None):
         """
         @param::gen_num - generation number
         @param::avrg_fitns - average fitness of the last generation of the segment
         @param::high_fitns - highest fitness of the last generation of the segment
+        @param::diversity - mean Hamming distance between the genomes of the generation, if known
+        """
+        line = "Fitness of generation " + str(gen_num) + " - average: " + str(avrg_fitns) + " highest: " + \
+               str(high_fitns)
+        if diversity is not None:
+            line += " diversity: " + str(diversity)
+        self.write_to_run_log(line)
+
+
+    def save_generation_timing(self, seg_num, gen_num, seconds, counts):
+        """
+        @param::seg_num - segment number
+        @param::gen_num - generation number
+        @param::seconds - dict of phase -> seconds spent on it since the last generation
+        @param::counts - dict of counter -> count since the last generation
+        """
+        path = os.path.join(self.main_directory_path, "timing.csv")
+        is_new = not os.path.exists(path)
+        with open(path, 'a+', newline ='') as file:
+            write = csv.writer(file)
+            if is_new:
+                write.writerow(["Segment", "Generation"] + [phase + " seconds" for phase in seconds] + list(counts))
+            write.writerow([seg_num, gen_num] + ["{:.6f}".format(time) for time in seconds.values()] +
+                           list(counts.values()))
+
+
+    def save_segment_timing(self, seg_num, seconds):
+        """
+        @param::seg_num - segment number
+        @param::seconds - dict of phase -> seconds spent on it in the segment
         """
-        self.write_to_run_log("Fitness of generation " + str(gen_num) + " - average: " + 
-                                        str(avrg_fitns) + " highest: "  + str(high_fitns))
+        self.write_to_run_log("Time of segment " + str(seg_num) + " phases - " +
+                              " ".join(phase + ": {:.3f}s".format(time) for phase, time in seconds.items()))
 
 
     def write_failure_message(self, seg_num):
@@ -123,7 +167,8 @@ class Logger:
 
     def save_generation_data(self, data):
         """
-        @param::data - data to save, list of lists(generation, id, fitness, money earned, money spent, lives lost, waves survived)
+        @param::data - data to save, list of lists(generation, id, fitness, money earned, money spent, lives lost, waves survived,
+                       whether the game was stopped below its min_lives)
         """
         with open(self.segment_cvs_files[self.current_segment], 'a+', newline ='') as file:
             write = csv.writer(file) 